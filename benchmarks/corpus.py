@@ -0,0 +1,96 @@
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List
+
+
+# Prompt fragments exercising every pattern handled by PolishParser
+TIME_FRAGMENTS = {
+    'ampm-scalar': ['o 8 30 wieczorem', '7:15 rano'],
+    'ampm-ordinal': ['o ósmej trzydzieści wieczorem', 'o siódmej piętnaście rano'],
+    'ampm-single-scalar': ['o 8 wieczorem', 'o 6 rano'],
+    'ampm-single-ordinal': ['o ósmej rano', 'o drugiej po południu', 'o dziesiątej przed południem'],
+    'ampm-scalar-two-digit-minutes': ['o 8 trzydzieści pięć po południu', '9 czterdzieści pięć rano'],
+    'ampm-ordinal-two-digit-minutes': ['o ósmej trzydzieści pięć po południu', 'o siódmej dwadzieścia dwa rano'],
+    '24-ordinal': ['o dwudziestej piętnaście', 'o osiemnastej 45'],
+    '24-scalar': ['21:37', '10.30', '18 00'],
+    '24-single-scalar': ['o 20', 'na 18', 'w 12'],
+    '24-single-ordinal': ['o dwudziestej', 'o dwudziestej pierwszej', 'o dwunastej'],
+    '24-scalar-two-digit-minutes': ['o 20 trzydzieści pięć', '19 dwadzieścia jeden'],
+    '24-ordinal-two-digit-minutes': ['o dwudziestej trzydzieści pięć', 'o siedemnastej czterdzieści dwa'],
+}
+
+DATE_FRAGMENTS = {
+    'grabber-day': ['jutro', 'dziś', 'dzisiaj'],
+    'next-week': ['za tydzień'],
+    'day-after-grabber-day': ['pojutrze'],
+    'scalar-full': ['20.08.2024', '20/8/2024', '31.12.2023', '1.03.2025'],
+    'scalar-full-reverse': ['2024-08-20', '2025.01.15'],
+    'month-name-full': ['19 września 2024', '3 maja 2025'],
+    'scalar': ['20 sierpnia', '14 lutego', '1 listopada'],
+    'ordinal': ['dwudziestego sierpnia', 'pierwszego grudnia', 'trzydziestego pierwszego października'],
+    'week-day': ['w sobotę', 'we wtorek', 'w piątek'],
+    'next-week-day': ['w następną sobotę', 'w kolejny poniedziałek'],
+    'week-day-next-week': ['w sobotę za tydzień', 'w czwartek za tydzień'],
+    'week-day-next-week-reverse': ['za tydzień w sobotę', 'za tydzień w niedzielę'],
+    'week-day-count-weeks': ['w piątek za 2 tygodnie', 'w środę za trzy tygodnie'],
+    'week-day-count-weeks-reverse': ['za dwa tygodnie w niedzielę', 'za 3 tygodnie w poniedziałek'],
+}
+
+REMINDER_FRAGMENTS = {
+    'reminder': ['przypomnij godzinę wcześniej', 'przypomnienie dzień przed', 'powiadom tydzień wcześniej'],
+    'reminder-count': ['przypomnij 15 minut przed', 'z przypomnieniem 2 godziny wcześniej',
+                       'powiadom mnie 3 dni przed'],
+}
+
+NAMES = [
+    'Spotkanie', 'Granie w Dotę', 'Raid w piątkowy wieczór', 'Liga nocna', 'Konferencja głosowa na Google Meet',
+    'Kurs angielskiego', 'Sesja RPG', 'Turniej szachowy', 'Urodziny Ani', 'Dodaj próbę zespołu',
+]
+
+NOISE = ['proszę', 'mi', 'ok', 'hej', '!', ',', '...', '(ważne)']
+
+POLISH_DIACRITICS = str.maketrans('ąćęłńóśźżĄĆĘŁŃÓŚŹŻ', 'acelnoszzACELNOSZZ')
+
+
+@dataclass(frozen=True)
+class CorpusPrompt:
+    pattern: str
+    text: str
+    now: datetime
+
+
+def _decorate(rng: random.Random, text: str) -> str:
+    if rng.random() < 0.3:
+        text = text.translate(POLISH_DIACRITICS)
+    if rng.random() < 0.2:
+        text = text.upper() if rng.random() < 0.5 else text.capitalize()
+    return text
+
+
+def _make_prompt(rng: random.Random, pattern: str, fragment: str) -> str:
+    parts = [rng.choice(NAMES)]
+    if pattern in TIME_FRAGMENTS:
+        parts += [rng.choice(DATE_FRAGMENTS[rng.choice(list(DATE_FRAGMENTS))]), fragment]
+    elif pattern in DATE_FRAGMENTS:
+        parts += [fragment, rng.choice(TIME_FRAGMENTS[rng.choice(list(TIME_FRAGMENTS))])]
+    else:
+        parts += [rng.choice(DATE_FRAGMENTS['grabber-day']), rng.choice(TIME_FRAGMENTS['24-single-scalar']), fragment]
+    if pattern not in REMINDER_FRAGMENTS and rng.random() < 0.4:
+        parts.append(rng.choice(rng.choice(list(REMINDER_FRAGMENTS.values()))))
+    if rng.random() < 0.3:
+        parts.insert(rng.randrange(1, len(parts) + 1), rng.choice(NOISE))
+    return rng.choice([' ', ', ', '. ']).join(_decorate(rng, part) for part in parts)
+
+
+def build_corpus(size: int = 2000, seed: int = 0) -> List[CorpusPrompt]:
+    rng = random.Random(seed)
+    fragments = {**TIME_FRAGMENTS, **DATE_FRAGMENTS, **REMINDER_FRAGMENTS}
+    patterns = list(fragments)
+    corpus = []
+    for i in range(size):
+        pattern = patterns[i % len(patterns)]
+        text = _make_prompt(rng, pattern, rng.choice(fragments[pattern]))
+        now = datetime(2023, 8, 1) + timedelta(days=rng.randrange(365), minutes=rng.randrange(24 * 60))
+        corpus.append(CorpusPrompt(pattern, text, now))
+    return corpus
@@ -0,0 +1,68 @@
+import argparse
+import statistics
+import sys
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from eventbot.domain.services.parser.fuzzy import FuzzyIndex, max_distance, osa_distance
+from eventbot.domain.services.parser.polish import PolishParser
+
+
+WORDS = {
+    'misspelled': ['piontek', 'grudnai', 'jutor', 'wtorke', 'sierpina', 'pojutrzee', 'godzinr', 'dwudziestj'],
+    'vocabulary': ['piatek', 'grudnia', 'dwudziestej', 'pierwszego', 'tygodnie', 'siedemnascie'],
+    'unknown': ['konferencja', 'zgloszeniach', 'biznesowe', 'spotkanie', 'granie', 'dote', 'meet', 'google'],
+}
+
+REPEATS = 200
+DEFAULT_BUDGET_US = 250.0
+
+
+# Reference implementation: the whole vocabulary compared with the word
+def scan(vocabulary: Dict[str, str], word: str) -> Optional[str]:
+    distance = max_distance(word)
+    if not distance or not word.isalpha():
+        return None
+    distances = {candidate: osa_distance(word, candidate) for candidate in vocabulary}
+    best_distance = min(distances.values())
+    matches = {vocabulary[candidate] for candidate, candidate_distance in distances.items()
+               if candidate_distance == best_distance}
+    if best_distance > distance or len(matches) != 1:
+        return None
+    return matches.pop()
+
+
+def measure(lookup, words: List[str]) -> List[float]:
+    timings = []
+    for _ in range(REPEATS):
+        for word in words:
+            started = perf_counter()
+            lookup(word)
+            timings.append(perf_counter() - started)
+    return timings
+
+
+def run(args: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description='Fuzzy vocabulary lookup latency')
+    arg_parser.add_argument('--budget-us', type=float, default=DEFAULT_BUDGET_US,
+                            help='p99 latency allowed for a single lookup')
+    options = arg_parser.parse_args(args)
+    index: FuzzyIndex = PolishParser.NORMALIZER._fuzzy_index
+    vocabulary = index._vocabulary
+
+    over_budget = False
+    print(f'{"words":<12} {"index p50 [us]":>15} {"index p99 [us]":>15} {"scan p50 [us]":>14}')
+    for kind, words in WORDS.items():
+        assert [index.get(word) for word in words] == [vocabulary.get(word) or scan(vocabulary, word) for word in words]
+        quantiles = statistics.quantiles(measure(index.get, words), n=100)
+        scan_p50 = statistics.median(measure(lambda word: scan(vocabulary, word), words[:2])[:20])
+        print(f'{kind:<12} {quantiles[49] * 1e6:>15.2f} {quantiles[98] * 1e6:>15.2f} {scan_p50 * 1e6:>14.2f}')
+        over_budget |= quantiles[98] * 1e6 > options.budget_us
+    if over_budget:
+        print(f'p99 latency over the budget of {options.budget_us:.0f} us')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,62 @@
+import random
+import timeit
+from typing import Dict, List, Optional, Tuple
+
+from eventbot.domain.services.parser.matcher import PatternMatcher
+from eventbot.domain.services.parser.polish import (
+    PolishParser,
+    REMINDER_PATTERNS,
+    UNEQUIVOCAL_DATE_PATTERNS,
+    UNEQUIVOCAL_TIME_PATTERNS,
+    AMBIGUOUS_DATE_PATTERNS,
+    AMBIGUOUS_TIME_PATTERNS,
+)
+
+
+PATTERN_SETS = {
+    'reminder': REMINDER_PATTERNS,
+    'unequivocal-date': UNEQUIVOCAL_DATE_PATTERNS,
+    'unequivocal-time': UNEQUIVOCAL_TIME_PATTERNS,
+    'ambiguous-date': AMBIGUOUS_DATE_PATTERNS,
+    'ambiguous-time': AMBIGUOUS_TIME_PATTERNS,
+}
+
+NOISE = ['o', 'w', 'na', 'i', 'z', 'po', 'u', 'do', 'ten', '3', '14', 'grania', 'ekipa', 'sala', 'rano', 'dzien']
+PROMPT_LENGTH = 128
+REPEATS = 5
+NUMBER = 1000
+
+
+def make_noisy_prompt(rng: random.Random, tail: str) -> str:
+    words = []
+    while len(' '.join(words)) < PROMPT_LENGTH - len(tail):
+        words.append(rng.choice(NOISE))
+    return ' '.join(words + [tail])[:PROMPT_LENGTH]
+
+
+# Reference implementation: every pattern tried at every offset
+def sweep_match(patterns: Dict[str, Tuple[int, ...]], token_tags: List[int]) -> Optional[Tuple[str, int, int]]:
+    for pattern_name, pattern in patterns.items():
+        for start in range(len(token_tags) - len(pattern) + 1):
+            if all(mask & tags for mask, tags in zip(pattern, token_tags[start:start + len(pattern)])):
+                return pattern_name, start, start + len(pattern)
+    return None
+
+
+def run() -> None:
+    rng = random.Random(0)
+    prompts = [make_noisy_prompt(rng, tail) for tail in ('jutro o 20', 'przypomnij 15 minut przed', '')]
+    print(f'{"pattern set":<18} {"tokens":>7} {"sweep [us]":>11} {"trie [us]":>10}')
+    for prompt in prompts:
+        tokens = PolishParser._reduce(PolishParser._tokenize(PolishParser.NORMALIZER.words(prompt)))
+        token_tags = [token.tags for token in tokens if token.tags]
+        for set_name, patterns in PATTERN_SETS.items():
+            matcher = PatternMatcher(patterns)
+            assert matcher.match(token_tags) == sweep_match(patterns, token_tags)
+            sweep = min(timeit.repeat(lambda: sweep_match(patterns, token_tags), repeat=REPEATS, number=NUMBER))
+            trie = min(timeit.repeat(lambda: matcher.match(token_tags), repeat=REPEATS, number=NUMBER))
+            print(f'{set_name:<18} {len(token_tags):>7} {sweep / NUMBER * 1e6:>11.2f} {trie / NUMBER * 1e6:>10.2f}')
+
+
+if __name__ == '__main__':
+    run()
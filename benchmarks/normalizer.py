@@ -0,0 +1,34 @@
+import timeit
+from datetime import datetime
+
+from eventbot.domain.services.parser.polish import PolishParser
+
+
+PROMPTS = [
+    'Granie w Dotę jutro o 21:37',
+    'Spotkanie biznesowe 19 września 2023 o 14',
+    'Impreza w następną sobotę o dwudziestej pierwszej, przypomnij 15 minut przed',
+    'Konferencja głosowa o zgłoszeniach na Google Meet, jutro o ósmej trzydzieści pięć po południu',
+]
+
+NOW = datetime(2023, 8, 10)
+REPEATS = 5
+NUMBER = 2000
+
+
+def measure(statement) -> float:
+    timings = timeit.repeat(statement, repeat=REPEATS, number=NUMBER)
+    return min(timings) / NUMBER * 1e6
+
+
+def run() -> None:
+    parser = PolishParser()
+    print(f'{"prompt":<64} {"normalize [us]":>15} {"parse [us]":>12}')
+    for prompt in PROMPTS:
+        normalize_latency = measure(lambda: PolishParser._normalize(prompt))
+        parse_latency = measure(lambda: parser(prompt, NOW))
+        print(f'{prompt[:64]:<64} {normalize_latency:>15.2f} {parse_latency:>12.2f}')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,136 @@
+import argparse
+import importlib
+import json
+import statistics
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from eventbot.domain import ParsingError
+from eventbot.domain.services.parser import Parser, ParserInstrumentation, ParseTiming
+from eventbot.domain.services.parser.polish import PolishParser
+from benchmarks.corpus import CorpusPrompt, build_corpus
+
+
+STAGES = ['normalize', 'tokenize', 'reduce', 'seek_reminder_delta', 'seek_date_unequivocal', 'seek_time_unequivocal',
+          'seek_date_ambiguous', 'seek_time_ambiguous', 'seek_name', 'total']
+ROUNDS = 3
+DEFAULT_CORPUS_SIZE = 2000
+DEFAULT_THRESHOLD = 0.2
+
+
+class StageRecorder(ParserInstrumentation):
+    def __init__(self):
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+
+    def on_stage(self, stage: str, duration: float) -> None:
+        self.timings[stage].append(duration)
+
+    def on_parsed(self, timing: ParseTiming) -> None:
+        self.timings['total'].append(timing.duration)
+
+
+# Returns the stage statistics and the number of parses that raised ParsingError. Any other error is a bug
+# in the parser and stops the benchmark
+def measure(corpus: List[CorpusPrompt]) -> Tuple[Dict[str, Dict[str, float]], int]:
+    parser = PolishParser()
+    recorder = StageRecorder()
+    parser.instrument(recorder)
+    rejected = 0
+    for _ in range(ROUNDS):
+        for prompt in corpus:
+            try:
+                parser(prompt.text, prompt.now)
+            except ParsingError:
+                # Prompts the parser rejects still report the stages they went through
+                rejected += 1
+    return {stage: summarize(recorder.timings[stage]) for stage in STAGES if recorder.timings[stage]}, rejected
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    quantiles = statistics.quantiles(timings, n=100)
+    return {
+        'ops_per_sec': len(timings) / sum(timings),
+        'p50_us': quantiles[49] * 1e6,
+        'p99_us': quantiles[98] * 1e6,
+    }
+
+
+def find_regressions(results: Dict[str, Dict[str, float]],
+                     baseline: Dict[str, Dict[str, float]],
+                     threshold: float) -> List[str]:
+    regressions = []
+    for stage, stats in results.items():
+        if stage not in baseline:
+            continue
+        for metric in ('p50_us', 'p99_us'):
+            previous = baseline[stage][metric]
+            if previous and stats[metric] > previous * (1 + threshold):
+                regressions.append(f'{stage} {metric}: {previous:.2f} -> {stats[metric]:.2f}')
+    return regressions
+
+
+def describe(parser: Parser, prompt: CorpusPrompt) -> str:
+    try:
+        return repr(parser(prompt.text, prompt.now))
+    except Exception as e:
+        return type(e).__name__
+
+
+def compare(corpus: List[CorpusPrompt], engine: Parser) -> List[str]:
+    reference = PolishParser()
+    mismatches = []
+    for prompt in corpus:
+        expected, actual = describe(reference, prompt), describe(engine, prompt)
+        if expected != actual:
+            mismatches.append(f'[{prompt.pattern}] {prompt.text!r} @ {prompt.now}: {expected} != {actual}')
+    return mismatches
+
+
+def load_engine(path: str) -> Parser:
+    module_name, class_name = path.split(':')
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def print_results(results: Dict[str, Dict[str, float]]) -> None:
+    print(f'{"stage":<24} {"ops/sec":>12} {"p50 [us]":>10} {"p99 [us]":>10}')
+    for stage, stats in results.items():
+        print(f'{stage:<24} {stats["ops_per_sec"]:>12.0f} {stats["p50_us"]:>10.2f} {stats["p99_us"]:>10.2f}')
+
+
+def run(args: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description='PolishParser corpus benchmark')
+    arg_parser.add_argument('--size', type=int, default=DEFAULT_CORPUS_SIZE)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--save-baseline', metavar='PATH')
+    arg_parser.add_argument('--baseline', metavar='PATH')
+    arg_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    arg_parser.add_argument('--compare', metavar='MODULE:CLASS',
+                            help='compare outputs of another parser engine with PolishParser instead of timing')
+    options = arg_parser.parse_args(args)
+    corpus = build_corpus(options.size, options.seed)
+
+    if options.compare:
+        mismatches = compare(corpus, load_engine(options.compare))
+        for mismatch in mismatches:
+            print(mismatch)
+        print(f'{len(mismatches)} mismatches in {len(corpus)} prompts')
+        return 1 if mismatches else 0
+
+    results, rejected = measure(corpus)
+    print_results(results)
+    print(f'{rejected} of {ROUNDS * len(corpus)} parses rejected')
+    if options.save_baseline:
+        with open(options.save_baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+    if options.baseline:
+        with open(options.baseline) as file:
+            regressions = find_regressions(results, json.load(file), options.threshold)
+        for regression in regressions:
+            print(f'Regression: {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
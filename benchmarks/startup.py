@@ -0,0 +1,57 @@
+import os
+import statistics
+import subprocess
+import sys
+
+
+ENTRY_POINTS = {
+    'bot': 'eventbot.application.run',
+    'bootstrap': 'eventbot.application.bootstrap',
+    'drop_database': 'eventbot.application.drop_database',
+}
+
+POLISH_MODULE = 'eventbot.domain.services.parser.polish'
+REPEATS = 7
+
+# Imports the module in a fresh interpreter, printing import time and whether the Polish parser got loaded
+IMPORT_STATEMENT = '''
+import sys, time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started, {polish!r} in sys.modules)
+'''
+
+FIRST_PARSE_STATEMENT = '''
+import time
+from datetime import datetime
+started = time.perf_counter()
+from eventbot.domain import CalendarLanguage, get_parser
+get_parser(CalendarLanguage.PL)('Granie w Dotę jutro o 21:37', datetime(2023, 8, 10))
+print(time.perf_counter() - started, True)
+'''
+
+
+def run_cold(statement: str) -> (float, bool):
+    # Config reads the environment on import
+    env = {'POSTGRES_PORT': '5432', 'LANGUAGE': 'pl', **os.environ}
+    output = subprocess.run([sys.executable, '-c', statement], env=env, check=True, capture_output=True, text=True)
+    duration, polish_loaded = output.stdout.split()
+    return float(duration), polish_loaded == 'True'
+
+
+def measure(statement: str) -> (float, bool):
+    results = [run_cold(statement) for _ in range(REPEATS)]
+    return statistics.median(duration for duration, _ in results) * 1e3, results[-1][1]
+
+
+def run() -> None:
+    print(f'{"entry point":<24} {"cold import [ms]":>17} {"parser loaded":>14}')
+    for name, module in ENTRY_POINTS.items():
+        duration, polish_loaded = measure(IMPORT_STATEMENT.format(module=module, polish=POLISH_MODULE))
+        print(f'{name:<24} {duration:>17.2f} {str(polish_loaded):>14}')
+    duration, _ = measure(FIRST_PARSE_STATEMENT)
+    print(f'{"domain + first parse":<24} {duration:>17.2f} {"True":>14}')
+
+
+if __name__ == '__main__':
+    run()
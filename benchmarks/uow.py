@@ -0,0 +1,107 @@
+import argparse
+import statistics
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from eventbot.domain import Calendar, CalendarUnitOfWork, EventDeclaration
+from eventbot.domain.enums import Decision
+from eventbot.infrastructure.memory import InMemoryCalendarStore, InMemoryCalendarUnitOfWork
+from tests.fakes import FakeClock
+
+
+DEFAULT_CALENDARS = 20
+DEFAULT_EVENTS = 20
+DEFAULT_DECLARATIONS = 200
+ROUNDS = 3
+
+EVENT_PROMPT = 'Wydarzenie testowe, 12 grudnia 2023 o 22, przypomnienie 10 minut wcześniej'
+CLOCK = FakeClock(datetime(2023, 8, 1, 12))
+
+
+def create_calendars(unit_of_work: CalendarUnitOfWork, calendars: int, events: int) -> Dict[str, List[str]]:
+    event_codes = {}
+    for number in range(calendars):
+        channel_handle = f'channel-{number}'
+        with unit_of_work:
+            calendar = Calendar('guild', channel_handle)
+            notifier = unit_of_work.outbox('guild', channel_handle)
+            event_codes[channel_handle] = [calendar.add_event(EVENT_PROMPT, 'Alice#003', CLOCK,
+                                                              unit_of_work.event_sequence_generator, notifier)
+                                           for _ in range(events)]
+            unit_of_work.calendars.add_calendar(calendar)
+            unit_of_work.commit()
+    return event_codes
+
+
+def declare(unit_of_work: CalendarUnitOfWork, event_codes: Dict[str, List[str]], declarations: int) -> None:
+    for number in range(declarations):
+        channel_handle = list(event_codes)[number % len(event_codes)]
+        codes = event_codes[channel_handle]
+        with unit_of_work:
+            calendar = unit_of_work.calendars.get_calendar_by_guild_and_channel('guild', channel_handle)
+            calendar.apply_declarations([EventDeclaration(f'User#{number}', codes[number % len(codes)], Decision.YES)])
+            unit_of_work.commit()
+
+
+def sweep(unit_of_work: CalendarUnitOfWork, event_codes: Dict[str, List[str]]) -> None:
+    with unit_of_work:
+        for channel_handle in event_codes:
+            calendar = unit_of_work.calendars.get_calendar_by_guild_and_channel('guild', channel_handle)
+            calendar.send_pending_notifications(CLOCK, unit_of_work.outbox('guild', channel_handle))
+        unit_of_work.calendars.get_notification_schedule()
+        unit_of_work.commit()
+
+
+def measure(operation: Callable[[], None]) -> float:
+    started = time.perf_counter()
+    operation()
+    return time.perf_counter() - started
+
+
+def run_round(make_unit_of_work: Callable[[], CalendarUnitOfWork], arguments: argparse.Namespace) -> Dict[str, float]:
+    unit_of_work = make_unit_of_work()
+    timings = {}
+    event_codes = {}
+
+    def create():
+        event_codes.update(create_calendars(unit_of_work, arguments.calendars, arguments.events))
+
+    timings['create'] = measure(create)
+    timings['declare'] = measure(lambda: declare(unit_of_work, event_codes, arguments.declarations))
+    timings['sweep'] = measure(lambda: sweep(unit_of_work, event_codes))
+    return timings
+
+
+def make_sql_unit_of_work() -> CalendarUnitOfWork:
+    from eventbot.infrastructure.persistence import SQLCalendarUnitOfWork, build_dsn, drop_tables,\
+        get_database_engine, get_session_factory, map_tables
+    from eventbot.infrastructure.persistence.sequence_generator import EVENT_NUMBERS
+    engine = get_database_engine(build_dsn())
+    drop_tables(engine)
+    EVENT_NUMBERS.reset()
+    map_tables(engine)
+    return SQLCalendarUnitOfWork(get_session_factory(engine))
+
+
+def run() -> None:
+    argument_parser = argparse.ArgumentParser(description='Times the same workload on each unit of work')
+    argument_parser.add_argument('--calendars', type=int, default=DEFAULT_CALENDARS)
+    argument_parser.add_argument('--events', type=int, default=DEFAULT_EVENTS)
+    argument_parser.add_argument('--declarations', type=int, default=DEFAULT_DECLARATIONS)
+    # Drops and recreates the tables of the configured database
+    argument_parser.add_argument('--sql', action='store_true')
+    arguments = argument_parser.parse_args()
+
+    implementations = {'memory': lambda: InMemoryCalendarUnitOfWork(InMemoryCalendarStore())}
+    if arguments.sql:
+        implementations['sql'] = make_sql_unit_of_work
+    print(f'{"unit of work":<14} {"create [ms]":>12} {"declare [ms]":>13} {"sweep [ms]":>11}')
+    for name, make_unit_of_work in implementations.items():
+        rounds = [run_round(make_unit_of_work, arguments) for _ in range(ROUNDS)]
+        medians = {step: statistics.median(timings[step] for timings in rounds) * 1e3 for step in rounds[0]}
+        print(f'{name:<14} {medians["create"]:>12.2f} {medians["declare"]:>13.2f} {medians["sweep"]:>11.2f}')
+
+
+if __name__ == '__main__':
+    run()
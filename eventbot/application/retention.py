@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from eventbot.infrastructure.config import Config
+from eventbot.infrastructure.persistence import SQLRetention, RetentionReport, get_database_engine,\
+    get_session_factory, build_dsn, read_retention_mode
+from eventbot.infrastructure.time import LocalTimeClock
+
+
+def print_report(label: str, report: RetentionReport) -> None:
+    print(f'{label:<8} {report.events:>8} events {report.declarations:>8} declarations '
+          f'{report.outbox_messages:>8} outbox messages {report.rows_per_second:>10.1f} rows/s')
+
+
+def retain():
+    config = Config()
+    retention = SQLRetention(get_session_factory(get_database_engine(build_dsn(config))),
+                             read_retention_mode(config.retention_mode),
+                             timedelta(days=config.retention_ttl_days),
+                             config.retention_batch_size,
+                             config.retention_pause)
+    total = retention.run(LocalTimeClock().now(), lambda report: print_report('batch', report))
+    print_report('total', total)
+
+
+if __name__ == '__main__':
+    retain()
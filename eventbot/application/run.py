@@ -1,14 +1,26 @@
+from eventbot.domain import configure_parse_cache, get_parser
 from eventbot.infrastructure.discord import run_bot
 from eventbot.infrastructure.config import Config
-from eventbot.infrastructure.persistence import SQLCalendarUnitOfWork, get_session_factory,\
-    get_database_engine, build_dsn
+from eventbot.infrastructure.memory import InMemoryCalendarStore, AsyncInMemoryCalendarUnitOfWork, AsyncInMemoryOutbox
+from eventbot.infrastructure.persistence import AsyncSQLCalendarUnitOfWork, AsyncSQLOutbox, get_async_session_factory,\
+    get_async_database_engine, build_async_dsn
 from eventbot.infrastructure.time import LocalTimeClock
 
 
 def run():
     config = Config()
-    uow = SQLCalendarUnitOfWork(get_session_factory(get_database_engine(build_dsn(config))))
-    run_bot(config.token, uow, LocalTimeClock())
+    configure_parse_cache(config.parse_cache_size)
+    # Load the parser up front, so the first prompt does not pay for it
+    get_parser(config.language)
+    if config.storage == 'memory':
+        store = InMemoryCalendarStore(config.memory_snapshot_path or None)
+        run_bot(config.token, AsyncInMemoryCalendarUnitOfWork(store), LocalTimeClock(), AsyncInMemoryOutbox(store))
+    elif config.storage == 'postgres':
+        async_session_factory = get_async_session_factory(get_async_database_engine(build_async_dsn(config)))
+        run_bot(config.token, AsyncSQLCalendarUnitOfWork(async_session_factory), LocalTimeClock(),
+                AsyncSQLOutbox(async_session_factory))
+    else:
+        raise ValueError(f'Unknown storage set in config: {config.storage}')
 
 
 if __name__ == '__main__':
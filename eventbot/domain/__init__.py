@@ -1,15 +1,21 @@
-from .model import Calendar, CalendarLanguage
-from .uow import CalendarUnitOfWork
-from .repositories import CalendarRepository
-from .ports import Notifier, Clock, EventSequenceGenerator
+from .model import Calendar
+from .enums import CalendarLanguage
+from .services.parser import get_parser, configure_parse_cache, configure_parser_instrumentation
+from .uow import CalendarUnitOfWork, AsyncCalendarUnitOfWork
+from .repositories import CalendarRepository, AsyncCalendarRepository
+from .ports import Notifier, Clock, EventSequenceGenerator, AsyncEventSequenceGenerator
 from .exceptions import (
     EventInThePast,
     EventNotFound,
     UserNotPermittedToDeleteEvent,
     UserNotPermittedToSetReminderForEvent,
-    ReminderInThePast
+    ReminderInThePast,
+    CalendarModifiedConcurrently,
+    ParsingError,
+    ParsingTimeout
 )
-from .read_models import EventReadModel
+from .read_models import EventReadModel, CalendarScheduleReadModel
+from .dto import EventParsingResult, EventDraft, EventDeclaration
 
 __all__ = [
     'EventInThePast',
@@ -17,12 +23,25 @@ __all__ = [
     'UserNotPermittedToDeleteEvent',
     'UserNotPermittedToSetReminderForEvent',
     'ReminderInThePast',
+    'CalendarModifiedConcurrently',
+    'ParsingError',
+    'ParsingTimeout',
     'Calendar',
     'Notifier',
     'Clock',
     'EventSequenceGenerator',
+    'AsyncEventSequenceGenerator',
     'CalendarLanguage',
+    'get_parser',
+    'configure_parse_cache',
+    'configure_parser_instrumentation',
     'CalendarRepository',
+    'AsyncCalendarRepository',
     'CalendarUnitOfWork',
+    'AsyncCalendarUnitOfWork',
     'EventReadModel',
+    'CalendarScheduleReadModel',
+    'EventParsingResult',
+    'EventDraft',
+    'EventDeclaration',
 ]
@@ -2,9 +2,32 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 
+from eventbot.domain.enums import Decision
+
 
 @dataclass(init=True, frozen=True)
 class EventParsingResult:
     name: str
     time: datetime
     reminder_delta: Optional[timedelta] = None
+
+
+@dataclass(init=True, frozen=True)
+class EventDraft:
+    name: str
+    time: datetime
+    owner_handle: str
+    reminder_delta: Optional[timedelta] = None
+
+    @property
+    def reminder_time(self) -> Optional[datetime]:
+        if self.reminder_delta is None:
+            return None
+        return self.time - self.reminder_delta
+
+
+@dataclass(init=True, frozen=True)
+class EventDeclaration:
+    user_handle: str
+    event_code: str
+    decision: Decision
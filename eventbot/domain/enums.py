@@ -5,3 +5,13 @@ class Decision(Enum):
     YES = 'YES'
     NO = 'NO'
     MAYBE = 'MAYBE'
+
+
+class NotificationKind(Enum):
+    EVENT_CREATED = 'EVENT_CREATED'
+    REMINDER = 'REMINDER'
+    EVENT_START = 'EVENT_START'
+
+
+class CalendarLanguage(Enum):
+    PL = 'pl'
@@ -35,7 +35,19 @@ class UserNotPermittedToSetReminderForEvent(Exception):
         self.event_code: str = event_code
 
 
+# Raised on commit when a calendar was changed by someone else since it was loaded
+class CalendarModifiedConcurrently(Exception):
+    pass
+
+
 class ParsingError(Exception):
     def __init__(self, text: str):
-        super().__init__()
+        # Passed on, so that the error can be pickled back from a parser pool worker process
+        super().__init__(text)
         self.text = text
+
+
+class ParsingTimeout(ParsingError):
+    def __init__(self, text: str, timeout: float):
+        super().__init__(text)
+        self.timeout: float = timeout
@@ -1,14 +1,16 @@
+import heapq
 from uuid import UUID, uuid4
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from collections import Counter
+from typing import List, Optional, Dict, Sequence, Tuple, Union
 from dataclasses import dataclass
-from enum import Enum
 
 from eventbot.domain.ports import Clock, Notifier, EventSequenceGenerator
 from eventbot.domain.vo import EventCode
-from eventbot.domain.enums import Decision
-from eventbot.domain.services.create_code_for_event import create_code_for_event
-from eventbot.domain.services.parser import Parser, PolishParser
+from eventbot.domain.dto import EventParsingResult, EventDraft, EventDeclaration
+from eventbot.domain.enums import Decision, CalendarLanguage
+from eventbot.domain.services.create_code_for_event import create_code_for_event, make_event_code
+from eventbot.domain.services.parser import Parser, get_parser
 from eventbot.domain.exceptions import (
     EventNotFound,
     EventInThePast,
@@ -18,11 +20,11 @@ from eventbot.domain.exceptions import (
 )
 
 
-class CalendarLanguage(Enum):
-    PL = 'pl'
-
-
 class Calendar:
+    # Events by the instant of their next notification, built on first use. Entries are not removed
+    # when an event changes, an entry not matching the event's next due instant anymore is skipped instead
+    _due_events: Optional[List[Tuple[datetime, str]]] = None
+
     def __init__(self, guild_handle: str, channel_handle: str, language: CalendarLanguage = CalendarLanguage.PL):
         self._id: UUID = uuid4()
         self._guild_handle: str = guild_handle
@@ -38,29 +40,78 @@ class Calendar:
                   sequence_generator: EventSequenceGenerator,
                   notifier: Notifier
                   ) -> str:
-        parser: Parser = self._get_parser(clock)
-        event_parsing_result = parser(prompt)
-        name = event_parsing_result.name
-        time = event_parsing_result.time
-        reminder_delta = event_parsing_result.reminder_delta
+        parser: Parser = get_parser(self._language)
+        event_parsing_result = parser(prompt, clock.now())
+        event_draft = Calendar.prepare_event(event_parsing_result, owner_handle, clock)
+        return self.add_event_draft(event_draft, sequence_generator, notifier)
+
+    # First phase of adding an event: validates the parsed prompt without touching any calendar,
+    # so that it can be done before the calendar is loaded and locked
+    @staticmethod
+    def prepare_event(event_parsing_result: EventParsingResult, owner_handle: str, clock: Clock) -> EventDraft:
         current_time = clock.now()
-        if time <= current_time:
-            raise EventInThePast(current_time, time)
-        event_code = create_code_for_event(name, sequence_generator)
-        event: Event = Event(self._id, name, event_code, time, owner_handle)
-        event.declare_yes(owner_handle)
-        if reminder_delta is not None:
-            reminder_time = time - reminder_delta
-            if reminder_time <= current_time:
-                raise ReminderInThePast(current_time, reminder_time)
-            event.set_reminder(reminder_delta)
-            notifier.notify_event_created(name, str(event_code), time, owner_handle, reminder_time)
-        else:
-            notifier.notify_event_created(name, str(event_code), time, owner_handle)
-        self._events[str(event_code)] = event
+        event_draft = EventDraft(event_parsing_result.name, event_parsing_result.time, owner_handle,
+                                 reminder_delta=event_parsing_result.reminder_delta)
+        if event_draft.time <= current_time:
+            raise EventInThePast(current_time, event_draft.time)
+        if event_draft.reminder_time is not None and event_draft.reminder_time <= current_time:
+            raise ReminderInThePast(current_time, event_draft.reminder_time)
+        return event_draft
+
+    # Second phase of adding an event: inserts a prepared draft into the calendar
+    def add_event_draft(self,
+                        event_draft: EventDraft,
+                        sequence_generator: EventSequenceGenerator,
+                        notifier: Notifier
+                        ) -> str:
+        event_code = create_code_for_event(event_draft.name, sequence_generator)
+        self._insert_event(event_draft, event_code)
+        notifier.notify_event_created(event_draft.name, str(event_code), event_draft.time, event_draft.owner_handle,
+                                      event_draft.reminder_time)
         self._bump_version()
         return str(event_code)
 
+    # Prepares a batch of parsing results, keeping errors of the lines that failed in place
+    @staticmethod
+    def prepare_events(event_parsing_results: Sequence[Union[EventParsingResult, Exception]],
+                       owner_handle: str,
+                       clock: Clock) -> List[Union[EventDraft, Exception]]:
+        event_drafts = []
+        for event_parsing_result in event_parsing_results:
+            if isinstance(event_parsing_result, Exception):
+                event_drafts.append(event_parsing_result)
+                continue
+            try:
+                event_drafts.append(Calendar.prepare_event(event_parsing_result, owner_handle, clock))
+            except (EventInThePast, ReminderInThePast) as e:
+                event_drafts.append(e)
+        return event_drafts
+
+    # Inserts a batch of drafts, drawing all event codes at once.
+    # Returns the code of each added event, or the error of each line that failed, in order
+    def add_events(self,
+                   event_drafts: Sequence[Union[EventDraft, Exception]],
+                   sequence_generator: EventSequenceGenerator
+                   ) -> List[Union[str, Exception]]:
+        drafts_count = sum(1 for event_draft in event_drafts if isinstance(event_draft, EventDraft))
+        numeral_parts = iter(sequence_generator.take(drafts_count))
+        results = []
+        for event_draft in event_drafts:
+            if isinstance(event_draft, Exception):
+                results.append(event_draft)
+                continue
+            try:
+                event_code = make_event_code(event_draft.name, next(numeral_parts))
+            except ValueError as e:
+                results.append(e)
+                continue
+            self._insert_event(event_draft, event_code)
+            results.append(str(event_code))
+        # A batch in which every line failed leaves the calendar as it was
+        if any(isinstance(result, str) for result in results):
+            self._bump_version()
+        return results
+
     def delete_event(self, user_handle: str, event_code: str) -> None:
         if event_code not in self._events:
             raise EventNotFound(event_code)
@@ -75,12 +126,34 @@ class Calendar:
         event: Event = self._events[event_code]
         event.ensure_user_can_set_reminder(user_handle)
         event.set_reminder(remind_time)
+        self._schedule_event(event_code, event)
         self._bump_version()
 
     def send_pending_notifications(self, clock: Clock, notifier: Notifier) -> None:
-        for _, event in self._events.items():
-            event.handle_notification(clock, notifier)
-        self._bump_version()
+        current_time = clock.now()
+        due_events = self._get_due_events()
+        notified = False
+        while due_events and due_events[0][0] <= current_time:
+            due_at, event_code = heapq.heappop(due_events)
+            event = self._events.get(event_code)
+            if event is None or event.next_due_at != due_at:
+                continue
+            event.handle_notification(current_time, notifier)
+            self._schedule_event(event_code, event)
+            notified = True
+        if notified:
+            self._bump_version()
+
+    @property
+    def next_due_at(self) -> Optional[datetime]:
+        due_events = self._get_due_events()
+        while due_events:
+            due_at, event_code = due_events[0]
+            event = self._events.get(event_code)
+            if event is not None and event.next_due_at == due_at:
+                return due_at
+            heapq.heappop(due_events)
+        return None
 
     def declare_yes_to_event(self, user_handle: str, event_code: str) -> None:
         if event_code not in self._events:
@@ -103,15 +176,48 @@ class Calendar:
         event.declare_maybe(user_handle)
         self._bump_version()
 
-    def _get_parser(self, clock: Clock):
-        if self._language == CalendarLanguage.PL:
-            return PolishParser(clock)
+    # Applies declarations in order, so the last one of a user wins.
+    # Returns None for each applied declaration, or the error of each one that failed, in order
+    def apply_declarations(self, declarations: Sequence[EventDeclaration]) -> List[Optional[Exception]]:
+        errors = []
+        for declaration in declarations:
+            event = self._events.get(declaration.event_code)
+            if event is None:
+                errors.append(EventNotFound(declaration.event_code))
+                continue
+            event.declare(declaration.user_handle, declaration.decision)
+            errors.append(None)
+        if any(error is None for error in errors):
+            self._bump_version()
+        return errors
+
+    def _insert_event(self, event_draft: EventDraft, event_code: EventCode) -> None:
+        event: Event = Event(self._id, event_draft.name, event_code, event_draft.time, event_draft.owner_handle)
+        event.declare_yes(event_draft.owner_handle)
+        if event_draft.reminder_delta is not None:
+            event.set_reminder(event_draft.reminder_delta)
+        self._events[str(event_code)] = event
+        self._schedule_event(str(event_code), event)
+
+    def _get_due_events(self) -> List[Tuple[datetime, str]]:
+        if self._due_events is None:
+            self._due_events = [(event.next_due_at, event_code) for event_code, event in self._events.items()
+                                if event.next_due_at is not None]
+            heapq.heapify(self._due_events)
+        return self._due_events
+
+    def _schedule_event(self, event_code: str, event: 'Event') -> None:
+        if self._due_events is not None and event.next_due_at is not None:
+            heapq.heappush(self._due_events, (event.next_due_at, event_code))
 
     def _bump_version(self) -> None:
         self._version += 1
 
 
 class Event:
+    # Counts of each decision, derived from the declarations
+    _decision_counts: Optional[Counter] = None
+
     def __init__(self, calendar_id: UUID, name: str, code: EventCode, time: datetime, owner_handle: str):
         self._id = uuid4()
         self._calendar_id: UUID = calendar_id
@@ -120,39 +226,55 @@ class Event:
         self._time: datetime = time
         self._owner_handle: str = owner_handle
         self._remind_at: Optional[datetime] = None
-        self._declarations: List[Declaration] = []
+        self._declarations: Dict[str, Declaration] = {}
         self._removed: bool = False
         self._reminded: bool = False
 
     def set_reminder(self, remind_delta: timedelta) -> None:
         self._remind_at = self._time - remind_delta
 
-    def handle_notification(self, clock: Clock, notifier: Notifier) -> None:
-        handles_to_notify = [declaration.user_handle for declaration in self._declarations if declaration.is_positive]
-        if self._is_pending(clock):
-            notifier.notify_event_start(self._name, str(self._code), handles_to_notify)
+    # Instant of the next notification of the event: the reminder if it is still to be sent, the start otherwise
+    @property
+    def next_due_at(self) -> Optional[datetime]:
+        if self._removed:
+            return None
+        if self._remind_at is not None and not self._reminded:
+            return min(self._remind_at, self._time)
+        return self._time
+
+    def handle_notification(self, current_time: datetime, notifier: Notifier) -> None:
+        if self._is_pending(current_time):
+            notifier.notify_event_start(self._name, str(self._code), self._get_positive_handles())
             self.remove()
-        elif self._is_to_remind(clock):
-            notifier.notify_reminder(self._name, str(self._code), self._time, handles_to_notify)
+        elif self._is_to_remind(current_time):
+            notifier.notify_reminder(self._name, str(self._code), self._time, self._get_positive_handles())
             self._mark_as_reminded()
 
     def declare_yes(self, user_handle: str) -> None:
-        if existing_declaration := self._get_existing_declaration(user_handle):
-            existing_declaration.decision = Decision.YES
-        else:
-            self._declarations.append(Declaration(event_id=self._id, user_handle=user_handle, decision=Decision.YES))
+        self.declare(user_handle, Decision.YES)
 
     def declare_no(self, user_handle: str) -> None:
-        if existing_declaration := self._get_existing_declaration(user_handle):
-            existing_declaration.decision = Decision.NO
-        else:
-            self._declarations.append(Declaration(event_id=self._id, user_handle=user_handle, decision=Decision.NO))
+        self.declare(user_handle, Decision.NO)
 
     def declare_maybe(self, user_handle: str) -> None:
-        if existing_declaration := self._get_existing_declaration(user_handle):
-            existing_declaration.decision = Decision.MAYBE
+        self.declare(user_handle, Decision.MAYBE)
+
+    def declare(self, user_handle: str, decision: Decision) -> None:
+        self._ensure_declaration_index()
+        declaration = self._declarations.get(user_handle)
+        if declaration is None:
+            declaration = Declaration(event_id=self._id, user_handle=user_handle, decision=decision)
+            self._declarations[user_handle] = declaration
+        elif declaration.decision == decision:
+            return
         else:
-            self._declarations.append(Declaration(event_id=self._id, user_handle=user_handle, decision=Decision.MAYBE))
+            self._unindex_declaration(declaration)
+            declaration.decision = decision
+        self._index_declaration(declaration)
+
+    def count_declarations(self, decision: Decision) -> int:
+        self._ensure_declaration_index()
+        return self._decision_counts[decision]
 
     def ensure_user_can_delete(self, user_handle: str) -> None:
         if not self._is_user_owner(user_handle):
@@ -171,19 +293,31 @@ class Event:
     def _is_user_owner(self, user_handle: str) -> bool:
         return user_handle == self._owner_handle
 
-    def _is_pending(self, clock: Clock) -> bool:
-        return not self._removed and clock.now() >= self._time
+    def _is_pending(self, current_time: datetime) -> bool:
+        return not self._removed and current_time >= self._time
 
-    def _is_to_remind(self, clock: Clock) -> bool:
+    def _is_to_remind(self, current_time: datetime) -> bool:
         if not self._remind_at or self._reminded:
             return False
-        return clock.now() >= self._remind_at
+        return current_time >= self._remind_at
+
+    # In the order of declaring, the index set does not keep one
+    def _get_positive_handles(self) -> List[str]:
+        return [declaration.user_handle for declaration in self._declarations.values() if declaration.is_positive]
+
+    # Events loaded from the database skip __init__, so the index is built on first use
+    def _ensure_declaration_index(self) -> None:
+        if self._decision_counts is not None:
+            return
+        self._decision_counts = Counter()
+        for declaration in self._declarations.values():
+            self._index_declaration(declaration)
+
+    def _index_declaration(self, declaration: 'Declaration') -> None:
+        self._decision_counts[declaration.decision] += 1
 
-    def _get_existing_declaration(self, user_handle: str) -> Optional['Declaration']:
-        return next(
-            (declaration for declaration in self._declarations if declaration.user_handle == user_handle),
-            None
-        )
+    def _unindex_declaration(self, declaration: 'Declaration') -> None:
+        self._decision_counts[declaration.decision] -= 1
 
 
 @dataclass
@@ -28,3 +28,13 @@ class EventSequenceGenerator(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def __call__(self) -> Generator[int, None, None]:
         raise NotImplemented
+
+    def take(self, count: int) -> List[int]:
+        return [next(self()) for _ in range(count)]
+
+
+# Values are reserved ahead with I/O awaited, the calendar then takes them synchronously
+class AsyncEventSequenceGenerator(EventSequenceGenerator, metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    async def reserve(self, count: int) -> None:
+        raise NotImplemented
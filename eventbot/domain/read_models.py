@@ -8,3 +8,10 @@ class EventReadModel:
     code: str
     time: datetime
     remind_at: datetime
+
+
+@dataclass(frozen=True, init=True)
+class CalendarScheduleReadModel:
+    guild_handle: str
+    channel_handle: str
+    due_at: datetime
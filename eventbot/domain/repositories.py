@@ -2,7 +2,7 @@ import abc
 from typing import List
 
 from eventbot.domain import Calendar
-from eventbot.domain.read_models import EventReadModel
+from eventbot.domain.read_models import EventReadModel, CalendarScheduleReadModel
 
 
 class CalendarRepository(metaclass=abc.ABCMeta):
@@ -21,3 +21,31 @@ class CalendarRepository(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def get_incoming_events(self, guild_handle: str, channel_handle: str) -> List[EventReadModel]:
         raise NotImplemented
+
+    # Next notification instant of every calendar that has events left to notify about
+    @abc.abstractmethod
+    def get_notification_schedule(self) -> List[CalendarScheduleReadModel]:
+        raise NotImplemented
+
+
+# Calendars are returned fully loaded, nothing is loaded once the domain works on them
+class AsyncCalendarRepository(metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    async def does_calendar_exist(self, guild_handle: str, channel_handle: str) -> bool:
+        raise NotImplemented
+
+    @abc.abstractmethod
+    async def get_calendar_by_guild_and_channel(self, guild_handle: str, channel_handle: str) -> Calendar:
+        raise NotImplemented
+
+    @abc.abstractmethod
+    def add_calendar(self, calendar: Calendar) -> None:
+        raise NotImplemented
+
+    @abc.abstractmethod
+    async def get_incoming_events(self, guild_handle: str, channel_handle: str) -> List[EventReadModel]:
+        raise NotImplemented
+
+    @abc.abstractmethod
+    async def get_notification_schedule(self) -> List[CalendarScheduleReadModel]:
+        raise NotImplemented
@@ -1,2 +1,4 @@
 from .parser import Parser
-from .polish import PolishParser
+from .cache import ParseCache, CachingParser, DEFAULT_PARSE_CACHE_SIZE
+from .instrumentation import ParserInstrumentation, ParseTiming, SlowPromptSampler
+from .registry import ParserRegistry, get_parser, configure_parse_cache, configure_parser_instrumentation
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from datetime import date, datetime
+from threading import Lock
+from typing import NamedTuple, Optional, Tuple
+
+from eventbot.domain.dto import EventParsingResult
+from eventbot.domain.services.parser.instrumentation import ParserInstrumentation
+from eventbot.domain.services.parser.parser import Parser
+
+
+DEFAULT_PARSE_CACHE_SIZE = 1024
+
+# Parsers resolve relative terms ("jutro", "w sobotę") against the current date only,
+# so a result stays valid for the same prompt until the day changes
+ParseCacheKey = Tuple[str, date]
+
+
+class ParseCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    size: int
+
+
+class ParseCache:
+    def __init__(self, maxsize: int = DEFAULT_PARSE_CACHE_SIZE):
+        self._maxsize: int = maxsize
+        self._entries: OrderedDict[ParseCacheKey, EventParsingResult] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._maxsize > 0
+
+    def get(self, key: ParseCacheKey) -> Optional[EventParsingResult]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return result
+
+    def put(self, key: ParseCacheKey, result: EventParsingResult) -> None:
+        with self._lock:
+            if not self.enabled:
+                return
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def resize(self, maxsize: int) -> None:
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> ParseCacheInfo:
+        with self._lock:
+            return ParseCacheInfo(self._hits, self._misses, self._maxsize, len(self._entries))
+
+    def _evict(self) -> None:
+        while len(self._entries) > max(self._maxsize, 0):
+            self._entries.popitem(last=False)
+
+
+class CachingParser(Parser):
+    def __init__(self, parser: Parser, cache: ParseCache):
+        self._parser: Parser = parser
+        self._cache: ParseCache = cache
+
+    def __call__(self, text: str, now: datetime) -> EventParsingResult:
+        if not self._cache.enabled:
+            return self._parser(text, now)
+        key = (text, now.date())
+        if (result := self._cache.get(key)) is not None:
+            return result
+        result = self._parser(text, now)
+        self._cache.put(key, result)
+        return result
+
+    def instrument(self, instrumentation: Optional[ParserInstrumentation]) -> None:
+        self._parser.instrument(instrumentation)
+
+    @property
+    def cache(self) -> ParseCache:
+        return self._cache
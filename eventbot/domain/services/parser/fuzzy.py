@@ -0,0 +1,93 @@
+from collections import defaultdict
+from typing import Dict, List, Mapping, Optional, Set
+
+
+MIN_WORD_LENGTH = 4
+LONG_WORD_LENGTH = 7
+MAX_DISTANCE = 2
+
+
+# Misspellings allowed for a word: one edit for short words, two for long ones
+def max_distance(word: str) -> int:
+    if len(word) < MIN_WORD_LENGTH:
+        return 0
+    if len(word) < LONG_WORD_LENGTH:
+        return 1
+    return MAX_DISTANCE
+
+
+def deletes(word: str, distance: int) -> Set[str]:
+    variants = {word}
+    last_variants = variants
+    for _ in range(distance):
+        last_variants = {variant[:i] + variant[i + 1:] for variant in last_variants for i in range(len(variant))}
+        variants |= last_variants
+    return variants
+
+
+# Optimal string alignment distance: Levenshtein distance extended with transpositions of adjacent characters.
+# Only cells within the limit from the diagonal are computed, a distance over the limit is reported as limit + 1
+def osa_distance(left: str, right: str, limit: int = MAX_DISTANCE) -> int:
+    over_limit = limit + 1
+    if abs(len(left) - len(right)) > limit:
+        return over_limit
+    previous_row = None
+    last_row = [j if j <= limit else over_limit for j in range(len(right) + 1)]
+    for i in range(1, len(left) + 1):
+        row = [over_limit] * (len(right) + 1)
+        if i <= limit:
+            row[0] = i
+        left_char = left[i - 1]
+        for j in range(max(1, i - limit), min(len(right), i + limit) + 1):
+            right_char = right[j - 1]
+            distance = min(last_row[j] + 1, row[j - 1] + 1, last_row[j - 1] + (left_char != right_char))
+            if previous_row is not None and j > 1 and left_char == right[j - 2] and left[i - 2] == right_char:
+                distance = min(distance, previous_row[j - 2] + 1)
+            row[j] = distance
+        if min(row) > limit:
+            return over_limit
+        previous_row, last_row = last_row, row
+    return min(last_row[-1], over_limit)
+
+
+# Symmetric delete index: a vocabulary word and a misspelling of it within the allowed
+# distance share a variant with some characters deleted, so a lookup probes the deletes
+# of the misspelled word instead of scanning the vocabulary
+class FuzzyIndex:
+    def __init__(self, vocabulary: Mapping[str, str]):
+        self._vocabulary: Dict[str, str] = {word: normalized for word, normalized in vocabulary.items()
+                                            if len(word) >= MIN_WORD_LENGTH}
+        self._deletes: Dict[str, List[str]] = defaultdict(list)
+        for word in self._vocabulary:
+            for variant in deletes(word, MAX_DISTANCE):
+                self._deletes[variant].append(word)
+        self._deletes = dict(self._deletes)
+
+    # Returns the normalized form of the closest vocabulary word,
+    # or None if there is none within the allowed distance or the closest ones disagree
+    def get(self, word: str) -> Optional[str]:
+        if word in self._vocabulary:
+            return self._vocabulary[word]
+        distance = max_distance(word)
+        if not distance or not word.isalpha():
+            return None
+        candidates = set()
+        for variant in deletes(word, distance):
+            candidates.update(self._deletes.get(variant, ()))
+        best_distance = distance + 1
+        matches = set()
+        for candidate in candidates:
+            candidate_distance = osa_distance(word, candidate, distance)
+            if candidate_distance > distance:
+                continue
+            if candidate_distance < best_distance:
+                best_distance = candidate_distance
+                matches = {self._vocabulary[candidate]}
+            elif candidate_distance == best_distance:
+                matches.add(self._vocabulary[candidate])
+        if len(matches) != 1:
+            return None
+        return matches.pop()
+
+    def __len__(self) -> int:
+        return len(self._vocabulary)
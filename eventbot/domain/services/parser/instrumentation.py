@@ -0,0 +1,91 @@
+import abc
+from collections import defaultdict, deque
+from threading import Lock
+from time import perf_counter
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+
+class ParseTiming(NamedTuple):
+    text: str
+    # Durations in seconds, in the order the stages ran
+    stages: List[Tuple[str, float]]
+    duration: float
+
+
+class ParserInstrumentation(metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    def on_stage(self, stage: str, duration: float) -> None:
+        raise NotImplemented
+
+    def on_parsed(self, timing: ParseTiming) -> None:
+        pass
+
+
+class StageTimer:
+    def __init__(self, instrumentation: ParserInstrumentation):
+        self._instrumentation: ParserInstrumentation = instrumentation
+        self._stages: List[Tuple[str, float]] = []
+        self._started = self._last = perf_counter()
+
+    def __call__(self, stage: str) -> None:
+        now = perf_counter()
+        duration = now - self._last
+        self._last = now
+        self._stages.append((stage, duration))
+        self._instrumentation.on_stage(stage, duration)
+
+    def finish(self, text: str) -> None:
+        self._instrumentation.on_parsed(ParseTiming(text, self._stages, perf_counter() - self._started))
+
+
+# Used while no instrumentation is set, so that timing costs a no-op call per stage
+class NoStageTimer(StageTimer):
+    def __init__(self):
+        pass
+
+    def __call__(self, stage: str) -> None:
+        pass
+
+    def finish(self, text: str) -> None:
+        pass
+
+
+NO_STAGE_TIMER = NoStageTimer()
+
+
+class StageStats(NamedTuple):
+    count: int
+    total: float
+
+
+class SlowPromptSampler(ParserInstrumentation):
+    def __init__(self, threshold: float, max_samples: int = 100):
+        self._threshold: float = threshold
+        self._samples: Deque[ParseTiming] = deque(maxlen=max_samples)
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._totals: Dict[str, float] = defaultdict(float)
+        self._lock = Lock()
+
+    def on_stage(self, stage: str, duration: float) -> None:
+        with self._lock:
+            self._counts[stage] += 1
+            self._totals[stage] += duration
+
+    def on_parsed(self, timing: ParseTiming) -> None:
+        if timing.duration >= self._threshold:
+            with self._lock:
+                self._samples.append(timing)
+
+    def stats(self) -> Dict[str, StageStats]:
+        with self._lock:
+            return {stage: StageStats(count, self._totals[stage]) for stage, count in self._counts.items()}
+
+    def samples(self) -> List[ParseTiming]:
+        with self._lock:
+            return list(self._samples)
+
+
+def start_stage_timer(instrumentation: Optional[ParserInstrumentation]) -> StageTimer:
+    if instrumentation is None:
+        return NO_STAGE_TIMER
+    return StageTimer(instrumentation)
@@ -0,0 +1,69 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+NO_PRIORITY = float('inf')
+
+
+class _Node:
+    __slots__ = ('children', 'priority', 'best_priority')
+
+    def __init__(self):
+        self.children: List[Tuple[int, '_Node']] = []
+        # Priority of the pattern ending at this node, if any
+        self.priority = NO_PRIORITY
+        # Best priority of any pattern ending in this node's subtree
+        self.best_priority = NO_PRIORITY
+
+    def child(self, mask: int) -> '_Node':
+        for child_mask, node in self.children:
+            if child_mask == mask:
+                return node
+        node = _Node()
+        self.children.append((mask, node))
+        return node
+
+
+class PatternMatcher:
+    def __init__(self, patterns: Dict[str, Sequence[int]]):
+        self._names: List[str] = list(patterns)
+        self._root = _Node()
+        for priority, pattern in enumerate(patterns.values()):
+            self._insert(pattern, priority)
+
+    # Finds the match a sequential scan of the patterns would find: the first pattern in
+    # declaration order that matches anywhere, at its leftmost position.
+    # Returns the pattern name with start and end indexes of the matched tokens.
+    def match(self, token_tags: Sequence[int]) -> Optional[Tuple[str, int, int]]:
+        best_priority = NO_PRIORITY
+        best_span = (0, 0)
+        tokens_count = len(token_tags)
+        for start in range(tokens_count):
+            nodes = [self._root]
+            position = start
+            while nodes and position < tokens_count:
+                tags = token_tags[position]
+                position += 1
+                next_nodes = []
+                for node in nodes:
+                    for mask, child in node.children:
+                        if not mask & tags or child.best_priority >= best_priority:
+                            continue
+                        if child.priority < best_priority:
+                            best_priority = child.priority
+                            best_span = (start, position)
+                        if child.children:
+                            next_nodes.append(child)
+                nodes = next_nodes
+            if best_priority == 0:
+                break
+        if best_priority == NO_PRIORITY:
+            return None
+        return self._names[best_priority], best_span[0], best_span[1]
+
+    def _insert(self, pattern: Sequence[int], priority: int) -> None:
+        node = self._root
+        node.best_priority = min(node.best_priority, priority)
+        for mask in pattern:
+            node = node.child(mask)
+            node.best_priority = min(node.best_priority, priority)
+        node.priority = min(node.priority, priority)
@@ -0,0 +1,98 @@
+import re
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional
+
+from eventbot.domain.services.parser.fuzzy import FuzzyIndex
+
+
+class NormalizedWord(NamedTuple):
+    word: str
+    # Span of the source word in the original text
+    start: int
+    end: int
+    # The word as written, when the word above is a correction of a misspelling
+    uncorrected: Optional[str] = None
+
+
+# Words outside the vocabulary, mostly names, repeat from prompt to prompt; their lookups are kept up to this count
+MAX_CACHED_CORRECTIONS = 10000
+
+
+class Normalizer:
+    WORD = re.compile(r'\w+')
+
+    def __init__(self,
+                 diacritics: Mapping[str, str],
+                 command_words: Iterable[str],
+                 vocabularies: Iterable[Mapping[str, str]],
+                 fuzzy_words: Iterable[str] = ()):
+        self._diacritics_table: Dict[int, str] = str.maketrans(dict(diacritics))
+        self._command_words = frozenset(command_words)
+        self._lookup: Dict[str, str] = Normalizer._merge(list(vocabularies))
+        # Words that matched no vocabulary entry are looked up among these, allowing for misspellings
+        self._fuzzy_index: Optional[FuzzyIndex] = self._build_fuzzy_index(fuzzy_words)
+        self._corrections: Dict[str, Optional[str]] = {}
+
+    def __call__(self, text: str, fuzzy: bool = False) -> str:
+        return ' '.join([word.word for word in self.words(text, fuzzy)])
+
+    # With fuzzy, words that matched no vocabulary entry are corrected into the closest one, if any. A correction
+    # keeps the word as written, so that the parser can go back to it when no pattern takes the corrected word
+    def words(self, text: str, fuzzy: bool = False) -> List[NormalizedWord]:
+        lower_text = text.lower().translate(self._diacritics_table)
+        if len(lower_text) == len(text):
+            words = [(match.group(), match.start(), match.end()) for match in Normalizer.WORD.finditer(lower_text)]
+        else:
+            # A few case mappings change the length of the text, lower each word on its own to keep spans aligned
+            words = [(match.group().lower().translate(self._diacritics_table), match.start(), match.end())
+                     for match in Normalizer.WORD.finditer(text)]
+        # If first word is a command synonym, remove it
+        if words and words[0][0] in self._command_words:
+            words = words[1:]
+        lookup = self._lookup
+        if not fuzzy or self._fuzzy_index is None or not words:
+            return [NormalizedWord(lookup.get(word, word), start, end) for word, start, end in words]
+        # The prompt has to start with the event name, so its first word is never taken for a misspelling
+        word, start, end = words[0]
+        return [NormalizedWord(lookup.get(word, word), start, end)] + [
+            self._correct(word, start, end) for word, start, end in words[1:]
+        ]
+
+    def _correct(self, word: str, start: int, end: int) -> NormalizedWord:
+        normalized = self._lookup.get(word)
+        if normalized is not None:
+            return NormalizedWord(normalized, start, end)
+        correction = self._get_correction(word)
+        if correction is None or correction == word:
+            return NormalizedWord(word, start, end)
+        return NormalizedWord(correction, start, end, word)
+
+    def _get_correction(self, word: str) -> Optional[str]:
+        try:
+            return self._corrections[word]
+        except KeyError:
+            pass
+        if len(self._corrections) >= MAX_CACHED_CORRECTIONS:
+            self._corrections.clear()
+        correction = self._corrections[word] = self._fuzzy_index.get(word)
+        return correction
+
+    def _build_fuzzy_index(self, fuzzy_words: Iterable[str]) -> Optional[FuzzyIndex]:
+        vocabulary = {word.lower().translate(self._diacritics_table): self._lookup.get(word, word)
+                      for word in fuzzy_words}
+        if not vocabulary:
+            return None
+        return FuzzyIndex(vocabulary)
+
+    # Vocabularies are applied in order, each one on the output of the previous ones;
+    # the resulting chain is resolved once here, so normalizing a word takes a single lookup
+    @staticmethod
+    def _merge(vocabularies: List[Mapping[str, str]]) -> Dict[str, str]:
+        lookup = {}
+        for vocabulary in vocabularies:
+            for word in vocabulary:
+                normalized = word
+                for rewrite in vocabularies:
+                    normalized = rewrite.get(normalized, normalized)
+                if normalized != word:
+                    lookup[word] = normalized
+        return lookup
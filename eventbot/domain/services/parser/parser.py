@@ -1,9 +1,29 @@
 import abc
+from datetime import datetime
+from typing import List, Optional, Sequence, Union
 
 from eventbot.domain.dto import EventParsingResult
+from eventbot.domain.exceptions import ParsingError
+from eventbot.domain.services.parser.instrumentation import ParserInstrumentation
 
 
 class Parser(metaclass=abc.ABCMeta):
+    # Instrumentation is off unless set on the parser instance
+    _instrumentation: Optional[ParserInstrumentation] = None
+
     @abc.abstractmethod
-    def __call__(self, text: str) -> EventParsingResult:
+    def __call__(self, text: str, now: datetime) -> EventParsingResult:
         raise NotImplemented
+
+    # Parses each text on its own; a text that cannot be parsed gets its error in place of the result
+    def parse_batch(self, texts: Sequence[str], now: datetime) -> List[Union[EventParsingResult, Exception]]:
+        results = []
+        for text in texts:
+            try:
+                results.append(self(text, now))
+            except (ParsingError, ValueError) as e:
+                results.append(e)
+        return results
+
+    def instrument(self, instrumentation: Optional[ParserInstrumentation]) -> None:
+        self._instrumentation = instrumentation
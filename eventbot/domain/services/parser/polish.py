@@ -1,53 +1,53 @@
-import abc
 import re
 from dataclasses import dataclass
 from datetime import datetime, timedelta, date
-from typing import List, Optional, Dict, Union
-from enum import Enum
-from itertools import accumulate
+from typing import List, Optional, Dict, Union, Tuple, Iterable, NamedTuple, Callable, Sequence
+from enum import IntFlag, auto
+from functools import partial
 
 from eventbot.domain.dto import EventParsingResult
-from eventbot.domain.ports import Clock
 from eventbot.domain.services.parser.parser import Parser
+from eventbot.domain.services.parser.instrumentation import StageTimer, start_stage_timer
+from eventbot.domain.services.parser import fuzzy as fuzzy_module, normalizer as normalizer_module
+from eventbot.domain.services.parser.normalizer import Normalizer, NormalizedWord
+from eventbot.domain.services.parser.snapshot import load_snapshot
+from eventbot.domain.services.parser.matcher import PatternMatcher
 from eventbot.domain.exceptions import ParsingError
 
 
-class Tag(Enum):
-    SEPARATOR = 'separator'
+class Tag(IntFlag):
+    SEPARATOR = auto()
 
-    SCALAR = 'scalar'
-    SCALAR_HOUR = 'scalar-hour'
-    SCALAR_MINUTE = 'scalar-minute'
-    SCALAR_DAY = 'scalar-day'
-    SCALAR_MONTH = 'scalar-month'
-    SCALAR_YEAR = 'scalar-year'
+    SCALAR = auto()
+    SCALAR_HOUR = auto()
+    SCALAR_MINUTE = auto()
+    SCALAR_DAY = auto()
+    SCALAR_MONTH = auto()
+    SCALAR_YEAR = auto()
 
-    POINTER = 'pointer'
+    POINTER = auto()
 
-    GRABBER = 'grabber'
+    GRABBER = auto()
 
-    REPEATER = 'repeater'
-    REPEATER_DAY = 'repeater-day'
-    REPEATER_WEEK = 'repeater-week'
-    REPEATER_WEEKS = 'repeater-weeks'
-    REPEATER_MONTH = 'repeater-month'
-    REPEATER_DAY_NAME = 'repeater-day-name'
-    REPEATER_MONTH_NAME = 'repeater-month-name'
-    REPEATER_TIME = 'repeater-time'
-    REPEATER_DAY_PORTION = 'repeater-day-portion'
+    REPEATER = auto()
+    REPEATER_DAY = auto()
+    REPEATER_WEEK = auto()
+    REPEATER_WEEKS = auto()
+    REPEATER_MONTH = auto()
+    REPEATER_DAY_NAME = auto()
+    REPEATER_MONTH_NAME = auto()
+    REPEATER_TIME = auto()
+    REPEATER_DAY_PORTION = auto()
 
-    ORDINAL = 'ordinal'
-    ORDINAL_FEM = 'ordinal-fem'
-    ORDINAL_MASC = 'ordinal-masc'
-    ORDINAL_DAY = 'ordinal-day'
-    ORDINAL_MONTH = 'ordinal-month'
-    ORDINAL_HOUR = 'ordinal-hour'
+    ORDINAL = auto()
+    ORDINAL_FEM = auto()
+    ORDINAL_MASC = auto()
+    ORDINAL_DAY = auto()
+    ORDINAL_MONTH = auto()
+    ORDINAL_HOUR = auto()
 
-    KEYWORD = 'keyword'
-    KEYWORD_REMIND = 'keyword-remind'
-
-    def __repr__(self):
-        return self.value
+    KEYWORD = auto()
+    KEYWORD_REMIND = auto()
 
 
 SEPARATORS = ['at', 'in', 'on']
@@ -58,124 +58,138 @@ GRABBER_NEXT = 'next'
 POINTER_PAST = 'before'
 POINTER_FUTURE = 'after'
 
+MIN_YEAR = 2023
+NUMBER_TABLE_SIZE = 10000
+
 
 @dataclass
 class Token:
     word: str
-    tags: List[Tag]
-
-    def __init__(self, word: str):
-        self.word: str = word
-        self.tags: List = []
-
-
-def is_separator(word: str) -> bool:
-    return word in SEPARATORS
-
-
-def is_scalar(word: str) -> bool:
-    if not word.isnumeric():
-        return False
-    return any([
-        is_scalar_day(word),
-        is_scalar_month(word),
-        is_scalar_year(word),
-        is_scalar_hour(word),
-        is_scalar_minute(word),
-    ])
-
-
-def is_scalar_day(word: str) -> bool:
-    return 0 < int(word) <= 31
-
-
-def is_scalar_month(word: str) -> bool:
-    return 0 < int(word) <= 12
-
-
-def is_scalar_year(word: str) -> bool:
-    return 2023 <= int(word) <= PolishParser.MAX_YEAR
-
-
-def is_scalar_hour(word: str) -> bool:
-    return int(word) < 24
-
-
-def is_scalar_minute(word: str) -> bool:
-    return int(word) < 60
-
-
-def is_pointer(word: str) -> bool:
-    return word in POINTERS
-
-
-def is_grabber(word: str) -> bool:
-    return word in GRABBERS
-
-
-def is_repeater(word: str) -> bool:
-    return any([
-        is_repeater_month(word),
-        is_repeater_week(word),
-        is_repeater_weeks(word),
-        is_repeater_day(word),
-        is_repeater_month_name(word),
-        is_repeater_day_name(word),
-        is_repeater_day_portion(word),
-        is_repeater_time(word)
-    ])
-
-
-def is_repeater_month(word: str) -> bool:
-    return word == 'month'
-
-
-def is_repeater_week(word: str) -> bool:
-    return word == 'week'
-
-
-def is_repeater_weeks(word: str) -> bool:
-    return word == 'weeks'
-
-
-def is_repeater_day(word: str) -> bool:
-    return word == 'day'
-
-
-def is_repeater_month_name(word: str) -> bool:
-    return word in PolishParser.MONTH_NAMES.values()
-
-
-def is_repeater_day_name(word: str) -> bool:
-    return word in PolishParser.WEEK_DAY_NAMES.values()
-
-
-def is_repeater_day_portion(word: str) -> bool:
-    return word in PolishParser.DAY_PORTION_TERMS.values()
-
+    # Bitmask of Tag flags, kept as a plain int: IntFlag arithmetic is much slower than int arithmetic
+    tags: int = 0
+    # Span of the token in the original text
+    start: int = 0
+    end: int = 0
+
+
+def scalar_tags(value: int, max_year: int) -> int:
+    tags = 0
+    if 0 < value <= 31:
+        tags |= Tag.SCALAR_DAY
+    if 0 < value <= 12:
+        tags |= Tag.SCALAR_MONTH
+    if MIN_YEAR <= value <= max_year:
+        tags |= Tag.SCALAR_YEAR
+    if value < 24:
+        tags |= Tag.SCALAR_HOUR
+    if value < 60:
+        tags |= Tag.SCALAR_MINUTE
+    if tags:
+        tags |= Tag.SCALAR
+    return int(tags)
+
+
+def fem_ordinal_tags(value: int) -> int:
+    tags = Tag.ORDINAL | Tag.ORDINAL_FEM
+    if value < 24:
+        tags |= Tag.ORDINAL_HOUR
+    return int(tags)
+
+
+def masc_ordinal_tags(value: int) -> int:
+    tags = Tag.ORDINAL | Tag.ORDINAL_MASC
+    if 0 < value <= 31:
+        tags |= Tag.ORDINAL_DAY
+    if 0 < value <= 12:
+        tags |= Tag.ORDINAL_MONTH
+    return int(tags)
+
+
+def build_number_tags(max_year: int) -> Tuple[int, ...]:
+    return tuple(scalar_tags(value, max_year) for value in range(NUMBER_TABLE_SIZE))
+
+
+def build_word_tags(month_names: Iterable[str], week_day_names: Iterable[str],
+                    day_portion_terms: Iterable[str], time_units: Iterable[str]) -> Dict[str, int]:
+    word_tags: Dict[str, int] = {}
+
+    def tag_words(words: Iterable[str], tags: Tag) -> None:
+        for word in words:
+            word_tags[word] = word_tags.get(word, 0) | int(tags)
+
+    tag_words(SEPARATORS, Tag.SEPARATOR)
+    tag_words(POINTERS, Tag.POINTER)
+    tag_words(GRABBERS, Tag.GRABBER)
+    tag_words(['month'], Tag.REPEATER | Tag.REPEATER_MONTH)
+    tag_words(['week'], Tag.REPEATER | Tag.REPEATER_WEEK)
+    tag_words(['weeks'], Tag.REPEATER | Tag.REPEATER_WEEKS)
+    tag_words(['day'], Tag.REPEATER | Tag.REPEATER_DAY)
+    tag_words(month_names, Tag.REPEATER | Tag.REPEATER_MONTH_NAME)
+    tag_words(week_day_names, Tag.REPEATER | Tag.REPEATER_DAY_NAME)
+    tag_words(day_portion_terms, Tag.REPEATER | Tag.REPEATER_DAY_PORTION)
+    tag_words(time_units, Tag.REPEATER | Tag.REPEATER_TIME)
+    tag_words(['remind'], Tag.KEYWORD | Tag.KEYWORD_REMIND)
+    return word_tags
+
+
+def build_ordinal_tokens(ordinals_fem: Dict[str, str], ordinals_masc: Dict[str, str]) -> Dict[str, Tuple[str, int]]:
+    ordinal_tokens = {word: (number, fem_ordinal_tags(int(number))) for word, number in ordinals_fem.items()}
+    ordinal_tokens.update(
+        {word: (number, masc_ordinal_tags(int(number))) for word, number in ordinals_masc.items()}
+    )
+    return ordinal_tokens
+
+
+class TokenPrototype(NamedTuple):
+    word: str
+    tags: int
 
-def is_repeater_time(word: str) -> bool:
-    return word in PolishParser.TIME_UNITS.values()
 
+class TokenCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    size: int
 
-def is_ordinal(word: str) -> bool:
-    return word in PolishParser.ORDINALS_FEM or word in PolishParser.ORDINALS_MASC
 
+def build_token_prototypes(word_tags: Dict[str, int], ordinal_tokens: Dict[str, Tuple[str, int]],
+                           number_tags: Tuple[int, ...]) -> Dict[str, TokenPrototype]:
+    prototypes = {str(value): TokenPrototype(str(value), tags) for value, tags in enumerate(number_tags) if tags}
+    prototypes.update({word: TokenPrototype(word, tags) for word, tags in word_tags.items()})
+    prototypes.update({word: TokenPrototype(number, tags) for word, (number, tags) in ordinal_tokens.items()})
+    return prototypes
 
-def is_ordinal_fem(word: str) -> bool:
-    return word in PolishParser.ORDINALS_FEM
 
+class TokenCache:
+    def __init__(self, prototypes: Dict[str, TokenPrototype], number_tags: Tuple[int, ...]):
+        self._prototypes: Dict[str, TokenPrototype] = prototypes
+        self._number_tags: Tuple[int, ...] = number_tags
+        self._hits = 0
+        self._misses = 0
 
-def is_ordinal_masc(word: str) -> bool:
-    return word in PolishParser.ORDINALS_MASC
+    def __call__(self, word: str, start: int = 0, end: int = 0) -> Token:
+        prototype = self._prototypes.get(word)
+        if prototype is not None:
+            self._hits += 1
+            return Token(prototype.word, prototype.tags, start, end)
+        self._misses += 1
+        return Token(word, self._number_word_tags(word), start, end)
 
+    def info(self) -> TokenCacheInfo:
+        return TokenCacheInfo(self._hits, self._misses, len(self._prototypes))
 
-def is_keyword(word: str) -> bool:
-    return is_keyword_remind(word)
+    # Words outside the vocabulary are either names or numbers not covered by the prototypes,
+    # like the ones written with leading zeros
+    def _number_word_tags(self, word: str) -> int:
+        if not word.isdecimal():
+            return 0
+        value = int(word)
+        if value < len(self._number_tags):
+            return self._number_tags[value]
+        return 0
 
 
-def is_keyword_remind(word: str) -> bool:
-    return word == 'remind'
+def compile_patterns(patterns: Dict[str, List[Tag]]) -> Dict[str, Tuple[int, ...]]:
+    return {name: tuple(int(tag) for tag in pattern) for name, pattern in patterns.items()}
 
 
 PATTERN_TIME_24_SCALAR = [Tag.SCALAR_HOUR, Tag.SCALAR_MINUTE]
@@ -213,14 +227,14 @@ PATTERN_REMINDER = [Tag.KEYWORD_REMIND, Tag.REPEATER_TIME, Tag.POINTER]
 PATTERN_REMINDER_COUNT = [Tag.KEYWORD_REMIND, Tag.SCALAR, Tag.REPEATER_TIME, Tag.POINTER]
 
 
-AMBIGUOUS_TIME_PATTERNS = {
+AMBIGUOUS_TIME_PATTERNS = compile_patterns({
     'ampm-single-scalar': PATTERN_TIME_AMPM_SINGLE_SCALAR,
     'ampm-single-ordinal': PATTERN_TIME_AMPM_SINGLE_ORDINAL,
     '24-single-scalar': PATTERN_TIME_24_SINGLE_SCALAR,
     '24-single-ordinal': PATTERN_TIME_24_SINGLE_ORDINAL,
-}
+})
 
-UNEQUIVOCAL_TIME_PATTERNS = {
+UNEQUIVOCAL_TIME_PATTERNS = compile_patterns({
     'ampm-ordinal': PATTERN_TIME_AMPM_ORDINAL,
     'ampm-scalar': PATTERN_TIME_AMPM_SCALAR,
     'ampm-ordinal-two-digit-minutes': PATTERN_TIME_AMPM_ORDINAL_TWO_DIGIT_MINUTES,
@@ -230,9 +244,9 @@ UNEQUIVOCAL_TIME_PATTERNS = {
     '24-scalar-two-digit-minutes': PATTERN_TIME_24_SCALAR_TWO_DIGIT_MINUTES,
     '24-ordinal-two-digit-minutes': PATTERN_TIME_24_ORDINAL_TWO_DIGIT_MINUTES,
 
-}
+})
 
-UNEQUIVOCAL_DATE_PATTERNS = {
+UNEQUIVOCAL_DATE_PATTERNS = compile_patterns({
     'day-after-grabber-day': PATTERN_DATE_DAY_AFTER_GRABBER_DAY,
     'scalar-full': PATTERN_DATE_SCALAR_FULL,
     'scalar-full-reverse': PATTERN_DATE_SCALAR_FULL_REVERSE,
@@ -242,20 +256,20 @@ UNEQUIVOCAL_DATE_PATTERNS = {
     'week-day-next-week-reverse': PATTERN_WEEK_DAY_IN_WEEK_REVERSE,
     'week-day-count-weeks': PATTERN_WEEK_DAY_COUNT_WEEKS,
     'week-day-count-weeks-reverse': PATTERN_WEEK_DAY_COUNT_WEEKS_REVERSE,
-}
+})
 
-AMBIGUOUS_DATE_PATTERNS = {
+AMBIGUOUS_DATE_PATTERNS = compile_patterns({
     'grabber-day': PATTERN_DATE_GRABBER_DAY,
     'scalar': PATTERN_DATE_SCALAR,
     'ordinal': PATTERN_DATE_ORDINAL,
     'week-day': PATTERN_WEEK_DAY,
     'next-week': PATTERN_DATE_NEXT_WEEK,
-}
+})
 
-REMINDER_PATTERNS = {
+REMINDER_PATTERNS = compile_patterns({
     'reminder': PATTERN_REMINDER,
     'reminder-count': PATTERN_REMINDER_COUNT
-}
+})
 
 
 def parse_pattern_24(now: datetime, tokens: List[Token]) -> timedelta:
@@ -470,106 +484,150 @@ HANDLERS = {
 }
 
 
-def match_pattern(pattern: List[Tag], tokens: List[Token]) -> bool:
-    for tag, token in zip(pattern, tokens):
-        if tag not in token.tags:
-            return False
-    return True
-
-
-class Reducer(metaclass=abc.ABCMeta):
-    def __init__(self, token1: Token, token2: Token):
-        self._token1 = token1
-        self._token2 = token2
-
-    @abc.abstractmethod
-    def match(self) -> bool:
-        raise NotImplemented
-
-    @abc.abstractmethod
-    def reduce(self) -> Token:
-        raise NotImplemented
+AMBIGUOUS_TIME_MATCHER = PatternMatcher(AMBIGUOUS_TIME_PATTERNS)
+UNEQUIVOCAL_TIME_MATCHER = PatternMatcher(UNEQUIVOCAL_TIME_PATTERNS)
+UNEQUIVOCAL_DATE_MATCHER = PatternMatcher(UNEQUIVOCAL_DATE_PATTERNS)
+AMBIGUOUS_DATE_MATCHER = PatternMatcher(AMBIGUOUS_DATE_PATTERNS)
+REMINDER_MATCHER = PatternMatcher(REMINDER_PATTERNS)
 
 
-class DayPortionReducer(Reducer):
-    def match(self) -> bool:
-        return Tag.POINTER in self._token1.tags and Tag.REPEATER_DAY_PORTION in self._token2.tags
+UNTAGGED = 0
+CLOSING_BRACKETS = {')': '(', ']': '[', '}': '{'}
+LEADING_PUNCTUATION = re.compile(r'\s*(?:[^\w\s]+\s+)*')
+ATTACHED_CHARACTERS = re.compile(r'\S*')
 
-    def reduce(self) -> Token:
-        if self._token1.word == 'before' and self._token2.word == 'noon':
-            token = Token('am')
-            token.tags.append(Tag.REPEATER_DAY_PORTION)
-            return token
-        elif self._token1.word == 'after' and self._token2.word == 'noon':
-            token = Token('pm')
-            token.tags.append(Tag.REPEATER_DAY_PORTION)
-            return token
-        else:
-            return self._token2
 
+def has_tags(tags: int, required_tags: int) -> bool:
+    if required_tags == UNTAGGED:
+        return not tags
+    return bool(tags & required_tags)
 
-class NoTagReducer(Reducer):
-    def match(self) -> bool:
-        return not self._token1.tags and not self._token2.tags
 
-    def reduce(self) -> Token:
-        return Token(' '.join((self._token1.word, self._token2.word)))
+# A bracket closing one opened in the name is a part of it
+def remove_trailing_separator(name: str) -> str:
+    if not name or name[-1].isalnum():
+        return name
+    opening_bracket = CLOSING_BRACKETS.get(name[-1])
+    if opening_bracket is not None and name.count(opening_bracket) >= name.count(name[-1]):
+        return name
+    return name[:-1]
 
 
-class SeparatorNoTagReducer(Reducer):
-    def match(self) -> bool:
-        return Tag.SEPARATOR in self._token1.tags and not self._token2.tags
+class ReductionRule(NamedTuple):
+    left_tags: int
+    right_tags: int
+    # Returns the token replacing the pair, or None when the pair should be left as it is
+    reduce: Callable[[Token, Token], Optional[Token]]
 
-    def reduce(self) -> Token:
-        return Token(' '.join((self._token1.word, self._token2.word)))
+    def apply(self, left: Token, right: Token) -> Optional[Token]:
+        if not has_tags(left.tags, self.left_tags) or not has_tags(right.tags, self.right_tags):
+            return None
+        return self.reduce(left, right)
 
 
-class MascOrdinalReducer(Reducer):
-    def match(self) -> bool:
-        return Tag.ORDINAL_MASC in self._token1.tags and Tag.ORDINAL_MASC in self._token2.tags \
-               and self._decimal_part_detected() and self._unit_part_detected()
+def reduce_joined_words(left: Token, right: Token) -> Token:
+    return Token(' '.join((left.word, right.word)), UNTAGGED, left.start, right.end)
 
-    def reduce(self) -> Token:
-        token_1_value = int(self._token1.word)
-        token_2_value = int(self._token2.word)
-        reduced_value = token_1_value + token_2_value
-        token = Token(str(reduced_value))
-        token.tags.append(Tag.ORDINAL)
-        token.tags.append(Tag.ORDINAL_MASC)
-        if 0 < reduced_value <= 31:
-            token.tags.append(Tag.ORDINAL_DAY)
-        if 0 < reduced_value <= 12:
-            token.tags.append(Tag.ORDINAL_MONTH)
-        return token
 
-    def _decimal_part_detected(self) -> bool:
-        return int(self._token1.word) in [20, 30]
-
-    def _unit_part_detected(self) -> bool:
-        return 0 < int(self._token2.word) < 10
-
-
-class FemOrdinalReducer(Reducer):
-    def match(self) -> bool:
-        return Tag.ORDINAL_FEM in self._token1.tags and Tag.ORDINAL_FEM in self._token2.tags \
-               and self._decimal_part_detected() and self._unit_part_detected()
-
-    def reduce(self) -> Token:
-        token_1_value = int(self._token1.word)
-        token_2_value = int(self._token2.word)
-        reduced_value = token_1_value + token_2_value
-        token = Token(str(reduced_value))
-        token.tags.append(Tag.ORDINAL)
-        token.tags.append(Tag.ORDINAL_FEM)
-        if 0 < reduced_value <= 23:
-            token.tags.append(Tag.ORDINAL_HOUR)
-        return token
-
-    def _decimal_part_detected(self) -> bool:
-        return int(self._token1.word) in [20, 30]
-
-    def _unit_part_detected(self) -> bool:
-        return 0 < int(self._token2.word) < 10
+def reduce_day_portion(left: Token, right: Token) -> Token:
+    if left.word == 'before' and right.word == 'noon':
+        return Token('am', int(Tag.REPEATER_DAY_PORTION), left.start, right.end)
+    elif left.word == 'after' and right.word == 'noon':
+        return Token('pm', int(Tag.REPEATER_DAY_PORTION), left.start, right.end)
+    else:
+        return right
+
+
+def is_compound_ordinal(left: Token, right: Token) -> bool:
+    return int(left.word) in [20, 30] and 0 < int(right.word) < 10
+
+
+def reduce_masc_ordinals(left: Token, right: Token) -> Optional[Token]:
+    if not is_compound_ordinal(left, right):
+        return None
+    reduced_value = int(left.word) + int(right.word)
+    return Token(str(reduced_value), masc_ordinal_tags(reduced_value), left.start, right.end)
+
+
+def reduce_fem_ordinals(left: Token, right: Token) -> Optional[Token]:
+    if not is_compound_ordinal(left, right):
+        return None
+    reduced_value = int(left.word) + int(right.word)
+    return Token(str(reduced_value), fem_ordinal_tags(reduced_value), left.start, right.end)
+
+
+REDUCTION_RULES = (
+    ReductionRule(int(Tag.SEPARATOR), UNTAGGED, reduce_joined_words),
+    ReductionRule(UNTAGGED, UNTAGGED, reduce_joined_words),
+    ReductionRule(int(Tag.POINTER), int(Tag.REPEATER_DAY_PORTION), reduce_day_portion),
+    ReductionRule(int(Tag.ORDINAL_MASC), int(Tag.ORDINAL_MASC), reduce_masc_ordinals),
+    ReductionRule(int(Tag.ORDINAL_FEM), int(Tag.ORDINAL_FEM), reduce_fem_ordinals),
+)
+
+
+# Applies the rules as a pipeline of stream transforms, each one holding back a single token that
+# may still be merged with the next one. Every rule sees the same sequence as if it was applied in
+# a separate pass over the output of the previous rules, but tokens are only visited once.
+def reduce_tokens(tokens: Iterable[Token], rules: Sequence[ReductionRule]) -> List[Token]:
+    stages_count = len(rules)
+    pending: List[Optional[Token]] = [None] * stages_count
+    output: List[Token] = []
+
+    def push(token: Token, stage: int) -> None:
+        while stage < stages_count:
+            previous = pending[stage]
+            pending[stage] = token
+            if previous is None:
+                return
+            reduced = rules[stage].apply(previous, token)
+            if reduced is not None:
+                pending[stage] = reduced
+                return
+            token = previous
+            stage += 1
+        output.append(token)
+
+    for token in tokens:
+        push(token, 0)
+    for stage in range(stages_count):
+        if (token := pending[stage]) is not None:
+            pending[stage] = None
+            push(token, stage + 1)
+    return output
+
+
+# Lookup tables derived from the vocabularies, built once and stored as a snapshot
+@dataclass(frozen=True)
+class PolishTables:
+    normalizer: Normalizer
+    number_tags: Tuple[int, ...]
+    word_tags: Dict[str, int]
+    ordinal_tokens: Dict[str, Tuple[str, int]]
+    token_prototypes: Dict[str, TokenPrototype]
+
+
+def build_tables(max_year: int,
+                 diacritics: Dict[str, str],
+                 command_words: Iterable[str],
+                 vocabularies: Sequence[Dict[str, str]],
+                 fuzzy_words: Iterable[str],
+                 month_names: Dict[str, str],
+                 week_day_names: Dict[str, str],
+                 day_portion_terms: Dict[str, str],
+                 time_units: Dict[str, str],
+                 ordinals_fem: Dict[str, str],
+                 ordinals_masc: Dict[str, str]) -> PolishTables:
+    number_tags = build_number_tags(max_year)
+    word_tags = build_word_tags(month_names.values(), week_day_names.values(),
+                                day_portion_terms.values(), time_units.values())
+    ordinal_tokens = build_ordinal_tokens(ordinals_fem, ordinals_masc)
+    return PolishTables(
+        Normalizer(diacritics, command_words, vocabularies, fuzzy_words),
+        number_tags,
+        word_tags,
+        ordinal_tokens,
+        build_token_prototypes(word_tags, ordinal_tokens, number_tags)
+    )
 
 
 class PolishParser(Parser):
@@ -872,208 +930,158 @@ class PolishParser(Parser):
         'december': 12
     }
 
-    def __init__(self, clock: Clock):
-        self._now = clock.now()
+    # Words recognized even when misspelled. Relation words turning into separators or pointers,
+    # like "za" or "przed", are left out: they are too short or too close to ordinary words
+    FUZZY_WORDS = [
+        *MONTH_NAMES,
+        *WEEK_DAY_NAMES,
+        *TIME_UNITS,
+        *SCALARS,
+        *ORDINALS_FEM,
+        *ORDINALS_MASC,
+        *(word for word, normalized in TIME_RELATION_WORDS.items()
+          if ' ' not in word and normalized not in SEPARATORS + POINTERS),
+    ]
 
-    def __call__(self, text: str) -> EventParsingResult:
-        normalized_text = PolishParser._normalize(text)
-        tokens = PolishParser._tokenize(normalized_text)
+    TABLES = load_snapshot('polish', (__file__, normalizer_module.__file__, fuzzy_module.__file__), partial(
+        build_tables,
+        MAX_YEAR,
+        POLISH_DIACRITICS,
+        COMMAND_SYNONYMS,
+        (
+            SCALARS,
+            TIME_RELATION_WORDS,
+            TIME_UNITS,
+            WEEK_DAY_NAMES,
+            dict.fromkeys(REMIND_SYNONYMS, REMIND_WORD),
+            DAY_PORTION_TERMS,
+            MONTH_NAMES,
+            MONTH_ROMAN_NUMBERS,
+        ),
+        FUZZY_WORDS,
+        MONTH_NAMES,
+        WEEK_DAY_NAMES,
+        DAY_PORTION_TERMS,
+        TIME_UNITS,
+        ORDINALS_FEM,
+        ORDINALS_MASC
+    ))
+    NORMALIZER = TABLES.normalizer
+    NUMBER_TAGS = TABLES.number_tags
+    WORD_TAGS = TABLES.word_tags
+    ORDINAL_TOKENS = TABLES.ordinal_tokens
+    TOKEN_CACHE = TokenCache(TABLES.token_prototypes, NUMBER_TAGS)
+
+    def __call__(self, text: str, now: datetime) -> EventParsingResult:
+        timer = start_stage_timer(self._instrumentation)
+        try:
+            return self._parse_prompt(text, now, timer)
+        finally:
+            timer.finish(text)
+
+    # Misspelled words are corrected in the same pass. A correction counts only if a pattern takes the corrected
+    # word: words of the event name, like "Marią", can be close to vocabulary words too
+    def _parse_prompt(self, text: str, now: datetime, timer: StageTimer) -> EventParsingResult:
+        normalized_words = PolishParser.NORMALIZER.words(text, fuzzy=True)
+        timer('normalize')
+        tokens = PolishParser._tokenize(normalized_words)
+        timer('tokenize')
         reduced_tokens = PolishParser._reduce(tokens)
+        timer('reduce')
         tagged_tokens = [token for token in reduced_tokens if token.tags]
-        reminder_delta, remaining_tokens = self._seek_reminder_delta(tagged_tokens)
-        date_, remaining_tokens = self._seek_date_unequivocal(remaining_tokens)
-        time, remaining_tokens = self._seek_time_unequivocal(remaining_tokens)
+        reminder_delta, remaining_tokens = self._seek_reminder_delta(tagged_tokens, now)
+        timer('seek_reminder_delta')
+        date_, remaining_tokens = self._seek_date_unequivocal(remaining_tokens, now)
+        timer('seek_date_unequivocal')
+        time, remaining_tokens = self._seek_time_unequivocal(remaining_tokens, now)
+        timer('seek_time_unequivocal')
         if not date_:
-            date_, remaining_tokens = self._seek_date_ambiguous(remaining_tokens)
+            date_, remaining_tokens = self._seek_date_ambiguous(remaining_tokens, now)
+            timer('seek_date_ambiguous')
         if not time:
-            time, remaining_tokens = self._seek_time_ambiguous(remaining_tokens)
+            time, remaining_tokens = self._seek_time_ambiguous(remaining_tokens, now)
+            timer('seek_time_ambiguous')
         if not date_:
-            date_ = self._now.date()
+            date_ = now.date()
         if not time:
             raise ParsingError(text)
         datetime_ = datetime(year=date_.year, month=date_.month, day=date_.day) + time
-        untagged_tokens = [token for token in reduced_tokens if not token.tags]
-        event_name = self._seek_name(untagged_tokens, text)
+        name_tokens = PolishParser._undo_unused_corrections(normalized_words, reduced_tokens, tagged_tokens,
+                                                            remaining_tokens)
+        event_name = self._seek_name(name_tokens, text)
+        timer('seek_name')
         return EventParsingResult(event_name, datetime_, reminder_delta=reminder_delta)
 
-    def _seek_reminder_delta(self, tokens: List[Token]) -> (Optional[timedelta], List[Token]):
-        return self._parse(tokens, REMINDER_PATTERNS)
+    def _seek_reminder_delta(self, tokens: List[Token], now: datetime) -> (Optional[timedelta], List[Token]):
+        return self._parse(tokens, REMINDER_MATCHER, now)
 
-    def _seek_time_unequivocal(self, tokens: List[Token]) -> (Optional[timedelta], List[Token]):
-        return self._parse(tokens, UNEQUIVOCAL_TIME_PATTERNS)
+    def _seek_time_unequivocal(self, tokens: List[Token], now: datetime) -> (Optional[timedelta], List[Token]):
+        return self._parse(tokens, UNEQUIVOCAL_TIME_MATCHER, now)
 
-    def _seek_time_ambiguous(self, tokens: List[Token]) -> (Optional[timedelta], List[Token]):
-        return self._parse(tokens, AMBIGUOUS_TIME_PATTERNS)
+    def _seek_time_ambiguous(self, tokens: List[Token], now: datetime) -> (Optional[timedelta], List[Token]):
+        return self._parse(tokens, AMBIGUOUS_TIME_MATCHER, now)
 
-    def _seek_date_unequivocal(self, tokens: List[Token]) -> (Optional[date], List[Token]):
-        return self._parse(tokens, UNEQUIVOCAL_DATE_PATTERNS)
+    def _seek_date_unequivocal(self, tokens: List[Token], now: datetime) -> (Optional[date], List[Token]):
+        return self._parse(tokens, UNEQUIVOCAL_DATE_MATCHER, now)
 
-    def _seek_date_ambiguous(self, tokens: List[Token]) -> (Optional[date], List[Token]):
-        return self._parse(tokens, AMBIGUOUS_DATE_PATTERNS)
+    def _seek_date_ambiguous(self, tokens: List[Token], now: datetime) -> (Optional[date], List[Token]):
+        return self._parse(tokens, AMBIGUOUS_DATE_MATCHER, now)
 
-    def _seek_name(self, untagged_tokens: List[Token], original_text: str) -> str:
-        original_text_words = original_text.split(' ')
-        for token in untagged_tokens:
-            for chain in list(accumulate(original_text_words, func=lambda x, y: ' '.join((x, y)))):
-                if token.word == PolishParser._normalize(chain).strip():
-                    return remove_training_specials(chain)
-        raise ParsingError(original_text)
+    # The name is the untagged part the prompt starts with: up to its last word, with the characters attached to it.
+    # Punctuation standing on its own before the name or after it is not a part of it
+    def _seek_name(self, reduced_tokens: List[Token], original_text: str) -> str:
+        if not reduced_tokens or reduced_tokens[0].tags:
+            raise ParsingError(original_text)
+        name_start = LEADING_PUNCTUATION.match(original_text).end()
+        name_end = ATTACHED_CHARACTERS.match(original_text, reduced_tokens[0].end).end()
+        return remove_trailing_separator(original_text[name_start:name_end])
 
-    def _parse(self, tokens: List[Token], patterns: Dict[str, List[Tag]]) \
+    def _parse(self, tokens: List[Token], matcher: PatternMatcher, now: datetime) \
             -> (Optional[Union[date, timedelta]], List[Token]):
-        for pattern_name, pattern in patterns.items():
-            i = 0
-            while i + len(pattern) <= len(tokens):
-                tokens_portion = tokens[i:i + len(pattern)]
-                if match_pattern(pattern, tokens_portion):
-                    remaining_tokens = tokens[:i] + tokens[i + len(pattern):]
-                    handler = HANDLERS[pattern_name]
-                    time = handler(self._now, tokens_portion)
-                    return time, remaining_tokens
-                i += 1
-        return None, tokens
+        match = matcher.match([token.tags for token in tokens])
+        if match is None:
+            return None, tokens
+        pattern_name, start, end = match
+        tokens_portion = tokens[start:end]
+        remaining_tokens = tokens[:start] + tokens[end:]
+        handler = HANDLERS[pattern_name]
+        time = handler(now, tokens_portion)
+        return time, remaining_tokens
 
     @staticmethod
-    def _normalize(text: str) -> str:
-        lower_text = text.lower()
-        # Get rid of all special characters
-        lower_text = re.sub(r'\W+', ' ', lower_text)
-
-        words = lower_text.split(' ')
-        # Normalize diacritics
-        words = [PolishParser._normalize_polish_diacritics(word) for word in words]
-        # If first word is a command synonym, remove it
-        if words[0] in PolishParser.COMMAND_SYNONYMS:
-            words = words[1:]
-        # Replace all numbers written as words with digit values
-        words = [PolishParser.SCALARS[word] if word in PolishParser.SCALARS
-                 else word for word in words]
-        # Normalize words related to relative time description
-        words = [PolishParser.TIME_RELATION_WORDS[word] if word in PolishParser.TIME_RELATION_WORDS
-                 else word for word in words]
-        # Normalize time terms
-        words = [PolishParser.TIME_UNITS[word] if word in PolishParser.TIME_UNITS
-                 else word for word in words]
-        # Normalize weekday names
-        words = [PolishParser.WEEK_DAY_NAMES[word] if word in PolishParser.WEEK_DAY_NAMES
-                 else word for word in words]
-        # Normalize 'remind' synonyms
-        words = [PolishParser.REMIND_WORD if word in PolishParser.REMIND_SYNONYMS
-                 else word for word in words]
-        # Normalize day portion terms
-        words = [PolishParser.DAY_PORTION_TERMS[word] if word in PolishParser.DAY_PORTION_TERMS
-                 else word for word in words]
-        # Normalize month names
-        words = [PolishParser.MONTH_NAMES[word] if word in PolishParser.MONTH_NAMES
-                 else word for word in words]
-        # Normalize months as roman numbers
-        words = [PolishParser.MONTH_ROMAN_NUMBERS[word] if word in PolishParser.MONTH_ROMAN_NUMBERS
-                 else word for word in words]
-        # Remove 'empty' words
-        words = [word for word in words if word != ' ']
-        normalized_text = ' '.join(words)
-        return normalized_text
+    def _normalize(text: str, fuzzy: bool = False) -> str:
+        return PolishParser.NORMALIZER(text, fuzzy)
 
     @staticmethod
-    def _tokenize(text: str) -> List[Token]:
-        tokens = [PolishParser._make_token(word) for word in text.split(' ')]
+    def _tokenize(words: List[NormalizedWord]) -> List[Token]:
+        # Words normalized into phrases, like "jutro" into "next day", share the span of the source word
+        tokens = [PolishParser._make_token(part, word.start, word.end)
+                  for word in words for part in word.word.split(' ')]
         return tokens
 
     @staticmethod
     def _reduce(tokens: List[Token]) -> List[Token]:
-        reducer_types = (SeparatorNoTagReducer, NoTagReducer, DayPortionReducer,
-                         MascOrdinalReducer, FemOrdinalReducer)
-        for reducer_type in reducer_types:
-            i = 0
-            while i < len(tokens[:-1]):
-                reducer = reducer_type(tokens[i], tokens[i+1])
-                if reducer.match():
-                    new_token = reducer.reduce()
-                    tokens.insert(i, new_token)
-                    tokens.pop(i+1)
-                    tokens.pop(i+1)
-                    i -= 1
-                i += 1
-        return tokens
+        return reduce_tokens(tokens, REDUCTION_RULES)
 
+    # Corrected words that no pattern took are read as written again, so that they stay in the event name
     @staticmethod
-    def _make_token(word: str) -> Token:
-        token = Token(word)
-        if is_separator(word):
-            token.tags.append(Tag.SEPARATOR)
-        if is_scalar(word):
-            token.tags.append(Tag.SCALAR)
-            if is_scalar_month(word):
-                token.tags.append(Tag.SCALAR_MONTH)
-            if is_scalar_day(word):
-                token.tags.append(Tag.SCALAR_DAY)
-            if is_scalar_hour(word):
-                token.tags.append(Tag.SCALAR_HOUR)
-            if is_scalar_minute(word):
-                token.tags.append(Tag.SCALAR_MINUTE)
-            if is_scalar_year(word):
-                token.tags.append(Tag.SCALAR_YEAR)
-        if is_pointer(word):
-            token.tags.append(Tag.POINTER)
-        if is_grabber(word):
-            token.tags.append(Tag.GRABBER)
-        if is_repeater(word):
-            token.tags.append(Tag.REPEATER)
-            if is_repeater_month(word):
-                token.tags.append(Tag.REPEATER_MONTH)
-            if is_repeater_week(word):
-                token.tags.append(Tag.REPEATER_WEEK)
-            if is_repeater_day(word):
-                token.tags.append(Tag.REPEATER_DAY)
-            if is_repeater_day_portion(word):
-                token.tags.append(Tag.REPEATER_DAY_PORTION)
-            if is_repeater_month_name(word):
-                token.tags.append(Tag.REPEATER_MONTH_NAME)
-            if is_repeater_day_name(word):
-                token.tags.append(Tag.REPEATER_DAY_NAME)
-            if is_repeater_time(word):
-                token.tags.append(Tag.REPEATER_TIME)
-            if is_repeater_weeks(word):
-                token.tags.append(Tag.REPEATER_WEEKS)
-        if is_ordinal(word):
-            token.tags.append(Tag.ORDINAL)
-            if is_ordinal_fem(word):
-                token = fem_ordinal_word_to_number(token)
-                token.tags.append(Tag.ORDINAL_FEM)
-                if is_scalar_hour(token.word):
-                    token.tags.append(Tag.ORDINAL_HOUR)
-            if is_ordinal_masc(word):
-                token = masc_ordinal_word_to_number(token)
-                token.tags.append(Tag.ORDINAL_MASC)
-                if is_scalar_day(token.word):
-                    token.tags.append(Tag.ORDINAL_DAY)
-                if is_scalar_month(token.word):
-                    token.tags.append(Tag.ORDINAL_MONTH)
-        if is_keyword(word):
-            token.tags.append(Tag.KEYWORD)
-            if is_keyword_remind(word):
-                token.tags.append(Tag.KEYWORD_REMIND)
-        return token
+    def _undo_unused_corrections(words: List[NormalizedWord], reduced_tokens: List[Token],
+                                 tagged_tokens: List[Token], remaining_tokens: List[Token]) -> List[Token]:
+        if all(word.uncorrected is None for word in words):
+            return reduced_tokens
+        remaining_ids = {id(token) for token in remaining_tokens}
+        used_spans = [(token.start, token.end) for token in tagged_tokens if id(token) not in remaining_ids]
+        unused = {word for word in words if word.uncorrected is not None
+                  and not any(start <= word.start and word.end <= end for start, end in used_spans)}
+        if not unused:
+            return reduced_tokens
+        words = [NormalizedWord(word.uncorrected, word.start, word.end) if word in unused else word for word in words]
+        return PolishParser._reduce(PolishParser._tokenize(words))
 
     @staticmethod
-    def _normalize_polish_diacritics(word: str) -> str:
-        for diacritic, normalized in PolishParser.POLISH_DIACRITICS.items():
-            word = word.replace(diacritic, normalized)
-        return word
-
-
-def remove_training_specials(text: str) -> str:
-    trailing_char = text[-1]
-    if not trailing_char.isalnum():
-        return text[:-1]
-    return text
-
+    def token_cache_info() -> TokenCacheInfo:
+        return PolishParser.TOKEN_CACHE.info()
 
-def fem_ordinal_word_to_number(token: Token) -> Token:
-    token.word = PolishParser.ORDINALS_FEM[token.word]
-    return token
-
-
-def masc_ordinal_word_to_number(token: Token) -> Token:
-    token.word = PolishParser.ORDINALS_MASC[token.word]
-    return token
+    @staticmethod
+    def _make_token(word: str, start: int = 0, end: int = 0) -> Token:
+        return PolishParser.TOKEN_CACHE(word, start, end)
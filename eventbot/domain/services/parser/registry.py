@@ -0,0 +1,74 @@
+import importlib
+from threading import Lock
+from typing import Dict, Optional
+
+from eventbot.domain.enums import CalendarLanguage
+from eventbot.domain.services.parser.parser import Parser
+from eventbot.domain.services.parser.instrumentation import ParserInstrumentation
+from eventbot.domain.services.parser.cache import ParseCache, CachingParser, DEFAULT_PARSE_CACHE_SIZE
+
+
+class ParserRegistry:
+    def __init__(self, cache_size: int = DEFAULT_PARSE_CACHE_SIZE):
+        self._cache_size: int = cache_size
+        self._parsers: Dict[CalendarLanguage, CachingParser] = {}
+        # Parsers registered by path are imported on first use
+        self._parser_paths: Dict[CalendarLanguage, str] = {}
+        self._instrumentation: Optional[ParserInstrumentation] = None
+        self._lock = Lock()
+
+    def register(self, language: CalendarLanguage, parser: Parser) -> None:
+        with self._lock:
+            self._add(language, parser)
+
+    def register_path(self, language: CalendarLanguage, path: str) -> None:
+        with self._lock:
+            self._parser_paths[language] = path
+
+    def get(self, language: CalendarLanguage) -> Parser:
+        if (parser := self._parsers.get(language)) is not None:
+            return parser
+        if language not in self._parser_paths:
+            raise ValueError(f'No parser registered for language: {language}')
+        return self._load(language)
+
+    def _load(self, language: CalendarLanguage) -> Parser:
+        with self._lock:
+            if language not in self._parsers:
+                module_name, class_name = self._parser_paths[language].split(':')
+                self._add(language, getattr(importlib.import_module(module_name), class_name)())
+            return self._parsers[language]
+
+    def _add(self, language: CalendarLanguage, parser: Parser) -> None:
+        caching_parser = CachingParser(parser, ParseCache(self._cache_size))
+        caching_parser.instrument(self._instrumentation)
+        self._parsers[language] = caching_parser
+
+    def configure_cache(self, size: int) -> None:
+        with self._lock:
+            self._cache_size = size
+            for parser in self._parsers.values():
+                parser.cache.resize(size)
+                parser.cache.clear()
+
+    def instrument(self, instrumentation: Optional[ParserInstrumentation]) -> None:
+        with self._lock:
+            self._instrumentation = instrumentation
+            for parser in self._parsers.values():
+                parser.instrument(instrumentation)
+
+
+parsers = ParserRegistry()
+parsers.register_path(CalendarLanguage.PL, 'eventbot.domain.services.parser.polish:PolishParser')
+
+
+def get_parser(language: CalendarLanguage) -> Parser:
+    return parsers.get(language)
+
+
+def configure_parse_cache(size: int) -> None:
+    parsers.configure_cache(size)
+
+
+def configure_parser_instrumentation(instrumentation: Optional[ParserInstrumentation]) -> None:
+    parsers.instrument(instrumentation)
@@ -0,0 +1,57 @@
+import hashlib
+import os
+import pickle
+import sys
+from typing import Callable, Iterable, TypeVar
+
+
+T = TypeVar('T')
+
+SNAPSHOT_DIR = '__pycache__'
+
+
+# Snapshots are keyed by the sources the tables are built from,
+# so changing a vocabulary or a builder invalidates the stored tables
+def snapshot_key(sources: Iterable[str]) -> str:
+    digest = hashlib.sha256(sys.version.encode())
+    for source in sources:
+        with open(source, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def snapshot_path(name: str, anchor: str) -> str:
+    return os.path.join(os.path.dirname(anchor), SNAPSHOT_DIR, f'{name}.snapshot')
+
+
+# Loads tables pickled by a previous run, rebuilding and storing them
+# if the snapshot is missing, stale or unreadable
+def load_snapshot(name: str, sources: Iterable[str], build: Callable[[], T]) -> T:
+    sources = list(sources)
+    path = snapshot_path(name, sources[0])
+    try:
+        key = snapshot_key(sources)
+    except OSError:
+        return build()
+    try:
+        with open(path, 'rb') as file:
+            stored_key, tables = pickle.load(file)
+        if stored_key == key:
+            return tables
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+        pass
+    tables = build()
+    store_snapshot(path, key, tables)
+    return tables
+
+
+def store_snapshot(path: str, key: str, tables: object) -> None:
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temporary_path, 'wb') as file:
+            pickle.dump((key, tables), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+    except OSError:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
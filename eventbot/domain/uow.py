@@ -1,7 +1,7 @@
 import abc
 
-from eventbot.domain.repositories import CalendarRepository
-from eventbot.domain.ports import EventSequenceGenerator
+from eventbot.domain.repositories import CalendarRepository, AsyncCalendarRepository
+from eventbot.domain.ports import EventSequenceGenerator, AsyncEventSequenceGenerator, Notifier
 
 
 class CalendarUnitOfWork(metaclass=abc.ABCMeta):
@@ -23,6 +23,11 @@ class CalendarUnitOfWork(metaclass=abc.ABCMeta):
     def event_sequence_generator(self) -> EventSequenceGenerator:
         raise NotImplemented
 
+    # Notifier recording notifications for the channel of a calendar, delivered once the unit of work is committed
+    @abc.abstractmethod
+    def outbox(self, guild_handle: str, channel_handle: str) -> Notifier:
+        raise NotImplemented
+
     @abc.abstractmethod
     def commit(self) -> None:
         raise NotImplemented
@@ -30,3 +35,36 @@ class CalendarUnitOfWork(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def rollback(self) -> None:
         raise NotImplemented
+
+
+class AsyncCalendarUnitOfWork(metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    async def __aenter__(self) -> 'AsyncCalendarUnitOfWork':
+        raise NotImplemented
+
+    @abc.abstractmethod
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        raise NotImplemented
+
+    @property
+    @abc.abstractmethod
+    def calendars(self) -> AsyncCalendarRepository:
+        raise NotImplemented
+
+    @property
+    @abc.abstractmethod
+    def event_sequence_generator(self) -> AsyncEventSequenceGenerator:
+        raise NotImplemented
+
+    # The notifier is synchronous, as the calendar calls it; notifications are written on commit
+    @abc.abstractmethod
+    def outbox(self, guild_handle: str, channel_handle: str) -> Notifier:
+        raise NotImplemented
+
+    @abc.abstractmethod
+    async def commit(self) -> None:
+        raise NotImplemented
+
+    @abc.abstractmethod
+    async def rollback(self) -> None:
+        raise NotImplemented
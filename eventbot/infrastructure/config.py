@@ -3,6 +3,7 @@ import pathlib
 from dataclasses import dataclass
 
 from eventbot.domain import CalendarLanguage
+from eventbot.domain.services.parser import DEFAULT_PARSE_CACHE_SIZE
 
 
 def read_calendar_language(language: str) -> CalendarLanguage:
@@ -18,6 +19,11 @@ class Config:
     base_dir = pathlib.Path(__file__).parent.parent
     project_root = base_dir.parent
 
+    # Storage: postgres, or memory for a single process keeping calendars in memory
+    storage = os.getenv('STORAGE', 'postgres')
+    # Memory storage only; without a path nothing is kept after the process exits
+    memory_snapshot_path = os.getenv('MEMORY_SNAPSHOT_PATH')
+
     # Database
     database = os.getenv('POSTGRES_DB')
     database_user = os.getenv('POSTGRES_USER')
@@ -30,3 +36,20 @@ class Config:
 
     # Language
     language = read_calendar_language(os.getenv('LANGUAGE'))
+
+    # Parsing
+    parse_cache_size = int(os.getenv('PARSE_CACHE_SIZE', DEFAULT_PARSE_CACHE_SIZE))
+    parser_pool_kind = os.getenv('PARSER_POOL_KIND', 'thread')
+    parser_pool_size = int(os.getenv('PARSER_POOL_SIZE', 2))
+    parse_timeout = float(os.getenv('PARSE_TIMEOUT', 2.0))
+    parse_batch_timeout = float(os.getenv('PARSE_BATCH_TIMEOUT', 10.0))
+
+    # Declarations
+    declaration_window = float(os.getenv('DECLARATION_WINDOW', 0.02))
+
+    # Retention: archive or delete events removed or started over the TTL ago
+    retention_mode = os.getenv('RETENTION_MODE', 'archive')
+    retention_ttl_days = float(os.getenv('RETENTION_TTL_DAYS', 7))
+    retention_batch_size = int(os.getenv('RETENTION_BATCH_SIZE', 500))
+    # Seconds between batches, leaving room for the bot's own transactions
+    retention_pause = float(os.getenv('RETENTION_PAUSE', 0.0))
@@ -1,14 +1,21 @@
-from uuid import UUID
+from datetime import datetime
+from typing import Optional
 
 import nextcord
-from nextcord.ext import commands, tasks
+from nextcord.ext import commands
 
-from eventbot.domain import CalendarUnitOfWork, Clock, Notifier
+from eventbot.domain import AsyncCalendarUnitOfWork, Clock
+from eventbot.infrastructure.discord.coalescer import DeclarationCoalescer
 from eventbot.infrastructure.discord.formatters import format_event
-from eventbot.infrastructure.discord.modal import EventModal
-from eventbot.infrastructure.discord.notifiers import DiscordEventCreationNotifier, DiscordEventLifecycleNotifier
+from eventbot.infrastructure.discord.modal import EventModal, EventImportModal
+from eventbot.infrastructure.discord.notifiers import DiscordOutboxDelivery
 from eventbot.infrastructure.discord.strings import STRINGS, StringType
 from eventbot.infrastructure.config import Config
+from eventbot.infrastructure.parsing import create_pooled_parser
+from eventbot.infrastructure.outbox import OutboxDispatcher
+from eventbot.infrastructure.persistence import AsyncOutbox
+from eventbot.infrastructure.retry import ConflictRetry
+from eventbot.infrastructure.scheduler import NotificationScheduler
 
 
 class CalendarBot(commands.Bot):
@@ -19,32 +26,28 @@ class CalendarBot(commands.Bot):
 
 
 class CalendarCog(commands.Cog):
-    def __init__(self, bot: CalendarBot, uow: CalendarUnitOfWork, clock: Clock):
+    def __init__(self, bot: CalendarBot, uow: AsyncCalendarUnitOfWork, clock: Clock, outbox: AsyncOutbox,
+                 config: Config):
         self._bot = bot
-        self._uow = uow
-        self._clock = clock
-        self.handle_pending_notifications.start()
-
-    @tasks.loop(minutes=1)
-    async def handle_pending_notifications(self):
-        for channel in self._bot.get_all_channels():
-            notifier = DiscordEventLifecycleNotifier(channel)
-            guild_handle = channel.guild.name
-            channel_handle = channel.name
-            await self._handle_calendar(guild_handle, channel_handle, notifier)
-
-    async def _handle_calendar(self, guild: str, channel: str, notifier: Notifier) -> None:
-        with self._uow as unit_of_work:
-            if unit_of_work.calendars.does_calendar_exist(guild, channel):
-                calendar = unit_of_work.calendars.get_calendar_by_guild_and_channel(guild, channel)
-                calendar.send_pending_notifications(self._clock, notifier)
-                unit_of_work.calendars.add_calendar(calendar)
-                unit_of_work.commit()
-
-
-def run_bot(token: str, uow: CalendarUnitOfWork, clock: Clock, config: Config = Config()) -> None:
+        # Shared, so that its statistics cover the contention of every writer
+        self.retry = ConflictRetry()
+        self.coalescer = DeclarationCoalescer(uow, self.retry, config.declaration_window)
+        self.dispatcher = OutboxDispatcher(outbox, DiscordOutboxDelivery(bot, self.coalescer))
+        self.scheduler = NotificationScheduler(uow, clock, self.retry, on_commit=self.dispatcher.wake)
+
+    # Channels are known once the bot is connected; reconnecting does not start the scheduler again
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.dispatcher.start()
+        self.scheduler.start()
+
+
+def run_bot(token: str, uow: AsyncCalendarUnitOfWork, clock: Clock, outbox: AsyncOutbox,
+            config: Config = Config()) -> None:
     bot = CalendarBot()
-    cog = CalendarCog(bot, uow, clock)
+    cog = CalendarCog(bot, uow, clock, outbox, config)
+    parser = create_pooled_parser(config.language, config.parser_pool_kind, config.parser_pool_size,
+                                  config.parse_timeout, config.parse_cache_size, config.parse_batch_timeout)
 
     @bot.event
     async def on_ready():
@@ -56,26 +59,43 @@ def run_bot(token: str, uow: CalendarUnitOfWork, clock: Clock, config: Config =
 
     @events.subcommand('new', description=STRINGS[config.language][StringType.COMMAND_ADD_DESCRIPTION])
     async def add_event(interaction: nextcord.Interaction):
-        notifier = DiscordEventCreationNotifier(interaction, uow)
-        modal = EventModal(uow, notifier, clock, config.language)
+        modal = EventModal(uow, clock, config.language, parser, cog.scheduler, cog.dispatcher, cog.retry)
+        await interaction.response.send_modal(modal)
+
+    @events.subcommand('import', description=STRINGS[config.language][StringType.COMMAND_IMPORT_DESCRIPTION])
+    async def import_events(interaction: nextcord.Interaction):
+        modal = EventImportModal(uow, clock, config.language, parser, cog.scheduler, cog.retry)
         await interaction.response.send_modal(modal)
 
     @events.subcommand('list', description=STRINGS[config.language][StringType.COMMAND_LIST_DESCRIPTION])
     async def list_events(interaction: nextcord.Interaction):
-        with uow:
-            incoming_events = uow.calendars.get_incoming_events(interaction.guild.name, interaction.channel.name)
-            message = '\n'.join([format_event(event) for event in incoming_events])
-            await interaction.response.send_message(message)
+        async with uow:
+            incoming_events = await uow.calendars.get_incoming_events(interaction.guild.name,
+                                                                       interaction.channel.name)
+        message = '\n'.join([format_event(event) for event in incoming_events])
+        await interaction.response.send_message(message)
 
     @events.subcommand('remove', description=STRINGS[config.language][StringType.COMMAND_REMOVE_DESCRIPTION])
     async def remove_event(interaction: nextcord.Interaction, event_code: str = nextcord.SlashOption(name='code')):
-        with uow:
-            calendar = uow.calendars.get_calendar_by_guild_and_channel(interaction.guild.name, interaction.channel.name)
-            calendar.delete_event(interaction.user.mention, event_code)
-            uow.calendars.add_calendar(calendar)
-            uow.commit()
+        async def delete_event() -> Optional[datetime]:
+            async with uow:
+                calendar = await uow.calendars.get_calendar_by_guild_and_channel(interaction.guild.name,
+                                                                                 interaction.channel.name)
+                calendar.delete_event(interaction.user.mention, event_code)
+                next_due_at = calendar.next_due_at
+                uow.calendars.add_calendar(calendar)
+                await uow.commit()
+            return next_due_at
+
+        next_due_at = await cog.retry(delete_event)
+        cog.scheduler.schedule(interaction.guild.name, interaction.channel.name, next_due_at)
         message = STRINGS[config.language][StringType.EVENT_REMOVED_MESSAGE].format(event_code=event_code)
         await interaction.response.send_message(message)
 
     bot.add_cog(cog)
-    bot.run(token)
+    try:
+        bot.run(token)
+    finally:
+        cog.scheduler.shutdown()
+        cog.dispatcher.shutdown()
+        parser.shutdown()
@@ -0,0 +1,79 @@
+import asyncio
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from eventbot.domain import AsyncCalendarUnitOfWork, EventDeclaration, EventNotFound
+from eventbot.infrastructure.retry import ConflictRetry
+
+
+CalendarKey = Tuple[str, str]
+
+DEFAULT_WINDOW = 0.02
+
+
+class CoalescerStats(NamedTuple):
+    batches: int
+    declarations: int
+
+
+class PendingDeclaration(NamedTuple):
+    declaration: EventDeclaration
+    result: asyncio.Future
+
+
+# Collects declarations for the same calendar during a short window and applies them in one unit of work,
+# so that a burst of clicks does not serialize on the calendar row
+class DeclarationCoalescer:
+    def __init__(self, uow: AsyncCalendarUnitOfWork, retry: ConflictRetry, window: float = DEFAULT_WINDOW):
+        self._uow = uow
+        self._retry = retry
+        self._window = window
+        self._pending: Dict[CalendarKey, List[PendingDeclaration]] = {}
+        # The event loop keeps only weak references to tasks
+        self._flushes: Set[asyncio.Task] = set()
+        self._batches = 0
+        self._declarations = 0
+
+    # Resolves once the batch with the declaration is committed; an error of this declaration alone is raised
+    async def declare(self, guild_handle: str, channel_handle: str, declaration: EventDeclaration) -> None:
+        key = (guild_handle, channel_handle)
+        result = asyncio.get_running_loop().create_future()
+        if key not in self._pending:
+            self._pending[key] = []
+            flush = asyncio.get_running_loop().create_task(self._flush_later(key))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+        self._pending[key].append(PendingDeclaration(declaration, result))
+        await result
+
+    def stats(self) -> CoalescerStats:
+        return CoalescerStats(self._batches, self._declarations)
+
+    async def _flush_later(self, key: CalendarKey) -> None:
+        await asyncio.sleep(self._window)
+        pending = self._pending.pop(key)
+        declarations = [item.declaration for item in pending]
+        try:
+            errors = await self._retry(lambda: self._apply(key, declarations))
+        except Exception as e:
+            errors = [e] * len(pending)
+        for item, error in zip(pending, errors):
+            # The caller may have been cancelled while waiting, its declaration is applied all the same
+            if item.result.done():
+                continue
+            if error is not None:
+                item.result.set_exception(error)
+            else:
+                item.result.set_result(None)
+        self._batches += 1
+        self._declarations += len(pending)
+
+    async def _apply(self, key: CalendarKey, declarations: List[EventDeclaration]) -> List[Optional[Exception]]:
+        guild_handle, channel_handle = key
+        async with self._uow as unit_of_work:
+            if not await unit_of_work.calendars.does_calendar_exist(guild_handle, channel_handle):
+                return [EventNotFound(declaration.event_code) for declaration in declarations]
+            calendar = await unit_of_work.calendars.get_calendar_by_guild_and_channel(guild_handle, channel_handle)
+            errors = calendar.apply_declarations(declarations)
+            unit_of_work.calendars.add_calendar(calendar)
+            await unit_of_work.commit()
+        return errors
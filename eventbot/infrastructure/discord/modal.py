@@ -1,19 +1,41 @@
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple, Union
+
 import nextcord
 
-from eventbot.domain import CalendarUnitOfWork, Notifier, Clock, Calendar, CalendarLanguage
+from eventbot.domain import (
+    AsyncCalendarUnitOfWork,
+    Clock,
+    Calendar,
+    CalendarLanguage,
+    EventDraft,
+    EventInThePast,
+    ParsingError,
+    ReminderInThePast
+)
+from eventbot.infrastructure.discord.formatters import format_time
+from eventbot.infrastructure.outbox import OutboxDispatcher
 from eventbot.infrastructure.discord.strings import STRINGS, StringType
+from eventbot.infrastructure.parsing import PooledParser
+from eventbot.infrastructure.retry import ConflictRetry
+from eventbot.infrastructure.scheduler import NotificationScheduler
 
 
 class EventModal(nextcord.ui.Modal):
-    def __init__(self, uow: CalendarUnitOfWork, notifier: Notifier, clock: Clock, language: CalendarLanguage):
+    def __init__(self, uow: AsyncCalendarUnitOfWork, clock: Clock, language: CalendarLanguage,
+                 parser: PooledParser, scheduler: NotificationScheduler, dispatcher: OutboxDispatcher,
+                 retry: ConflictRetry):
         super().__init__(
             STRINGS[language][StringType.MODAL_TITLE],
             timeout=5 * 60,
         )
         self._uow = uow
-        self._notifier = notifier
         self._clock = clock
         self._language = language
+        self._parser = parser
+        self._scheduler = scheduler
+        self._dispatcher = dispatcher
+        self._retry = retry
 
         self.name = nextcord.ui.TextInput(
             label=STRINGS[language][StringType.MODAL_EVENT_NAME_LABEL],
@@ -46,11 +68,109 @@ class EventModal(nextcord.ui.Modal):
         channel = interaction.channel.name
         user = interaction.user.mention
         prompt = ' '.join([self.name.value, self.time_prompt.value, 'remind', self.reminder_prompt.value])
-        with self._uow as uow:
-            if not uow.calendars.does_calendar_exist(guild, channel):
+        # Parsed off the event loop and validated before the unit of work,
+        # so that an attempt retried on a conflict only repeats inserting the event
+        event_parsing_result = await self._parser.parse(prompt, self._clock.now())
+        event_draft = Calendar.prepare_event(event_parsing_result, user, self._clock)
+        next_due_at = await self._retry(lambda: self._add_event(guild, channel, event_draft))
+        self._scheduler.schedule(guild, channel, next_due_at)
+        self._dispatcher.wake()
+
+    async def _add_event(self, guild: str, channel: str, event_draft: EventDraft) -> Optional[datetime]:
+        async with self._uow as uow:
+            if not await uow.calendars.does_calendar_exist(guild, channel):
                 calendar = Calendar(guild, channel, language=self._language)
             else:
-                calendar = self._uow.calendars.get_calendar_by_guild_and_channel(guild, channel)
-            calendar.add_event(prompt, user, self._clock, uow.event_sequence_generator, self._notifier)
+                calendar = await uow.calendars.get_calendar_by_guild_and_channel(guild, channel)
+            await uow.event_sequence_generator.reserve(1)
+            calendar.add_event_draft(event_draft, uow.event_sequence_generator, uow.outbox(guild, channel))
+            next_due_at = calendar.next_due_at
             uow.calendars.add_calendar(calendar)
-            uow.commit()
+            await uow.commit()
+        return next_due_at
+
+
+class EventImportModal(nextcord.ui.Modal):
+    MAX_PROMPTS_LENGTH = 4000
+    MAX_MESSAGE_LENGTH = 2000
+
+    def __init__(self, uow: AsyncCalendarUnitOfWork, clock: Clock, language: CalendarLanguage, parser: PooledParser,
+                 scheduler: NotificationScheduler, retry: ConflictRetry):
+        super().__init__(
+            STRINGS[language][StringType.IMPORT_MODAL_TITLE],
+            timeout=5 * 60,
+        )
+        self._uow = uow
+        self._clock = clock
+        self._language = language
+        self._parser = parser
+        self._scheduler = scheduler
+        self._retry = retry
+
+        self.prompts = nextcord.ui.TextInput(
+            label=STRINGS[language][StringType.IMPORT_MODAL_PROMPTS_LABEL],
+            style=nextcord.TextInputStyle.paragraph,
+            placeholder=STRINGS[language][StringType.IMPORT_MODAL_PROMPTS_PLACEHOLDER],
+            required=True,
+            max_length=EventImportModal.MAX_PROMPTS_LENGTH,
+        )
+        self.add_item(self.prompts)
+
+    async def callback(self, interaction: nextcord.Interaction) -> None:
+        guild = interaction.guild.name
+        channel = interaction.channel.name
+        user = interaction.user.mention
+        prompts = [line.strip() for line in self.prompts.value.splitlines() if line.strip()]
+        # Parsing and committing a batch may take longer than Discord waits for the response to an interaction
+        await interaction.response.defer()
+        event_parsing_results = await self._parser.parse_batch_async(prompts, self._clock.now())
+        event_drafts = Calendar.prepare_events(event_parsing_results, user, self._clock)
+        results, next_due_at = await self._retry(lambda: self._add_events(guild, channel, event_drafts))
+        self._scheduler.schedule(guild, channel, next_due_at)
+        await interaction.followup.send(self._format_summary(prompts, event_drafts, results))
+
+    async def _add_events(self, guild: str, channel: str, event_drafts: Sequence[Union[EventDraft, Exception]]
+                          ) -> Tuple[List[Union[str, Exception]], Optional[datetime]]:
+        async with self._uow as uow:
+            if not await uow.calendars.does_calendar_exist(guild, channel):
+                calendar = Calendar(guild, channel, language=self._language)
+            else:
+                calendar = await uow.calendars.get_calendar_by_guild_and_channel(guild, channel)
+            await uow.event_sequence_generator.reserve(sum(1 for event_draft in event_drafts
+                                                           if isinstance(event_draft, EventDraft)))
+            results = calendar.add_events(event_drafts, uow.event_sequence_generator)
+            next_due_at = calendar.next_due_at
+            if any(isinstance(result, str) for result in results):
+                uow.calendars.add_calendar(calendar)
+                await uow.commit()
+        return results, next_due_at
+
+    def _format_summary(self,
+                        prompts: Sequence[str],
+                        event_drafts: Sequence[Union[EventDraft, Exception]],
+                        results: Sequence[Union[str, Exception]]) -> str:
+        strings = STRINGS[self._language]
+        lines: List[str] = []
+        for line, (prompt, event_draft, result) in enumerate(zip(prompts, event_drafts, results), start=1):
+            if isinstance(result, Exception):
+                reason = strings[self._describe_error(result)]
+                lines.append(strings[StringType.IMPORT_LINE_FAILED].format(line=line, prompt=prompt, reason=reason))
+            else:
+                lines.append(strings[StringType.IMPORT_LINE_ADDED].format(
+                    line=line, event_name=event_draft.name, event_code=result, time=format_time(event_draft.time)))
+        added = sum(1 for result in results if not isinstance(result, Exception))
+        message = strings[StringType.IMPORT_SUMMARY_MESSAGE].format(added=added, total=len(prompts),
+                                                                    lines='\n'.join(lines))
+        if len(message) > EventImportModal.MAX_MESSAGE_LENGTH:
+            message = message[:EventImportModal.MAX_MESSAGE_LENGTH - 1] + '…'
+        return message
+
+    @staticmethod
+    def _describe_error(error: Exception) -> StringType:
+        if isinstance(error, ParsingError):
+            return StringType.ERROR_PARSING
+        if isinstance(error, EventInThePast):
+            return StringType.ERROR_EVENT_IN_THE_PAST
+        if isinstance(error, ReminderInThePast):
+            return StringType.ERROR_REMINDER_IN_THE_PAST
+        return StringType.ERROR_INVALID_EVENT
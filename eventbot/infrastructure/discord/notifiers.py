@@ -1,61 +1,61 @@
-import asyncio
 from datetime import datetime
-from typing import List, Optional
+from typing import Optional
 
 import nextcord
 
-from eventbot.domain import Notifier, CalendarUnitOfWork
+from eventbot.domain.enums import NotificationKind
 from eventbot.infrastructure.config import Config
+from eventbot.infrastructure.discord.coalescer import DeclarationCoalescer
 from eventbot.infrastructure.discord.formatters import format_time
 from eventbot.infrastructure.discord.menu import EventMenu
 from eventbot.infrastructure.discord.strings import StringType, STRINGS
+from eventbot.infrastructure.persistence.outbox import OutboxMessage, deserialize_time
 
 
-class DiscordEventCreationNotifier(Notifier):
-    def __init__(self, interaction: nextcord.Interaction, uow: CalendarUnitOfWork, config: Config = Config()):
-        self._language = config.language
-        self._interaction = interaction
-        self._uow = uow
-
-    def notify_event_start(self, event_name: str, event_code: str, user_handles: List[str]) -> None:
-        raise NotImplemented
+class ChannelNotFound(Exception):
+    def __init__(self, guild_handle: str, channel_handle: str):
+        super().__init__(f'{guild_handle}/{channel_handle}')
 
-    def notify_reminder(self, event_name: str, event_code: str, start_time: datetime, user_handles: List[str]) -> None:
-        raise NotImplemented
 
-    def notify_event_created(self, event_name: str, event_code: str, time: datetime, owner: str,
-                             reminder_time: Optional[datetime] = None) -> None:
+# Sends the notifications drained from the outbox to the channels of their calendars
+class DiscordOutboxDelivery:
+    def __init__(self, bot: nextcord.Client, coalescer: DeclarationCoalescer, config: Config = Config()):
+        self._language = config.language
+        self._bot = bot
+        self._coalescer = coalescer
+
+    async def __call__(self, message: OutboxMessage) -> None:
+        channel = self._find_channel(message.guild_handle, message.channel_handle)
+        if channel is None:
+            raise ChannelNotFound(message.guild_handle, message.channel_handle)
+        payload = message.payload
+        if message.kind == NotificationKind.EVENT_CREATED:
+            await self._send_event_created(channel, payload['event_name'], payload['event_code'],
+                                           deserialize_time(payload['time']), payload['owner'],
+                                           deserialize_time(payload['reminder_time']))
+        elif message.kind == NotificationKind.REMINDER:
+            message_template = STRINGS[self._language][StringType.EVENT_REMINDER_MESSAGE]
+            await channel.send(message_template.format(event_name=payload['event_name'],
+                                                       event_code=payload['event_code'],
+                                                       time=format_time(deserialize_time(payload['start_time'])),
+                                                       handles=' '.join(payload['user_handles'])))
+        elif message.kind == NotificationKind.EVENT_START:
+            message_template = STRINGS[self._language][StringType.EVENT_START_MESSAGE]
+            await channel.send(message_template.format(event_name=payload['event_name'],
+                                                       event_code=payload['event_code'],
+                                                       handles=' '.join(payload['user_handles'])))
+
+    async def _send_event_created(self, channel: nextcord.TextChannel, event_name: str, event_code: str,
+                                  time: datetime, owner: str, reminder_time: Optional[datetime]) -> None:
         message_template = STRINGS[self._language][StringType.EVENT_CREATED_MESSAGE]
         if not reminder_time:
             reminder_time = time
         message = message_template.format(owner=owner, event_name=event_name,
                                           event_code=event_code, time=format_time(time),
                                           reminder_time=format_time(reminder_time))
-        loop = asyncio.get_running_loop()
-        menu = EventMenu(message, event_code, event_name, self._uow)
-        loop.create_task(menu.prompt(self._interaction))
+        menu = EventMenu(message, event_code, event_name, self._coalescer)
+        await menu.send_initial_message(None, channel)
 
-
-class DiscordEventLifecycleNotifier(Notifier):
-    def __init__(self, channel: nextcord.TextChannel, config: Config = Config()):
-        self._language = config.language
-        self._channel = channel
-
-    def notify_event_start(self, event_name: str, event_code: str, user_handles: List[str]) -> None:
-        handles = ' '.join(user_handles)
-        message_template = STRINGS[self._language][StringType.EVENT_START_MESSAGE]
-        message = message_template.format(event_name=event_name, event_code=event_code, handles=handles)
-        loop = asyncio.get_running_loop()
-        loop.create_task(self._channel.send(message))
-
-    def notify_reminder(self, event_name: str, event_code: str, start_time: datetime, user_handles: List[str]) -> None:
-        handles = ' '.join(user_handles)
-        message_template = STRINGS[self._language][StringType.EVENT_REMINDER_MESSAGE]
-        message = message_template.format(event_name=event_name, event_code=event_code,
-                                          time=format_time(start_time), handles=handles)
-        loop = asyncio.get_running_loop()
-        loop.create_task(self._channel.send(message))
-
-    def notify_event_created(self, event_name: str, event_code: str, time: datetime, owner: str,
-                             reminder_time: Optional[datetime] = None) -> None:
-        raise NotImplemented
+    def _find_channel(self, guild_handle: str, channel_handle: str) -> Optional[nextcord.TextChannel]:
+        return nextcord.utils.find(lambda channel: channel.guild.name == guild_handle and channel.name == channel_handle,
+                                   self._bot.get_all_channels())
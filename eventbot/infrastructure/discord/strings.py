@@ -23,6 +23,17 @@ class StringType(Enum):
     DECISION_YES_MESSAGE = 'decision_yes_message'
     DECISION_NO_MESSAGE = 'decision_no_message'
     DECISION_MAYBE_MESSAGE = 'decision_maybe_message'
+    COMMAND_IMPORT_DESCRIPTION = 'command_import_description'
+    IMPORT_MODAL_TITLE = 'import_modal_title'
+    IMPORT_MODAL_PROMPTS_LABEL = 'import_modal_prompts_label'
+    IMPORT_MODAL_PROMPTS_PLACEHOLDER = 'import_modal_prompts_placeholder'
+    IMPORT_SUMMARY_MESSAGE = 'import_summary_message'
+    IMPORT_LINE_ADDED = 'import_line_added'
+    IMPORT_LINE_FAILED = 'import_line_failed'
+    ERROR_PARSING = 'error_parsing'
+    ERROR_EVENT_IN_THE_PAST = 'error_event_in_the_past'
+    ERROR_REMINDER_IN_THE_PAST = 'error_reminder_in_the_past'
+    ERROR_INVALID_EVENT = 'error_invalid_event'
 
 
 STRINGS = {
@@ -53,6 +64,18 @@ STRINGS = {
         StringType.DECISION_YES_MESSAGE: '{user} weźmie udział!',
         StringType.DECISION_NO_MESSAGE: '{user} nie wieźmie udziału :(',
         StringType.DECISION_MAYBE_MESSAGE: '{user} jeszcze się zastanawia...',
+        StringType.COMMAND_IMPORT_DESCRIPTION: 'Dodaj wiele wydarzeń naraz, po jednym w każdej linii',
+        StringType.IMPORT_MODAL_TITLE: 'Nowe wydarzenia',
+        StringType.IMPORT_MODAL_PROMPTS_LABEL: 'Wydarzenia (jedno w każdej linii)',
+        StringType.IMPORT_MODAL_PROMPTS_PLACEHOLDER: 'np.: Liga, 5 października o 20, przypomnij godzinę wcześniej\n'
+                                                     'Liga, 12 października o 20',
+        StringType.IMPORT_SUMMARY_MESSAGE: 'Dodano wydarzenia: {added} z {total}\n{lines}',
+        StringType.IMPORT_LINE_ADDED: '{line}. {event_name} ({event_code}): {time}',
+        StringType.IMPORT_LINE_FAILED: '{line}. Nie dodano "{prompt}": {reason}',
+        StringType.ERROR_PARSING: 'nie rozpoznano terminu',
+        StringType.ERROR_EVENT_IN_THE_PAST: 'termin już minął',
+        StringType.ERROR_REMINDER_IN_THE_PAST: 'czas przypomnienia już minął',
+        StringType.ERROR_INVALID_EVENT: 'nieprawidłowa nazwa wydarzenia',
 
     }
 }
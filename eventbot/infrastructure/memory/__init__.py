@@ -0,0 +1,19 @@
+from .store import InMemoryCalendarStore
+from .uow import InMemoryCalendarUnitOfWork, AsyncInMemoryCalendarUnitOfWork
+from .repositories import InMemoryCalendarRepository, AsyncInMemoryCalendarRepository
+from .sequence_generator import InMemoryEventSequenceGenerator, AsyncInMemoryEventSequenceGenerator
+from .outbox import InMemoryOutbox, AsyncInMemoryOutbox, InMemoryOutboxNotifier
+
+
+__all__ = [
+    'InMemoryCalendarStore',
+    'InMemoryCalendarUnitOfWork',
+    'AsyncInMemoryCalendarUnitOfWork',
+    'InMemoryCalendarRepository',
+    'AsyncInMemoryCalendarRepository',
+    'InMemoryEventSequenceGenerator',
+    'AsyncInMemoryEventSequenceGenerator',
+    'InMemoryOutbox',
+    'AsyncInMemoryOutbox',
+    'InMemoryOutboxNotifier'
+]
@@ -0,0 +1,43 @@
+from datetime import timedelta
+from typing import Any, Dict, List, Sequence
+
+from eventbot.domain.enums import NotificationKind
+from eventbot.infrastructure.memory.store import InMemoryCalendarStore, PendingNotification
+from eventbot.infrastructure.persistence.outbox import Outbox, AsyncOutbox, OutboxMessage, OutboxNotifier
+
+
+class InMemoryOutboxNotifier(OutboxNotifier):
+    def __init__(self, pending: List[PendingNotification], guild_handle: str, channel_handle: str):
+        super().__init__(guild_handle, channel_handle)
+        self._pending = pending
+
+    def _record(self, kind: NotificationKind, event_code: str, payload: Dict[str, Any]) -> None:
+        self._pending.append(PendingNotification(kind, event_code, self._guild_handle, self._channel_handle, payload))
+
+
+class InMemoryOutbox(Outbox):
+    def __init__(self, store: InMemoryCalendarStore):
+        self._store = store
+
+    def claim(self, limit: int, lease: timedelta, max_attempts: int) -> List[OutboxMessage]:
+        return self._store.claim_outbox(limit, lease, max_attempts)
+
+    def mark_delivered(self, message_ids: Sequence[int]) -> None:
+        self._store.mark_outbox_delivered(message_ids)
+
+    def mark_failed(self, message_id: int, error: str, retry_in: timedelta) -> None:
+        self._store.mark_outbox_failed(message_id, error, retry_in)
+
+
+class AsyncInMemoryOutbox(AsyncOutbox):
+    def __init__(self, store: InMemoryCalendarStore):
+        self._outbox = InMemoryOutbox(store)
+
+    async def claim(self, limit: int, lease: timedelta, max_attempts: int) -> List[OutboxMessage]:
+        return self._outbox.claim(limit, lease, max_attempts)
+
+    async def mark_delivered(self, message_ids: Sequence[int]) -> None:
+        self._outbox.mark_delivered(message_ids)
+
+    async def mark_failed(self, message_id: int, error: str, retry_in: timedelta) -> None:
+        self._outbox.mark_failed(message_id, error, retry_in)
@@ -0,0 +1,77 @@
+from typing import Dict, List, Optional
+
+from eventbot.domain import Calendar, CalendarRepository, AsyncCalendarRepository, EventReadModel,\
+    CalendarScheduleReadModel
+from eventbot.infrastructure.memory.store import CalendarKey, InMemoryCalendarStore
+
+
+class InMemoryCalendarRepository(CalendarRepository):
+    def __init__(self, store: InMemoryCalendarStore):
+        self._store = store
+        # Calendars of the unit of work, with the version each one had when it was loaded
+        self._calendars: Dict[CalendarKey, Calendar] = {}
+        self._loaded_versions: Dict[CalendarKey, Optional[int]] = {}
+
+    @property
+    def calendars(self) -> Dict[CalendarKey, Calendar]:
+        return self._calendars
+
+    @property
+    def loaded_versions(self) -> Dict[CalendarKey, Optional[int]]:
+        return self._loaded_versions
+
+    def does_calendar_exist(self, guild_handle: str, channel_handle: str) -> bool:
+        key = (guild_handle, channel_handle)
+        return key in self._calendars or self._store.has_calendar(key)
+
+    def get_calendar_by_guild_and_channel(self, guild_handle: str, channel_handle: str) -> Calendar:
+        key = (guild_handle, channel_handle)
+        if key not in self._calendars:
+            calendar = self._store.load_calendar(key)
+            if calendar is None:
+                raise KeyError(f'No calendar for {guild_handle}/{channel_handle}')
+            self._calendars[key] = calendar
+            self._loaded_versions[key] = calendar._version
+        return self._calendars[key]
+
+    def add_calendar(self, calendar: Calendar) -> None:
+        key = (calendar._guild_handle, calendar._channel_handle)
+        if self._calendars.get(key) is not calendar:
+            self._calendars[key] = calendar
+            self._loaded_versions[key] = None
+
+    def get_incoming_events(self, guild_handle: str, channel_handle: str) -> List[EventReadModel]:
+        return self._store.get_incoming_events((guild_handle, channel_handle))
+
+    def get_notification_schedule(self) -> List[CalendarScheduleReadModel]:
+        return self._store.get_notification_schedule()
+
+    # Calendars stay in the unit of work after a commit, later changes are checked against the committed versions
+    def mark_committed(self) -> None:
+        for key, calendar in self._calendars.items():
+            self._loaded_versions[key] = calendar._version
+
+    def clear(self) -> None:
+        self._calendars.clear()
+        self._loaded_versions.clear()
+
+
+# The store does no I/O, the methods only await to fit the asynchronous unit of work
+class AsyncInMemoryCalendarRepository(AsyncCalendarRepository):
+    def __init__(self, repository: InMemoryCalendarRepository):
+        self._repository = repository
+
+    async def does_calendar_exist(self, guild_handle: str, channel_handle: str) -> bool:
+        return self._repository.does_calendar_exist(guild_handle, channel_handle)
+
+    async def get_calendar_by_guild_and_channel(self, guild_handle: str, channel_handle: str) -> Calendar:
+        return self._repository.get_calendar_by_guild_and_channel(guild_handle, channel_handle)
+
+    def add_calendar(self, calendar: Calendar) -> None:
+        self._repository.add_calendar(calendar)
+
+    async def get_incoming_events(self, guild_handle: str, channel_handle: str) -> List[EventReadModel]:
+        return self._repository.get_incoming_events(guild_handle, channel_handle)
+
+    async def get_notification_schedule(self) -> List[CalendarScheduleReadModel]:
+        return self._repository.get_notification_schedule()
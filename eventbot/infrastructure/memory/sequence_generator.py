@@ -0,0 +1,23 @@
+from typing import Generator, List
+
+from eventbot.domain import EventSequenceGenerator, AsyncEventSequenceGenerator
+from eventbot.infrastructure.memory.store import InMemoryCalendarStore
+
+
+class InMemoryEventSequenceGenerator(EventSequenceGenerator):
+    def __init__(self, store: InMemoryCalendarStore):
+        self._store = store
+
+    def __call__(self) -> Generator[int, None, None]:
+        yield from self.take(1)
+
+    def take(self, count: int) -> List[int]:
+        if count <= 0:
+            return []
+        return self._store.take_sequence_values(count)
+
+
+class AsyncInMemoryEventSequenceGenerator(InMemoryEventSequenceGenerator, AsyncEventSequenceGenerator):
+    # Values are taken from the store as they are needed
+    async def reserve(self, count: int) -> None:
+        pass
@@ -0,0 +1,157 @@
+import os
+import pickle
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from threading import RLock
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from eventbot.domain import Calendar, CalendarModifiedConcurrently, EventReadModel, CalendarScheduleReadModel
+from eventbot.domain.enums import NotificationKind
+from eventbot.infrastructure.persistence.outbox import OutboxMessage, make_idempotency_key
+
+
+CalendarKey = Tuple[str, str]
+
+
+@dataclass
+class OutboxRecord:
+    id: int
+    idempotency_key: str
+    kind: NotificationKind
+    guild_handle: str
+    channel_handle: str
+    payload: Dict[str, Any]
+    attempts: int = 0
+    next_attempt_at: datetime = datetime.min
+    delivered_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class PendingNotification:
+    kind: NotificationKind
+    event_code: str
+    guild_handle: str
+    channel_handle: str
+    payload: Dict[str, Any]
+
+
+# Committed state of in-memory units of work. Calendars are kept pickled: a unit of work gets its own copy
+# of a calendar when loading it, and a copy is taken again on commit, so uncommitted changes never leak.
+# With a snapshot path, the state is loaded from the file at start and written back to it on every commit
+class InMemoryCalendarStore:
+    def __init__(self, snapshot_path: Optional[str] = None):
+        self._snapshot_path = snapshot_path
+        self._lock = RLock()
+        self._calendars: Dict[CalendarKey, bytes] = {}
+        self._versions: Dict[CalendarKey, int] = {}
+        self._sequence_value = 0
+        self._outbox: Dict[str, OutboxRecord] = {}
+        self._outbox_ids: Dict[int, str] = {}
+        if snapshot_path is not None and os.path.exists(snapshot_path):
+            self._load_snapshot()
+
+    def has_calendar(self, key: CalendarKey) -> bool:
+        return key in self._calendars
+
+    def load_calendar(self, key: CalendarKey) -> Optional[Calendar]:
+        with self._lock:
+            data = self._calendars.get(key)
+        if data is None:
+            return None
+        calendar = pickle.loads(data)
+        # Removed events are left out when a calendar is loaded, as with the SQL repository.
+        # The mapped collection is changed in place, replacing an unpickled one is not supported
+        for code in [code for code, event in calendar._events.items() if event._removed]:
+            del calendar._events[code]
+        return calendar
+
+    # Calendars changed since they were loaded are written unless someone else committed them in between.
+    # Nothing is written if any of them conflicts
+    def commit(self,
+               calendars: Mapping[CalendarKey, Calendar],
+               loaded_versions: Mapping[CalendarKey, Optional[int]],
+               notifications: Sequence[PendingNotification]) -> None:
+        changed = {key: calendar for key, calendar in calendars.items()
+                   if calendar._version != loaded_versions.get(key)}
+        with self._lock:
+            for key in changed:
+                if self._versions.get(key) != loaded_versions.get(key):
+                    raise CalendarModifiedConcurrently()
+            for key, calendar in changed.items():
+                self._calendars[key] = pickle.dumps(calendar, protocol=pickle.HIGHEST_PROTOCOL)
+                self._versions[key] = calendar._version
+            for notification in notifications:
+                self._add_to_outbox(notification)
+            if self._snapshot_path is not None:
+                self._store_snapshot()
+
+    # Sequence values are not transactional, a value taken by a unit of work rolled back is not reused
+    def take_sequence_values(self, count: int) -> List[int]:
+        with self._lock:
+            values = list(range(self._sequence_value + 1, self._sequence_value + count + 1))
+            self._sequence_value += count
+            return values
+
+    def get_incoming_events(self, key: CalendarKey) -> List[EventReadModel]:
+        calendar = self.load_calendar(key)
+        if calendar is None:
+            return []
+        return [EventReadModel(event._name, event._code, event._time, event._remind_at)
+                for event in calendar._events.values()]
+
+    def get_notification_schedule(self) -> List[CalendarScheduleReadModel]:
+        with self._lock:
+            keys = list(self._calendars)
+        schedule = []
+        for guild_handle, channel_handle in keys:
+            due_at = self.load_calendar((guild_handle, channel_handle)).next_due_at
+            if due_at is not None:
+                schedule.append(CalendarScheduleReadModel(guild_handle, channel_handle, due_at))
+        return schedule
+
+    def claim_outbox(self, limit: int, lease: timedelta, max_attempts: int) -> List[OutboxMessage]:
+        now = datetime.now()
+        with self._lock:
+            claimable = [record for record in self._outbox.values()
+                         if record.delivered_at is None and record.next_attempt_at <= now
+                         and record.attempts < max_attempts][:limit]
+            for record in claimable:
+                record.attempts += 1
+                record.next_attempt_at = now + lease
+            return [OutboxMessage(record.id, record.idempotency_key, record.kind, record.guild_handle,
+                                  record.channel_handle, record.payload, record.attempts) for record in claimable]
+
+    def mark_outbox_delivered(self, message_ids: Sequence[int]) -> None:
+        with self._lock:
+            for message_id in message_ids:
+                record = self._outbox[self._outbox_ids[message_id]]
+                record.delivered_at = datetime.now()
+                record.last_error = None
+
+    def mark_outbox_failed(self, message_id: int, error: str, retry_in: timedelta) -> None:
+        with self._lock:
+            record = self._outbox[self._outbox_ids[message_id]]
+            record.next_attempt_at = datetime.now() + retry_in
+            record.last_error = error
+
+    def _add_to_outbox(self, notification: PendingNotification) -> None:
+        idempotency_key = make_idempotency_key(notification.kind, notification.event_code)
+        if idempotency_key in self._outbox:
+            return
+        record = OutboxRecord(len(self._outbox) + 1, idempotency_key, notification.kind,
+                              notification.guild_handle, notification.channel_handle, notification.payload)
+        self._outbox[idempotency_key] = record
+        self._outbox_ids[record.id] = idempotency_key
+
+    def _load_snapshot(self) -> None:
+        with open(self._snapshot_path, 'rb') as file:
+            self._calendars, self._versions, self._sequence_value, self._outbox = pickle.load(file)
+        self._outbox_ids = {record.id: idempotency_key for idempotency_key, record in self._outbox.items()}
+
+    def _store_snapshot(self) -> None:
+        temporary_path = f'{self._snapshot_path}.{os.getpid()}.tmp'
+        with open(temporary_path, 'wb') as file:
+            pickle.dump((self._calendars, self._versions, self._sequence_value, self._outbox), file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, self._snapshot_path)
@@ -0,0 +1,104 @@
+from contextvars import ContextVar
+from typing import List, Optional
+
+from eventbot.domain import CalendarUnitOfWork, AsyncCalendarUnitOfWork
+from eventbot.infrastructure.memory.outbox import InMemoryOutboxNotifier
+from eventbot.infrastructure.memory.repositories import InMemoryCalendarRepository, AsyncInMemoryCalendarRepository
+from eventbot.infrastructure.memory.sequence_generator import InMemoryEventSequenceGenerator,\
+    AsyncInMemoryEventSequenceGenerator
+from eventbot.infrastructure.memory.store import InMemoryCalendarStore, PendingNotification
+
+
+# Calendars are copies of the committed ones, changes reach the store on commit and are dropped on rollback.
+# As with the SQL unit of work, a calendar committed by someone else since it was loaded fails the commit
+class InMemoryCalendarUnitOfWork(CalendarUnitOfWork):
+    def __init__(self, store: InMemoryCalendarStore):
+        self._store = store
+        self._calendars: Optional[InMemoryCalendarRepository] = None
+        self._event_sequence_generator: Optional[InMemoryEventSequenceGenerator] = None
+        self._notifications: List[PendingNotification] = []
+
+    @property
+    def calendars(self) -> InMemoryCalendarRepository:
+        if self._calendars is not None:
+            return self._calendars
+        raise Exception('Attempt to use repository outside unit of work')
+
+    @property
+    def event_sequence_generator(self) -> InMemoryEventSequenceGenerator:
+        if self._event_sequence_generator is not None:
+            return self._event_sequence_generator
+        raise Exception('Attempt to use sequence generator outside unit of work')
+
+    def __enter__(self) -> 'CalendarUnitOfWork':
+        self._calendars = InMemoryCalendarRepository(self._store)
+        self._event_sequence_generator = InMemoryEventSequenceGenerator(self._store)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.rollback()
+        self._calendars = None
+        self._event_sequence_generator = None
+
+    def outbox(self, guild_handle: str, channel_handle: str) -> InMemoryOutboxNotifier:
+        if self._calendars is not None:
+            return InMemoryOutboxNotifier(self._notifications, guild_handle, channel_handle)
+        raise Exception('Attempt to use outbox outside unit of work')
+
+    def commit(self) -> None:
+        try:
+            self._store.commit(self._calendars.calendars, self._calendars.loaded_versions, self._notifications)
+        except Exception:
+            self.rollback()
+            raise
+        self._calendars.mark_committed()
+        self._notifications.clear()
+
+    def rollback(self) -> None:
+        if self._calendars is not None:
+            self._calendars.clear()
+        self._notifications.clear()
+
+
+# Runs a unit of work of its own for every task that enters it, as with the SQL one
+class AsyncInMemoryCalendarUnitOfWork(AsyncCalendarUnitOfWork):
+    def __init__(self, store: InMemoryCalendarStore):
+        self._store = store
+        self._unit_of_work: ContextVar[Optional[InMemoryCalendarUnitOfWork]] = \
+            ContextVar('in_memory_unit_of_work', default=None)
+
+    @property
+    def calendars(self) -> AsyncInMemoryCalendarRepository:
+        return AsyncInMemoryCalendarRepository(self._get_unit_of_work().calendars)
+
+    @property
+    def event_sequence_generator(self) -> AsyncInMemoryEventSequenceGenerator:
+        self._get_unit_of_work()
+        return AsyncInMemoryEventSequenceGenerator(self._store)
+
+    async def __aenter__(self) -> 'AsyncCalendarUnitOfWork':
+        unit_of_work = InMemoryCalendarUnitOfWork(self._store)
+        unit_of_work.__enter__()
+        self._unit_of_work.set(unit_of_work)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        try:
+            self._get_unit_of_work().__exit__(exc_type, exc_val, exc_tb)
+        finally:
+            self._unit_of_work.set(None)
+
+    def outbox(self, guild_handle: str, channel_handle: str) -> InMemoryOutboxNotifier:
+        return self._get_unit_of_work().outbox(guild_handle, channel_handle)
+
+    async def commit(self) -> None:
+        self._get_unit_of_work().commit()
+
+    async def rollback(self) -> None:
+        self._get_unit_of_work().rollback()
+
+    def _get_unit_of_work(self) -> InMemoryCalendarUnitOfWork:
+        unit_of_work = self._unit_of_work.get()
+        if unit_of_work is not None:
+            return unit_of_work
+        raise Exception('Attempt to use unit of work outside of it')
@@ -0,0 +1,102 @@
+import asyncio
+import traceback
+from datetime import timedelta
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+from eventbot.infrastructure.persistence.outbox import AsyncOutbox, OutboxMessage
+
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_DELAY = timedelta(seconds=5)
+DEFAULT_POLL_INTERVAL = 10.0
+# Long enough for a batch to be delivered, a row claimed by a dispatcher that died is retried after it
+CLAIM_LEASE = timedelta(minutes=1)
+
+
+class OutboxStats(NamedTuple):
+    delivered: int
+    retried: int
+    # Messages that failed on the last allowed attempt and are not retried anymore
+    dead: int
+    last_batch_size: int
+
+
+# Delivers the messages committed to the outbox. A message is delivered at least once:
+# a crash after sending and before marking it as delivered sends it again
+class OutboxDispatcher:
+    def __init__(self,
+                 outbox: AsyncOutbox,
+                 deliver: Callable[[OutboxMessage], Awaitable[None]],
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 retry_delay: timedelta = DEFAULT_RETRY_DELAY,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self._outbox = outbox
+        self._deliver = deliver
+        self._batch_size = batch_size
+        self._max_attempts = max_attempts
+        self._retry_delay = retry_delay
+        self._poll_interval = poll_interval
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._delivered = 0
+        self._retried = 0
+        self._dead = 0
+        self._last_batch_size = 0
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    # Called after a unit of work that recorded notifications is committed; the poll interval covers the rest
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                while await self.drain() == self._batch_size:
+                    pass
+            except Exception:
+                traceback.print_exc()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    # Delivers one batch, returns the number of messages claimed
+    async def drain(self) -> int:
+        messages = await self._outbox.claim(self._batch_size, CLAIM_LEASE, self._max_attempts)
+        delivered_ids = []
+        for message in messages:
+            try:
+                await self._deliver(message)
+            except Exception as e:
+                await self._on_failed(message, e)
+            else:
+                delivered_ids.append(message.id)
+        await self._outbox.mark_delivered(delivered_ids)
+        self._delivered += len(delivered_ids)
+        self._last_batch_size = len(messages)
+        return len(messages)
+
+    def stats(self) -> OutboxStats:
+        return OutboxStats(self._delivered, self._retried, self._dead, self._last_batch_size)
+
+    def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    # Backs off exponentially; the outbox stops claiming a message after its last allowed attempt
+    async def _on_failed(self, message: OutboxMessage, error: Exception) -> None:
+        if message.attempts >= self._max_attempts:
+            self._dead += 1
+        else:
+            self._retried += 1
+        retry_in = self._retry_delay * 2 ** (message.attempts - 1)
+        await self._outbox.mark_failed(message.id, f'{type(error).__name__}: {error}', retry_in)
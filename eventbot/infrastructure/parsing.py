@@ -0,0 +1,129 @@
+import asyncio
+import concurrent.futures
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from threading import Lock
+from typing import List, NamedTuple, Optional, Sequence, Union
+
+from eventbot.domain import CalendarLanguage, ParsingTimeout, get_parser, configure_parse_cache
+from eventbot.domain.dto import EventParsingResult
+from eventbot.domain.services.parser import Parser
+
+
+POOL_KINDS = ('thread', 'process')
+# A batch gets a fixed timeout, whatever its size, so that the reply to an import is not held up for long
+DEFAULT_BATCH_TIMEOUT = 10.0
+
+
+class ParserPoolStats(NamedTuple):
+    # Parses submitted and not finished yet, both running and waiting for a worker
+    queue_depth: int
+    workers: int
+    timeouts: int
+
+    @property
+    def saturated(self) -> bool:
+        return self.queue_depth > self.workers
+
+
+# Module level, so that process pools can pickle it; each worker process loads the parser itself
+def parse_in_worker(language: CalendarLanguage, text: str, now: datetime) -> EventParsingResult:
+    return get_parser(language)(text, now)
+
+
+def parse_batch_in_worker(language: CalendarLanguage, texts: Sequence[str],
+                          now: datetime) -> List[Union[EventParsingResult, Exception]]:
+    return get_parser(language).parse_batch(texts, now)
+
+
+class PooledParser(Parser):
+    def __init__(self, language: CalendarLanguage, executor: Optional[Executor], workers: int, timeout: float,
+                 batch_timeout: float = DEFAULT_BATCH_TIMEOUT):
+        self._language: CalendarLanguage = language
+        self._executor: Optional[Executor] = executor
+        self._workers: int = workers
+        self._timeout: float = timeout
+        self._batch_timeout: float = batch_timeout
+        self._queue_depth = 0
+        self._timeouts = 0
+        self._lock = Lock()
+
+    def __call__(self, text: str, now: datetime) -> EventParsingResult:
+        if self._executor is None:
+            return parse_in_worker(self._language, text, now)
+        return self._wait(self._submit(parse_in_worker, text, now), text, self._timeout)
+
+    async def parse(self, text: str, now: datetime) -> EventParsingResult:
+        if self._executor is None:
+            return parse_in_worker(self._language, text, now)
+        return await self._wait_async(self._submit(parse_in_worker, text, now), text, self._timeout)
+
+    # A batch is parsed by a single worker
+    def parse_batch(self, texts: Sequence[str], now: datetime) -> List[Union[EventParsingResult, Exception]]:
+        if self._executor is None:
+            return parse_batch_in_worker(self._language, texts, now)
+        future = self._submit(parse_batch_in_worker, texts, now)
+        return self._wait(future, '\n'.join(texts), self._batch_timeout)
+
+    async def parse_batch_async(self, texts: Sequence[str],
+                                now: datetime) -> List[Union[EventParsingResult, Exception]]:
+        if self._executor is None:
+            return parse_batch_in_worker(self._language, texts, now)
+        future = self._submit(parse_batch_in_worker, texts, now)
+        return await self._wait_async(future, '\n'.join(texts), self._batch_timeout)
+
+    def stats(self) -> ParserPoolStats:
+        with self._lock:
+            return ParserPoolStats(self._queue_depth, self._workers, self._timeouts)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, parse, text: Union[str, Sequence[str]], now: datetime) -> Future:
+        with self._lock:
+            self._queue_depth += 1
+        future = self._executor.submit(parse, self._language, text, now)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _wait(self, future: Future, text: str, timeout: float):
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            raise self._timed_out(future, text, timeout)
+
+    async def _wait_async(self, future: Future, text: str, timeout: float):
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(future, text, timeout)
+
+    def _on_done(self, _: Future) -> None:
+        with self._lock:
+            self._queue_depth -= 1
+
+    # A parse that has not started yet is dropped, a running one cannot be interrupted and finishes in the background
+    def _timed_out(self, future: Future, text: str, timeout: float) -> ParsingTimeout:
+        future.cancel()
+        with self._lock:
+            self._timeouts += 1
+        return ParsingTimeout(text, timeout)
+
+
+def create_pooled_parser(language: CalendarLanguage,
+                         kind: str,
+                         workers: int,
+                         timeout: float,
+                         parse_cache_size: int,
+                         batch_timeout: float = DEFAULT_BATCH_TIMEOUT) -> PooledParser:
+    if kind not in POOL_KINDS:
+        raise ValueError(f'Unknown parser pool kind: {kind}')
+    if workers <= 0:
+        return PooledParser(language, None, 0, timeout, batch_timeout)
+    if kind == 'thread':
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='parser')
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers,
+                                       initializer=configure_parse_cache, initargs=(parse_cache_size,))
+    return PooledParser(language, executor, workers, timeout, batch_timeout)
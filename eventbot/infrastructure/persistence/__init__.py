@@ -1,19 +1,39 @@
-from .dsn import build_dsn
-from .engine import get_database_engine
-from .session import get_session_factory
+from .dsn import build_dsn, build_async_dsn
+from .engine import get_database_engine, get_async_database_engine
+from .session import get_session_factory, get_async_session_factory
 from .tables import map_tables, drop_tables
-from .uow import SQLCalendarUnitOfWork
-from .repositories import SQLCalendarRepository
-from .sequence_generator import SQLEventSequenceGenerator
+from .uow import SQLCalendarUnitOfWork, AsyncSQLCalendarUnitOfWork
+from .repositories import SQLCalendarRepository, AsyncSQLCalendarRepository
+from .sequence_generator import SQLEventSequenceGenerator, AsyncSQLEventSequenceGenerator
+from .outbox import Outbox, AsyncOutbox, SQLOutbox, AsyncSQLOutbox, SQLOutboxNotifier, AsyncSQLOutboxNotifier,\
+    OutboxMessage
+from .retention import SQLRetention, RetentionMode, RetentionReport, read_retention_mode
 
 
 __all__ = [
     'build_dsn',
+    'build_async_dsn',
     'get_database_engine',
+    'get_async_database_engine',
     'get_session_factory',
+    'get_async_session_factory',
     'map_tables',
     'drop_tables',
     'SQLCalendarUnitOfWork',
+    'AsyncSQLCalendarUnitOfWork',
     'SQLCalendarRepository',
-    'SQLEventSequenceGenerator'
+    'AsyncSQLCalendarRepository',
+    'SQLEventSequenceGenerator',
+    'AsyncSQLEventSequenceGenerator',
+    'Outbox',
+    'AsyncOutbox',
+    'SQLOutbox',
+    'AsyncSQLOutbox',
+    'SQLOutboxNotifier',
+    'AsyncSQLOutboxNotifier',
+    'OutboxMessage',
+    'SQLRetention',
+    'RetentionMode',
+    'RetentionReport',
+    'read_retention_mode'
 ]
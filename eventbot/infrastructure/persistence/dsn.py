@@ -1,6 +1,10 @@
 from eventbot.infrastructure.config import Config
 
 
-def build_dsn(config: Config = Config()) -> str:
-    return f'postgresql://{config.database_user}:{config.database_password}' \
+def build_dsn(config: Config = Config(), driver: str = 'postgresql') -> str:
+    return f'{driver}://{config.database_user}:{config.database_password}' \
            f'@{config.database_host}:{config.database_port}/{config.database}'
+
+
+def build_async_dsn(config: Config = Config()) -> str:
+    return build_dsn(config, driver='postgresql+asyncpg')
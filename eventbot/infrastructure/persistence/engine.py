@@ -1,5 +1,10 @@
 from sqlalchemy import create_engine, Engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 
 
 def get_database_engine(dsn: str) -> Engine:
-    return create_engine(dsn)
\ No newline at end of file
+    return create_engine(dsn)
+
+
+def get_async_database_engine(dsn: str) -> AsyncEngine:
+    return create_async_engine(dsn)
@@ -0,0 +1,229 @@
+import abc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Insert, Row, Update, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from eventbot.domain import Notifier
+from eventbot.domain.enums import NotificationKind
+from eventbot.infrastructure.persistence.tables import outbox_table
+
+
+MAX_ERROR_LENGTH = 256
+
+
+@dataclass(frozen=True)
+class OutboxMessage:
+    id: int
+    idempotency_key: str
+    kind: NotificationKind
+    guild_handle: str
+    channel_handle: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+def make_idempotency_key(kind: NotificationKind, event_code: str) -> str:
+    return f'{kind.value}:{event_code}'
+
+
+# Notifications recorded twice, by retries of a unit of work, are inserted once
+def insert_outbox_messages(dialect_name: str = 'postgresql') -> Insert:
+    insert = sqlite.insert if dialect_name == 'sqlite' else postgresql.insert
+    return insert(outbox_table).on_conflict_do_nothing(index_elements=[outbox_table.c.idempotency_key])
+
+
+def serialize_time(time: Optional[datetime]) -> Optional[str]:
+    return time.isoformat() if time is not None else None
+
+
+def deserialize_time(time: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(time) if time is not None else None
+
+
+# Records notifications in the unit of work, so they are committed or rolled back together with the calendar.
+# A notification is recorded once per event and kind, whatever the retries
+class OutboxNotifier(Notifier, metaclass=abc.ABCMeta):
+    def __init__(self, guild_handle: str, channel_handle: str):
+        self._guild_handle = guild_handle
+        self._channel_handle = channel_handle
+
+    def notify_event_start(self, event_name: str, event_code: str, user_handles: List[str]) -> None:
+        self._record(NotificationKind.EVENT_START, event_code, {
+            'event_name': event_name,
+            'event_code': event_code,
+            'user_handles': user_handles,
+        })
+
+    def notify_reminder(self, event_name: str, event_code: str, start_time: datetime, user_handles: List[str]) -> None:
+        self._record(NotificationKind.REMINDER, event_code, {
+            'event_name': event_name,
+            'event_code': event_code,
+            'start_time': serialize_time(start_time),
+            'user_handles': user_handles,
+        })
+
+    def notify_event_created(self, event_name: str, event_code: str, time: datetime, owner: str,
+                             reminder_time: Optional[datetime] = None) -> None:
+        self._record(NotificationKind.EVENT_CREATED, event_code, {
+            'event_name': event_name,
+            'event_code': event_code,
+            'time': serialize_time(time),
+            'owner': owner,
+            'reminder_time': serialize_time(reminder_time),
+        })
+
+    @abc.abstractmethod
+    def _record(self, kind: NotificationKind, event_code: str, payload: Dict[str, Any]) -> None:
+        raise NotImplemented
+
+
+class SQLOutboxNotifier(OutboxNotifier):
+    def __init__(self, session: Session, guild_handle: str, channel_handle: str):
+        super().__init__(guild_handle, channel_handle)
+        self._session = session
+
+    def _record(self, kind: NotificationKind, event_code: str, payload: Dict[str, Any]) -> None:
+        statement = insert_outbox_messages().values(
+            idempotency_key=make_idempotency_key(kind, event_code),
+            kind=kind,
+            guild_handle=self._guild_handle,
+            channel_handle=self._channel_handle,
+            payload=payload
+        )
+        self._session.execute(statement)
+
+
+# The calendar records notifications synchronously, so the rows are collected and inserted on commit
+class AsyncSQLOutboxNotifier(OutboxNotifier):
+    def __init__(self, pending: List[Dict[str, Any]], guild_handle: str, channel_handle: str):
+        super().__init__(guild_handle, channel_handle)
+        self._pending = pending
+
+    def _record(self, kind: NotificationKind, event_code: str, payload: Dict[str, Any]) -> None:
+        self._pending.append({
+            'idempotency_key': make_idempotency_key(kind, event_code),
+            'kind': kind,
+            'guild_handle': self._guild_handle,
+            'channel_handle': self._channel_handle,
+            'payload': payload
+        })
+
+
+class Outbox(metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    def claim(self, limit: int, lease: timedelta, max_attempts: int) -> List[OutboxMessage]:
+        raise NotImplemented
+
+    @abc.abstractmethod
+    def mark_delivered(self, message_ids: Sequence[int]) -> None:
+        raise NotImplemented
+
+    @abc.abstractmethod
+    def mark_failed(self, message_id: int, error: str, retry_in: timedelta) -> None:
+        raise NotImplemented
+
+
+# Used by the dispatcher, which runs on the event loop of the bot
+class AsyncOutbox(metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    async def claim(self, limit: int, lease: timedelta, max_attempts: int) -> List[OutboxMessage]:
+        raise NotImplemented
+
+    @abc.abstractmethod
+    async def mark_delivered(self, message_ids: Sequence[int]) -> None:
+        raise NotImplemented
+
+    @abc.abstractmethod
+    async def mark_failed(self, message_id: int, error: str, retry_in: timedelta) -> None:
+        raise NotImplemented
+
+
+# Outbox rows are claimed with a lease: a claimed row is hidden from other dispatchers until the lease expires,
+# so a dispatcher that crashes mid-delivery leaves the row to be retried rather than lost
+def claim_outbox_messages(limit: int, lease: timedelta, max_attempts: int) -> Update:
+    claimable = select(outbox_table.c.id)\
+        .where(outbox_table.c.delivered_at.is_(None))\
+        .where(outbox_table.c.next_attempt_at <= func.now())\
+        .where(outbox_table.c.attempts < max_attempts)\
+        .order_by(outbox_table.c.id)\
+        .limit(limit)\
+        .with_for_update(skip_locked=True)
+    return update(outbox_table)\
+        .where(outbox_table.c.id.in_(claimable.scalar_subquery()))\
+        .values(attempts=outbox_table.c.attempts + 1, next_attempt_at=func.now() + lease)\
+        .returning(outbox_table.c.id,
+                   outbox_table.c.idempotency_key,
+                   outbox_table.c.kind,
+                   outbox_table.c.guild_handle,
+                   outbox_table.c.channel_handle,
+                   outbox_table.c.payload,
+                   outbox_table.c.attempts)
+
+
+def mark_outbox_messages_delivered(message_ids: Sequence[int]) -> Update:
+    return update(outbox_table)\
+        .where(outbox_table.c.id.in_(message_ids))\
+        .values(delivered_at=func.now(), last_error=None)
+
+
+def mark_outbox_message_failed(message_id: int, error: str, retry_in: timedelta) -> Update:
+    return update(outbox_table)\
+        .where(outbox_table.c.id == message_id)\
+        .values(next_attempt_at=func.now() + retry_in, last_error=error[:MAX_ERROR_LENGTH])
+
+
+def to_outbox_messages(records: Sequence[Row]) -> List[OutboxMessage]:
+    return sorted((OutboxMessage(*record) for record in records), key=lambda message: message.id)
+
+
+# Each step is a short transaction of its own, no lock is held while a message is delivered
+class SQLOutbox(Outbox):
+    def __init__(self, session_factory: sessionmaker):
+        self._session_factory = session_factory
+
+    def claim(self, limit: int, lease: timedelta, max_attempts: int) -> List[OutboxMessage]:
+        with self._session_factory() as session:
+            records = session.execute(claim_outbox_messages(limit, lease, max_attempts)).all()
+            session.commit()
+        return to_outbox_messages(records)
+
+    def mark_delivered(self, message_ids: Sequence[int]) -> None:
+        if not message_ids:
+            return
+        with self._session_factory() as session:
+            session.execute(mark_outbox_messages_delivered(message_ids))
+            session.commit()
+
+    def mark_failed(self, message_id: int, error: str, retry_in: timedelta) -> None:
+        with self._session_factory() as session:
+            session.execute(mark_outbox_message_failed(message_id, error, retry_in))
+            session.commit()
+
+
+# The same steps on the asynchronous engine, so the dispatcher does not block the event loop
+class AsyncSQLOutbox(AsyncOutbox):
+    def __init__(self, session_factory: async_sessionmaker):
+        self._session_factory = session_factory
+
+    async def claim(self, limit: int, lease: timedelta, max_attempts: int) -> List[OutboxMessage]:
+        async with self._session_factory() as session:
+            records = (await session.execute(claim_outbox_messages(limit, lease, max_attempts))).all()
+            await session.commit()
+        return to_outbox_messages(records)
+
+    async def mark_delivered(self, message_ids: Sequence[int]) -> None:
+        if not message_ids:
+            return
+        async with self._session_factory() as session:
+            await session.execute(mark_outbox_messages_delivered(message_ids))
+            await session.commit()
+
+    async def mark_failed(self, message_id: int, error: str, retry_in: timedelta) -> None:
+        async with self._session_factory() as session:
+            await session.execute(mark_outbox_message_failed(message_id, error, retry_in))
+            await session.commit()
@@ -1,11 +1,43 @@
 from typing import List
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, and_, case, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
-from eventbot.domain import Calendar, CalendarRepository, EventReadModel
+from eventbot.domain import Calendar, CalendarRepository, AsyncCalendarRepository, EventReadModel,\
+    CalendarScheduleReadModel
+from eventbot.domain.model import Event
 from eventbot.infrastructure.persistence.tables import event_table, calendar_table
 
 
+def select_incoming_events(guild_handle: str, channel_handle: str) -> Select:
+    return select(
+        event_table.c._name,
+        event_table.c._code,
+        event_table.c._time,
+        event_table.c._remind_at
+    ).join(calendar_table)\
+        .where(calendar_table.c._guild_handle == guild_handle)\
+        .where(calendar_table.c._channel_handle == channel_handle)
+
+
+# Mirrors Event.next_due_at: the reminder while it is still to be sent, the start otherwise
+def select_notification_schedule() -> Select:
+    due_at = case(
+        (and_(event_table.c._remind_at.is_not(None),
+              event_table.c._reminded == False,
+              event_table.c._remind_at < event_table.c._time), event_table.c._remind_at),
+        else_=event_table.c._time
+    )
+    return select(
+        calendar_table.c._guild_handle,
+        calendar_table.c._channel_handle,
+        func.min(due_at)
+    ).join(event_table)\
+        .where(event_table.c._removed == False)\
+        .group_by(calendar_table.c._id, calendar_table.c._guild_handle, calendar_table.c._channel_handle)
+
+
 class SQLCalendarRepository(CalendarRepository):
     def __init__(self, session: Session):
         self._session = session
@@ -20,7 +52,6 @@ class SQLCalendarRepository(CalendarRepository):
 
     def get_calendar_by_guild_and_channel(self, guild_handle: str, channel_handle: str) -> Calendar:
         return self._session.query(Calendar)\
-            .with_for_update()\
             .filter_by(_guild_handle=guild_handle)\
             .filter_by(_channel_handle=channel_handle)\
             .one()
@@ -29,14 +60,40 @@ class SQLCalendarRepository(CalendarRepository):
         self._session.add(calendar)
 
     def get_incoming_events(self, guild_handle: str, channel_handle: str) -> List[EventReadModel]:
-        records = self._session.query(
-            event_table.c._name,
-            event_table.c._code,
-            event_table.c._time,
-            event_table.c._remind_at
-        ).join(calendar_table)\
-            .filter(calendar_table.c._guild_handle == guild_handle)\
-            .filter(calendar_table.c._channel_handle == channel_handle)\
-            .all()
+        records = self._session.execute(select_incoming_events(guild_handle, channel_handle)).all()
         read_models = [EventReadModel(*record) for record in records]
         return read_models
+
+    def get_notification_schedule(self) -> List[CalendarScheduleReadModel]:
+        records = self._session.execute(select_notification_schedule()).all()
+        return [CalendarScheduleReadModel(*record) for record in records]
+
+
+# Events and their declarations are loaded with the calendar, as lazy loading cannot happen in the domain
+class AsyncSQLCalendarRepository(AsyncCalendarRepository):
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def does_calendar_exist(self, guild_handle: str, channel_handle: str) -> bool:
+        statement = select(exists()
+                           .where(calendar_table.c._guild_handle == guild_handle)
+                           .where(calendar_table.c._channel_handle == channel_handle))
+        return await self._session.scalar(statement)
+
+    async def get_calendar_by_guild_and_channel(self, guild_handle: str, channel_handle: str) -> Calendar:
+        statement = select(Calendar)\
+            .filter_by(_guild_handle=guild_handle)\
+            .filter_by(_channel_handle=channel_handle)\
+            .options(selectinload(Calendar._events).selectinload(Event._declarations))
+        return (await self._session.scalars(statement)).one()
+
+    def add_calendar(self, calendar: Calendar) -> None:
+        self._session.add(calendar)
+
+    async def get_incoming_events(self, guild_handle: str, channel_handle: str) -> List[EventReadModel]:
+        records = (await self._session.execute(select_incoming_events(guild_handle, channel_handle))).all()
+        return [EventReadModel(*record) for record in records]
+
+    async def get_notification_schedule(self) -> List[CalendarScheduleReadModel]:
+        records = (await self._session.execute(select_notification_schedule())).all()
+        return [CalendarScheduleReadModel(*record) for record in records]
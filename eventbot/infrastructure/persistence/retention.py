@@ -0,0 +1,135 @@
+import enum
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple
+from uuid import UUID
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from eventbot.infrastructure.persistence.tables import event_table, declaration_table, event_archive_table,\
+    declaration_archive_table, outbox_table
+
+
+DEFAULT_TTL = timedelta(days=7)
+DEFAULT_BATCH_SIZE = 500
+
+
+class RetentionMode(enum.Enum):
+    ARCHIVE = 'archive'
+    DELETE = 'delete'
+
+
+class RetentionReport(NamedTuple):
+    events: int
+    declarations: int
+    outbox_messages: int
+    duration: float
+
+    @property
+    def rows(self) -> int:
+        return self.events + self.declarations + self.outbox_messages
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.duration if self.duration else 0.0
+
+    def __add__(self, other: 'RetentionReport') -> 'RetentionReport':
+        return RetentionReport(self.events + other.events,
+                               self.declarations + other.declarations,
+                               self.outbox_messages + other.outbox_messages,
+                               self.duration + other.duration)
+
+
+EMPTY_REPORT = RetentionReport(0, 0, 0, 0.0)
+
+
+def read_retention_mode(mode: str) -> RetentionMode:
+    try:
+        return RetentionMode(mode)
+    except ValueError:
+        raise ValueError(f'Unknown retention mode set in config: {mode}')
+
+
+# Moves removed events, and events that started longer than the TTL ago, out of the event and declaration tables:
+# into the archive tables, or nowhere in the delete mode. Delivered outbox messages older than the TTL are deleted.
+# Both are measured against the given time; messages are stamped delivered by the database, so its clock is expected
+# to be the local one, as the clock of events is
+# Every batch is a short transaction of its own, so a run stopped at any point is continued by the next one,
+# and rows locked by another run are skipped rather than waited for
+class SQLRetention:
+    def __init__(self,
+                 session_factory: sessionmaker,
+                 mode: RetentionMode = RetentionMode.ARCHIVE,
+                 ttl: timedelta = DEFAULT_TTL,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 pause: float = 0.0):
+        self._session_factory = session_factory
+        self._mode = mode
+        self._ttl = ttl
+        self._batch_size = batch_size
+        self._pause = pause
+
+    def run(self, now: datetime,
+            on_batch: Callable[[RetentionReport], None] = lambda report: None) -> RetentionReport:
+        total = EMPTY_REPORT
+        for step in (self.retain_events, self.purge_outbox):
+            while True:
+                report = step(now)
+                if not report.rows:
+                    break
+                on_batch(report)
+                total += report
+                if self._pause:
+                    time.sleep(self._pause)
+        return total
+
+    # One batch of events, with their declarations
+    def retain_events(self, now: datetime) -> RetentionReport:
+        started = time.perf_counter()
+        with self._session_factory() as session:
+            event_ids = self._lock_retained_event_ids(session, now - self._ttl)
+            if not event_ids:
+                return EMPTY_REPORT
+            if self._mode == RetentionMode.ARCHIVE:
+                self._archive(session, event_ids)
+            declarations = session.execute(
+                delete(declaration_table).where(declaration_table.c.event_id.in_(event_ids))
+            ).rowcount
+            events = session.execute(delete(event_table).where(event_table.c._id.in_(event_ids))).rowcount
+            session.commit()
+        return RetentionReport(events, declarations, 0, time.perf_counter() - started)
+
+    # One batch of delivered outbox messages
+    def purge_outbox(self, now: datetime) -> RetentionReport:
+        started = time.perf_counter()
+        purged = select(outbox_table.c.id)\
+            .where(outbox_table.c.delivered_at < now - self._ttl)\
+            .order_by(outbox_table.c.id)\
+            .limit(self._batch_size)\
+            .with_for_update(skip_locked=True)
+        with self._session_factory() as session:
+            messages = session.execute(
+                delete(outbox_table).where(outbox_table.c.id.in_(purged.scalar_subquery()))
+            ).rowcount
+            session.commit()
+        return RetentionReport(0, 0, messages, time.perf_counter() - started)
+
+    def _lock_retained_event_ids(self, session: Session, cutoff: datetime) -> List[UUID]:
+        statement = select(event_table.c._id)\
+            .where(or_(event_table.c._removed == True, event_table.c._time < cutoff))\
+            .order_by(event_table.c._id)\
+            .limit(self._batch_size)\
+            .with_for_update(skip_locked=True)
+        return list(session.scalars(statement))
+
+    @staticmethod
+    def _archive(session: Session, event_ids: List[UUID]) -> None:
+        event_columns = [column.name for column in event_table.columns]
+        session.execute(insert(event_archive_table).from_select(
+            event_columns, select(*event_table.columns).where(event_table.c._id.in_(event_ids))
+        ))
+        declaration_columns = [column.name for column in declaration_table.columns]
+        session.execute(insert(declaration_archive_table).from_select(
+            declaration_columns, select(*declaration_table.columns).where(declaration_table.c.event_id.in_(event_ids))
+        ))
@@ -1,17 +1,110 @@
-from typing import Generator
+from collections import deque
+from threading import Lock
+from typing import Awaitable, Callable, Deque, Generator, List
 
-from eventbot.domain import EventSequenceGenerator
-from eventbot.infrastructure.persistence.tables import EVENT_SEQUENCE_NAME
+from eventbot.domain import EventSequenceGenerator, AsyncEventSequenceGenerator
+from eventbot.infrastructure.persistence.tables import EVENT_SEQUENCE_NAME, EVENT_SEQUENCE_BLOCK_SIZE
 
-from sqlalchemy import Sequence
+from sqlalchemy import Sequence, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 
+# Hi-lo allocation: a value drawn from the sequence is the start of a block of values no other process gets,
+# as the sequence increments by the block size. Values are handed out from the block in memory,
+# and the sequence is only reached again once the block runs out
+class SequenceBlockAllocator:
+    def __init__(self, block_size: int):
+        self._block_size = block_size
+        self._lock = Lock()
+        self._block_starts: Deque[int] = deque()
+        self._next = 0
+        self._end = 0
+
+    def take(self, count: int, draw_block_starts: Callable[[int], List[int]]) -> List[int]:
+        with self._lock:
+            missing = count - self._available()
+            if missing > 0:
+                self._block_starts.extend(draw_block_starts(self._blocks_for(missing)))
+            return self._take_available(count)
+
+    # The lock is not held while blocks are drawn; if others take the values meanwhile, more blocks are drawn
+    async def take_async(self, count: int, draw_block_starts: Callable[[int], Awaitable[List[int]]]) -> List[int]:
+        while True:
+            with self._lock:
+                missing = count - self._available()
+                if missing <= 0:
+                    return self._take_available(count)
+            block_starts = await draw_block_starts(self._blocks_for(missing))
+            with self._lock:
+                self._block_starts.extend(block_starts)
+
+    # Drops the values left, for when the sequence is recreated
+    def reset(self) -> None:
+        with self._lock:
+            self._block_starts.clear()
+            self._next = self._end = 0
+
+    def _available(self) -> int:
+        return self._end - self._next + len(self._block_starts) * self._block_size
+
+    def _blocks_for(self, count: int) -> int:
+        return -(-count // self._block_size)
+
+    def _take_available(self, count: int) -> List[int]:
+        values = []
+        while len(values) < count:
+            if self._next >= self._end:
+                self._next = self._block_starts.popleft()
+                self._end = self._next + self._block_size
+            taken = min(count - len(values), self._end - self._next)
+            values.extend(range(self._next, self._next + taken))
+            self._next += taken
+        return values
+
+
+EVENT_NUMBERS = SequenceBlockAllocator(EVENT_SEQUENCE_BLOCK_SIZE)
+
+
 class SQLEventSequenceGenerator(EventSequenceGenerator):
     def __init__(self, session: Session):
         self._session = session
 
     def __call__(self) -> Generator[int, None, None]:
+        yield from self.take(1)
+
+    def take(self, count: int) -> List[int]:
+        if count <= 0:
+            return []
+        return EVENT_NUMBERS.take(count, self._draw_block_starts)
+
+    # Draws all the blocks needed in a single round trip
+    def _draw_block_starts(self, count: int) -> List[int]:
+        sequence = Sequence(EVENT_SEQUENCE_NAME)
+        statement = select(sequence.next_value()).select_from(func.generate_series(1, count))
+        return list(self._session.scalars(statement))
+
+
+class AsyncSQLEventSequenceGenerator(AsyncEventSequenceGenerator):
+    def __init__(self, session: AsyncSession):
+        self._session = session
+        self._reserved: Deque[int] = deque()
+
+    async def reserve(self, count: int) -> None:
+        missing = count - len(self._reserved)
+        if missing > 0:
+            self._reserved.extend(await EVENT_NUMBERS.take_async(missing, self._draw_block_starts))
+
+    def __call__(self) -> Generator[int, None, None]:
+        yield from self.take(1)
+
+    def take(self, count: int) -> List[int]:
+        if count > len(self._reserved):
+            raise Exception('Attempt to take event numbers that were not reserved')
+        return [self._reserved.popleft() for _ in range(count)]
+
+    async def _draw_block_starts(self, count: int) -> List[int]:
         sequence = Sequence(EVENT_SEQUENCE_NAME)
-        next_value = self._session.execute(sequence)
-        yield next_value
+        statement = select(sequence.next_value()).select_from(func.generate_series(1, count))
+        return list(await self._session.scalars(statement))
+
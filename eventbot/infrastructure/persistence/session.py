@@ -1,7 +1,14 @@
 from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 
 
 def get_session_factory(engine: Engine) -> sessionmaker:
     session_factory = sessionmaker(bind=engine)
     return session_factory
+
+
+# Nothing is expired on commit, as reloading an attribute would be I/O the domain cannot await
+def get_async_session_factory(engine: AsyncEngine) -> async_sessionmaker:
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    return session_factory
@@ -1,17 +1,20 @@
-from sqlalchemy import Table, Column, String, ForeignKey, UUID, DateTime,\
-    Engine, types, Enum, Integer, Boolean, and_, Sequence
+from sqlalchemy import Table, Column, String, ForeignKey, Uuid, DateTime,\
+    Engine, types, Enum, Integer, Boolean, and_, Sequence, JSON, Index, func, text
 from sqlalchemy.orm import registry, relationship, keyfunc_mapping
 
-from eventbot.domain.model import Calendar, Event, Declaration, CalendarLanguage
+from eventbot.domain.model import Calendar, Event, Declaration
 from eventbot.domain.vo import EventCode
-from eventbot.domain.enums import Decision
+from eventbot.domain.enums import Decision, CalendarLanguage, NotificationKind
 
 
 EVENT_SEQUENCE_NAME = 'event_name_seq'
+# Every value drawn from the sequence reserves a block of event numbers, handed out by the process that drew it
+EVENT_SEQUENCE_BLOCK_SIZE = 20
 
 
 class EventCodeVO(types.TypeDecorator):
     impl = types.String(8)
+    cache_ok = True
 
     def process_bind_param(self, value, dialect):
         return str(value)
@@ -23,10 +26,19 @@ class EventCodeVO(types.TypeDecorator):
 mapper_registry = registry()
 
 
+# Collection keys are named functions, so that calendars can be pickled
+def get_event_code(event: Event) -> str:
+    return str(event._code)
+
+
+def get_declaration_user_handle(declaration: Declaration) -> str:
+    return declaration.user_handle
+
+
 calendar_table = Table(
     'calendar',
     mapper_registry.metadata,
-    Column('id', UUID, primary_key=True, key='_id'),
+    Column('id', Uuid, primary_key=True, key='_id'),
     Column('version', Integer, nullable=False, key='_version'),
     Column('guild_handle', String(64), nullable=False, unique=False, key='_guild_handle'),
     Column('channel_handle', String(64), nullable=False, unique=False, key='_channel_handle'),
@@ -36,8 +48,8 @@ calendar_table = Table(
 event_table = Table(
     'event',
     mapper_registry.metadata,
-    Column('id', UUID, primary_key=True, key='_id'),
-    Column('calendar_id', UUID, ForeignKey('calendar._id'), key='_calendar_id'),
+    Column('id', Uuid, primary_key=True, key='_id'),
+    Column('calendar_id', Uuid, ForeignKey('calendar._id'), key='_calendar_id'),
     Column('name', String(64), nullable=False, key='_name'),
     Column('code', EventCodeVO, nullable=False, unique=True, key='_code'),
     Column('time', DateTime, nullable=False, key='_time'),
@@ -50,28 +62,93 @@ event_table = Table(
 declaration_table = Table(
     'declaration',
     mapper_registry.metadata,
-    Column('id', UUID, primary_key=True),
-    Column('event_id', UUID, ForeignKey('event._id')),
+    Column('id', Uuid, primary_key=True),
+    Column('event_id', Uuid, ForeignKey('event._id')),
     Column('user_handle', String(64), nullable=False),
     Column('decision', Enum(Decision), nullable=False),
 )
 
-event_sequence = Sequence(EVENT_SEQUENCE_NAME, start=1, increment=1, metadata=mapper_registry.metadata)
+# Retention moves removed and finished events out of the tables above, their rows are kept here as they were
+event_archive_table = Table(
+    'event_archive',
+    mapper_registry.metadata,
+    Column('id', Uuid, primary_key=True),
+    Column('calendar_id', Uuid, nullable=False),
+    Column('name', String(64), nullable=False),
+    Column('code', String(8), nullable=False),
+    Column('time', DateTime, nullable=False),
+    Column('owner_handle', String(64), nullable=False),
+    Column('remind_at', DateTime, nullable=True),
+    Column('removed', Boolean, nullable=False),
+    Column('reminded', Boolean, nullable=False),
+    Column('archived_at', DateTime, nullable=False, server_default=func.now())
+)
+
+declaration_archive_table = Table(
+    'declaration_archive',
+    mapper_registry.metadata,
+    Column('id', Uuid, primary_key=True),
+    Column('event_id', Uuid, nullable=False, index=True),
+    Column('user_handle', String(64), nullable=False),
+    Column('decision', Enum(Decision), nullable=False),
+    Column('archived_at', DateTime, nullable=False, server_default=func.now())
+)
+
+# Notifications recorded in the same transaction as the calendar change, delivered later by the outbox dispatcher
+outbox_table = Table(
+    'outbox',
+    mapper_registry.metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('idempotency_key', String(128), nullable=False, unique=True),
+    Column('kind', Enum(NotificationKind), nullable=False),
+    Column('guild_handle', String(64), nullable=False),
+    Column('channel_handle', String(64), nullable=False),
+    Column('payload', JSON, nullable=False),
+    Column('created_at', DateTime, nullable=False, server_default=func.now()),
+    Column('attempts', Integer, nullable=False, server_default='0'),
+    Column('next_attempt_at', DateTime, nullable=False, server_default=func.now()),
+    Column('delivered_at', DateTime, nullable=True),
+    Column('last_error', String(256), nullable=True)
+)
+
+# Retention looks events up by these, and declarations by their event
+RETENTION_INDEXES = [
+    Index('ix_event_time', event_table.c._time),
+    Index('ix_event_removed', event_table.c._id, postgresql_where=event_table.c._removed == True),
+    Index('ix_declaration_event_id', declaration_table.c.event_id),
+]
+
+Index('ix_outbox_pending', outbox_table.c.next_attempt_at, postgresql_where=outbox_table.c.delivered_at.is_(None))
+
+event_sequence = Sequence(EVENT_SEQUENCE_NAME, start=1, increment=EVENT_SEQUENCE_BLOCK_SIZE,
+                          metadata=mapper_registry.metadata)
 
-mapper_registry.map_imperatively(Calendar, calendar_table, properties={
+# The version bumped by every change of a calendar guards its updates: an update of a calendar that was changed
+# since it was loaded matches no row and fails, instead of the calendar being locked while it is changed
+mapper_registry.map_imperatively(Calendar, calendar_table, version_id_col=calendar_table.c._version,
+                                 version_id_generator=False, properties={
     '_events': relationship(
         Event,
-        collection_class=keyfunc_mapping(lambda event: str(event._code)),
+        collection_class=keyfunc_mapping(get_event_code),
         primaryjoin=and_(event_table.c._calendar_id == calendar_table.c._id, event_table.c._removed == False)
     )})
 mapper_registry.map_imperatively(Event, event_table, properties={
-    '_declarations': relationship(Declaration)
+    '_declarations': relationship(
+        Declaration,
+        collection_class=keyfunc_mapping(get_declaration_user_handle)
+    )
 })
 mapper_registry.map_imperatively(Declaration, declaration_table)
 
 
 def map_tables(engine: Engine) -> None:
     mapper_registry.metadata.create_all(bind=engine)
+    # The sequence of a database created before the block allocation still increments by one
+    with engine.begin() as connection:
+        connection.execute(text(f'ALTER SEQUENCE {EVENT_SEQUENCE_NAME} INCREMENT BY {EVENT_SEQUENCE_BLOCK_SIZE}'))
+    # Nor does it have the indexes of retention, as tables that exist are skipped above
+    for index in RETENTION_INDEXES:
+        index.create(bind=engine, checkfirst=True)
 
 
 def drop_tables(engine: Engine) -> None:
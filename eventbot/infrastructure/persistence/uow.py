@@ -1,10 +1,17 @@
-from typing import Optional
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
 
-from eventbot.domain import CalendarUnitOfWork
-from eventbot.infrastructure.persistence.repositories import SQLCalendarRepository
-from eventbot.infrastructure.persistence.sequence_generator import SQLEventSequenceGenerator
+from eventbot.domain import CalendarUnitOfWork, AsyncCalendarUnitOfWork, CalendarModifiedConcurrently
+from eventbot.infrastructure.persistence.outbox import SQLOutboxNotifier, AsyncSQLOutboxNotifier,\
+    insert_outbox_messages
+from eventbot.infrastructure.persistence.repositories import SQLCalendarRepository, AsyncSQLCalendarRepository
+from eventbot.infrastructure.persistence.sequence_generator import SQLEventSequenceGenerator,\
+    AsyncSQLEventSequenceGenerator
 
 
 class SQLCalendarUnitOfWork(CalendarUnitOfWork):
@@ -36,8 +43,84 @@ class SQLCalendarUnitOfWork(CalendarUnitOfWork):
         self.rollback()
         self._session.close()
 
+    def outbox(self, guild_handle: str, channel_handle: str) -> SQLOutboxNotifier:
+        if self._session is not None:
+            return SQLOutboxNotifier(self._session, guild_handle, channel_handle)
+        raise Exception('Attempt to use outbox outside database session')
+
     def commit(self) -> None:
-        self._session.commit()
+        try:
+            self._session.commit()
+        except StaleDataError as e:
+            raise CalendarModifiedConcurrently() from e
 
     def rollback(self) -> None:
         self._session.rollback()
+
+
+@dataclass
+class AsyncUnitOfWorkState:
+    session: AsyncSession
+    calendars: AsyncSQLCalendarRepository
+    event_sequence_generator: AsyncSQLEventSequenceGenerator
+    notifications: List[Dict[str, Any]] = field(default_factory=list)
+
+
+# One instance is shared by the handlers running concurrently on the event loop,
+# so the session of a unit of work belongs to the task that entered it
+class AsyncSQLCalendarUnitOfWork(AsyncCalendarUnitOfWork):
+    def __init__(self, session_factory: async_sessionmaker):
+        self._session_factory: async_sessionmaker = session_factory
+        self._state: ContextVar[Optional[AsyncUnitOfWorkState]] = ContextVar('unit_of_work_state', default=None)
+
+    @property
+    def calendars(self) -> AsyncSQLCalendarRepository:
+        state = self._state.get()
+        if state is not None:
+            return state.calendars
+        raise Exception('Attempt to use repository outside database session')
+
+    @property
+    def event_sequence_generator(self) -> AsyncSQLEventSequenceGenerator:
+        state = self._state.get()
+        if state is not None:
+            return state.event_sequence_generator
+        raise Exception('Attempt to use sequence generator outside database session')
+
+    async def __aenter__(self) -> 'AsyncCalendarUnitOfWork':
+        session = self._session_factory()
+        self._state.set(AsyncUnitOfWorkState(session,
+                                             AsyncSQLCalendarRepository(session),
+                                             AsyncSQLEventSequenceGenerator(session)))
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        state = self._state.get()
+        try:
+            await self.rollback()
+            await state.session.close()
+        finally:
+            self._state.set(None)
+
+    def outbox(self, guild_handle: str, channel_handle: str) -> AsyncSQLOutboxNotifier:
+        state = self._state.get()
+        if state is not None:
+            return AsyncSQLOutboxNotifier(state.notifications, guild_handle, channel_handle)
+        raise Exception('Attempt to use outbox outside database session')
+
+    async def commit(self) -> None:
+        state = self._state.get()
+        try:
+            if state.notifications:
+                statement = insert_outbox_messages(state.session.bind.dialect.name)
+                await state.session.execute(statement, state.notifications)
+            await state.session.commit()
+        except StaleDataError as e:
+            raise CalendarModifiedConcurrently() from e
+        finally:
+            state.notifications.clear()
+
+    async def rollback(self) -> None:
+        state = self._state.get()
+        state.notifications.clear()
+        await state.session.rollback()
@@ -0,0 +1,59 @@
+import asyncio
+import inspect
+import random
+from typing import Awaitable, Callable, NamedTuple, TypeVar, Union
+
+from eventbot.domain import CalendarModifiedConcurrently
+
+
+T = TypeVar('T')
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BASE_DELAY = 0.01
+DEFAULT_MAX_DELAY = 0.5
+
+
+class ContentionStats(NamedTuple):
+    operations: int
+    # Attempts that hit a calendar changed concurrently, whether retried or not
+    conflicts: int
+    # Operations that still conflicted on their last attempt
+    failures: int
+
+    @property
+    def conflict_rate(self) -> float:
+        return self.conflicts / self.operations if self.operations else 0.0
+
+
+# Runs an operation on a calendar again, from loading the calendar on, when another writer changed it in between.
+# Delays grow exponentially and are jittered, so that the writers that collided do not collide again
+class ConflictRetry:
+    def __init__(self,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY):
+        self._max_attempts = max_attempts
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._operations = 0
+        self._conflicts = 0
+        self._failures = 0
+
+    # The operation is a function, or a coroutine function of an asynchronous unit of work
+    async def __call__(self, operation: Callable[[], Union[T, Awaitable[T]]]) -> T:
+        self._operations += 1
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                result = operation()
+                if inspect.isawaitable(result):
+                    result = await result
+                return result
+            except CalendarModifiedConcurrently:
+                self._conflicts += 1
+                if attempt == self._max_attempts:
+                    self._failures += 1
+                    raise
+            await asyncio.sleep(random.uniform(0, min(self._max_delay, self._base_delay * 2 ** (attempt - 1))))
+
+    def stats(self) -> ContentionStats:
+        return ContentionStats(self._operations, self._conflicts, self._failures)
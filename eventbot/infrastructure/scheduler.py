@@ -0,0 +1,122 @@
+import asyncio
+import heapq
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from eventbot.domain import AsyncCalendarUnitOfWork, Clock
+from eventbot.infrastructure.retry import ConflictRetry
+
+
+CalendarKey = Tuple[str, str]
+
+RETRY_DELAY = timedelta(seconds=30)
+
+
+class SchedulerStats(NamedTuple):
+    scheduled_calendars: int
+    dispatches: int
+    # How long after its due instant the latest calendar got dispatched
+    last_lateness: timedelta
+
+
+# Wakes up exactly at the next due notification of any calendar and dispatches only the calendars that are due.
+# Every calendar has one entry in the heap, for the instant reported by Calendar.next_due_at.
+# Rescheduling a calendar leaves its previous entry in the heap, it is skipped once it does not match anymore
+class NotificationScheduler:
+    def __init__(self,
+                 uow: AsyncCalendarUnitOfWork,
+                 clock: Clock,
+                 retry: ConflictRetry,
+                 on_commit: Callable[[], None] = lambda: None):
+        self._uow = uow
+        self._clock = clock
+        self._retry = retry
+        self._on_commit = on_commit
+        self._due_calendars: List[Tuple[datetime, str, str]] = []
+        self._scheduled: Dict[CalendarKey, datetime] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._dispatches = 0
+        self._last_lateness = timedelta()
+
+    # Starts the scheduler on the running event loop, once; it loads the schedule with a single query first
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def load(self) -> None:
+        async with self._uow as unit_of_work:
+            for schedule in await unit_of_work.calendars.get_notification_schedule():
+                self.schedule(schedule.guild_handle, schedule.channel_handle, schedule.due_at)
+
+    # Called after a calendar is committed with the calendar's new next due instant, None if nothing is due
+    def schedule(self, guild_handle: str, channel_handle: str, due_at: Optional[datetime]) -> None:
+        key = (guild_handle, channel_handle)
+        if self._scheduled.get(key) == due_at:
+            return
+        if due_at is None:
+            del self._scheduled[key]
+            return
+        self._scheduled[key] = due_at
+        heapq.heappush(self._due_calendars, (due_at, guild_handle, channel_handle))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        await self.load()
+        while True:
+            self._wakeup.clear()
+            await self.dispatch_due()
+            timeout = self._time_to_next_due()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def dispatch_due(self) -> None:
+        current_time = self._clock.now()
+        while self._due_calendars and self._due_calendars[0][0] <= current_time:
+            due_at, guild_handle, channel_handle = heapq.heappop(self._due_calendars)
+            key = (guild_handle, channel_handle)
+            if self._scheduled.get(key) != due_at:
+                continue
+            del self._scheduled[key]
+            try:
+                next_due_at = await self._retry(lambda: self._dispatch(guild_handle, channel_handle))
+            except Exception:
+                traceback.print_exc()
+                next_due_at = current_time + RETRY_DELAY
+            self._dispatches += 1
+            self._last_lateness = current_time - due_at
+            self.schedule(guild_handle, channel_handle, next_due_at)
+
+    def stats(self) -> SchedulerStats:
+        return SchedulerStats(len(self._scheduled), self._dispatches, self._last_lateness)
+
+    def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _dispatch(self, guild_handle: str, channel_handle: str) -> Optional[datetime]:
+        async with self._uow as unit_of_work:
+            if not await unit_of_work.calendars.does_calendar_exist(guild_handle, channel_handle):
+                return None
+            calendar = await unit_of_work.calendars.get_calendar_by_guild_and_channel(guild_handle, channel_handle)
+            calendar.send_pending_notifications(self._clock, unit_of_work.outbox(guild_handle, channel_handle))
+            next_due_at = calendar.next_due_at
+            unit_of_work.calendars.add_calendar(calendar)
+            await unit_of_work.commit()
+        self._on_commit()
+        return next_due_at
+
+    # Seconds until the earliest scheduled calendar, None if there is nothing to wait for
+    def _time_to_next_due(self) -> Optional[float]:
+        while self._due_calendars:
+            due_at, guild_handle, channel_handle = self._due_calendars[0]
+            if self._scheduled.get((guild_handle, channel_handle)) == due_at:
+                return max((due_at - self._clock.now()).total_seconds(), 0)
+            heapq.heappop(self._due_calendars)
+        return None
@@ -0,0 +1,7 @@
+#!/bin/bash
+
+set -o allexport
+source prod.env
+set +o allexport
+
+python -m eventbot.application.retention
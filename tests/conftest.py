@@ -6,4 +6,7 @@ from tests.fixtures import (
     dsn,
     db,
     session_factory,
+    async_session_factory,
+    sqlite_async_session_factory,
+    sqlite_session_factory,
 )
@@ -1,7 +1,8 @@
 from datetime import datetime, timedelta
-from typing import Generator, List, Optional
+from typing import Dict, Generator, List, Optional, Sequence
 
 from eventbot.domain import Clock, EventSequenceGenerator, Notifier
+from eventbot.infrastructure.persistence.outbox import AsyncOutbox, OutboxMessage
 
 
 class FakeClock(Clock):
@@ -48,3 +49,26 @@ class FakeNotifier(Notifier):
     @property
     def notified_handles(self) -> List[str]:
         return self._notified_handles
+
+
+class FakeOutbox(AsyncOutbox):
+    def __init__(self, messages: Sequence[OutboxMessage]):
+        self._pending: Dict[int, OutboxMessage] = {message.id: message for message in messages}
+        self.delivered_ids: List[int] = []
+        self.retry_delays: Dict[int, List[timedelta]] = {}
+
+    async def claim(self, limit: int, lease: timedelta, max_attempts: int) -> List[OutboxMessage]:
+        claimable = [message for message in self._pending.values() if message.attempts < max_attempts][:limit]
+        claimed = [OutboxMessage(message.id, message.idempotency_key, message.kind, message.guild_handle,
+                                 message.channel_handle, message.payload, message.attempts + 1)
+                   for message in claimable]
+        self._pending.update({message.id: message for message in claimed})
+        return claimed
+
+    async def mark_delivered(self, message_ids: Sequence[int]) -> None:
+        for message_id in message_ids:
+            del self._pending[message_id]
+        self.delivered_ids.extend(message_ids)
+
+    async def mark_failed(self, message_id: int, error: str, retry_in: timedelta) -> None:
+        self.retry_delays.setdefault(message_id, []).append(retry_in)
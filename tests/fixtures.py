@@ -1,15 +1,24 @@
 from datetime import datetime
 
+import asyncio
+
 import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 
 from eventbot.domain import Calendar, CalendarLanguage
 from eventbot.infrastructure.persistence import (
     get_database_engine,
     get_session_factory,
+    get_async_session_factory,
     map_tables,
     drop_tables,
-    build_dsn
+    build_dsn,
+    build_async_dsn
 )
+from eventbot.infrastructure.persistence.tables import mapper_registry
+from eventbot.infrastructure.persistence.sequence_generator import EVENT_NUMBERS
 
 from tests.fakes import FakeClock, FakeNotifier, FakeSequenceGenerator
 
@@ -51,3 +60,31 @@ def session_factory(db):
     map_tables(db)
     yield get_session_factory(db)
     drop_tables(db)
+    EVENT_NUMBERS.reset()
+
+
+# Every test runs its own event loop, connections are not pooled across them
+@pytest.fixture(scope='function')
+def async_session_factory(session_factory):
+    yield get_async_session_factory(create_async_engine(build_async_dsn(), poolclass=NullPool))
+
+
+# Stand-in for Postgres, without the event number sequence
+@pytest.fixture(scope='function')
+def sqlite_async_session_factory(tmp_path):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path / "eventbot.db"}', poolclass=NullPool)
+
+    async def create_tables():
+        async with engine.begin() as connection:
+            await connection.run_sync(mapper_registry.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield get_async_session_factory(engine)
+
+
+@pytest.fixture(scope='function')
+def sqlite_session_factory(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "eventbot.db"}', poolclass=NullPool)
+    mapper_registry.metadata.create_all(bind=engine)
+    yield get_session_factory(engine)
+
@@ -1,9 +1,16 @@
+import asyncio
 from threading import Thread
 from time import sleep
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from eventbot.domain import Calendar
-from eventbot.infrastructure.persistence import SQLCalendarUnitOfWork
+from sqlalchemy import select
+
+from eventbot.domain import Calendar, EventParsingResult
+from eventbot.domain.enums import NotificationKind
+from eventbot.infrastructure.persistence import SQLCalendarUnitOfWork, AsyncSQLCalendarUnitOfWork, SQLOutbox,\
+    AsyncSQLOutbox, SQLRetention, RetentionMode
+from eventbot.infrastructure.persistence.tables import event_archive_table, declaration_archive_table
+from eventbot.infrastructure.retry import ConflictRetry
 
 
 def test_created_calendar_can_be_later_altered(session_factory, fake_clock, fake_sequence_generator, fake_notifier):
@@ -47,14 +54,24 @@ def test_two_parallel_writing_processes_do_not_break_calendar_integrity(session_
         unit_of_work.calendars.add_calendar(Calendar(test_guild, test_channel))
         unit_of_work.commit()
 
+    retry = ConflictRetry()
+
     def slow_task(event_prompt: str, user_handle: str) -> None:
-        with SQLCalendarUnitOfWork(session_factory) as uow:
-            calendar = uow.calendars.get_calendar_by_guild_and_channel(test_guild, test_channel)
-            sleep(3)
-            calendar.add_event(event_prompt, user_handle,
-                               fake_clock, fake_sequence_generator, fake_notifier)
-            uow.calendars.add_calendar(calendar)
-            uow.commit()
+        attempts = []
+
+        def add_event() -> None:
+            with SQLCalendarUnitOfWork(session_factory) as uow:
+                calendar = uow.calendars.get_calendar_by_guild_and_channel(test_guild, test_channel)
+                # Both first attempts load the calendar before either of them commits
+                if not attempts:
+                    sleep(3)
+                attempts.append(user_handle)
+                calendar.add_event(event_prompt, user_handle,
+                                   fake_clock, fake_sequence_generator, fake_notifier)
+                uow.calendars.add_calendar(calendar)
+                uow.commit()
+
+        asyncio.run(retry(add_event))
 
     thread1 = Thread(target=slow_task, args=['Birthday party at 22.02.2024 20:00', 'Sp00k#0022'])
     thread2 = Thread(target=slow_task, args=['Birthday party at 14.01.2024 20:00', 'Sesh#1401'])
@@ -67,7 +84,8 @@ def test_two_parallel_writing_processes_do_not_break_calendar_integrity(session_
 
     with SQLCalendarUnitOfWork(session_factory) as unit_of_work:
         calendar = unit_of_work.calendars.get_calendar_by_guild_and_channel(test_guild, test_channel)
-        assert calendar._version == 2
+        assert calendar._version == 2 and len(calendar._events) == 2
+    assert retry.stats().conflicts == 1
 
 
 def test_repository_returns_incoming_events(session_factory, fake_clock, fake_sequence_generator, fake_notifier):
@@ -85,3 +103,140 @@ def test_repository_returns_incoming_events(session_factory, fake_clock, fake_se
     with SQLCalendarUnitOfWork(session_factory) as unit_of_work:
         events = unit_of_work.calendars.get_incoming_events(test_guild, test_channel)
         assert len(events) == 3
+
+
+def test_repository_returns_next_notification_of_each_calendar(session_factory, fake_clock,
+                                                               fake_sequence_generator, fake_notifier):
+    fake_clock.set_time(datetime(2022, 1, 1, 12))
+    with SQLCalendarUnitOfWork(session_factory) as unit_of_work:
+        calendar = Calendar('test_guild', 'test_channel')
+        calendar.add_event('Wydarzenie 1 jutro o 10, przypomnienie godzinę wcześniej', 'testuser',
+                           fake_clock, fake_sequence_generator, fake_notifier)
+        calendar.add_event('Wydarzenie 2 jutro o 8', 'testuser', fake_clock, fake_sequence_generator, fake_notifier)
+        idle_calendar = Calendar('test_guild', 'idle_channel')
+        unit_of_work.calendars.add_calendar(calendar)
+        unit_of_work.calendars.add_calendar(idle_calendar)
+        unit_of_work.commit()
+
+    with SQLCalendarUnitOfWork(session_factory) as unit_of_work:
+        schedule = unit_of_work.calendars.get_notification_schedule()
+        assert [(item.channel_handle, item.due_at) for item in schedule] == [('test_channel', datetime(2022, 1, 2, 8))]
+
+
+def test_notifications_are_recorded_only_when_unit_of_work_is_committed(session_factory, fake_clock,
+                                                                         fake_sequence_generator):
+    fake_clock.set_time(datetime(2022, 1, 1, 12))
+    test_guild, test_channel = 'test_guild', 'test_channel'
+    with SQLCalendarUnitOfWork(session_factory) as unit_of_work:
+        calendar = Calendar(test_guild, test_channel)
+        calendar.add_event('Wydarzenie 1 jutro o 10', 'testuser', fake_clock, fake_sequence_generator,
+                           unit_of_work.outbox(test_guild, test_channel))
+        unit_of_work.calendars.add_calendar(calendar)
+        unit_of_work.rollback()
+    with SQLCalendarUnitOfWork(session_factory) as unit_of_work:
+        calendar = Calendar(test_guild, test_channel)
+        event_code = calendar.add_event('Wydarzenie 2 jutro o 12', 'testuser', fake_clock, fake_sequence_generator,
+                                        unit_of_work.outbox(test_guild, test_channel))
+        unit_of_work.outbox(test_guild, test_channel).notify_event_created('Wydarzenie 2', event_code,
+                                                                          datetime(2022, 1, 2, 12), 'testuser')
+        unit_of_work.calendars.add_calendar(calendar)
+        unit_of_work.commit()
+
+    outbox = SQLOutbox(session_factory)
+    messages = outbox.claim(10, timedelta(minutes=1), max_attempts=3)
+    assert [(message.kind, message.payload['event_code'], message.attempts) for message in messages] == \
+        [(NotificationKind.EVENT_CREATED, event_code, 1)]
+    assert outbox.claim(10, timedelta(minutes=1), max_attempts=3) == []
+    outbox.mark_delivered([message.id for message in messages])
+
+
+def add_calendar_to_retain(session_factory, fake_clock, fake_sequence_generator, fake_notifier) -> str:
+    fake_clock.set_time(datetime(2022, 1, 1, 12))
+    with SQLCalendarUnitOfWork(session_factory) as unit_of_work:
+        calendar = Calendar('test_guild', 'test_channel')
+        removed_code = calendar.add_event('Wydarzenie 1 jutro o 10', 'testuser',
+                                          fake_clock, fake_sequence_generator, fake_notifier)
+        calendar.add_event('Wydarzenie 2 za tydzień o 12', 'testuser',
+                           fake_clock, fake_sequence_generator, fake_notifier)
+        calendar.add_event('Trzecie wydarzenie, 12 grudnia 2022 o 22', 'testuser',
+                           fake_clock, fake_sequence_generator, fake_notifier)
+        calendar.declare_yes_to_event('Bob#002', removed_code)
+        calendar.delete_event('testuser', removed_code)
+        unit_of_work.calendars.add_calendar(calendar)
+        unit_of_work.commit()
+    return removed_code
+
+
+def test_removed_and_finished_events_are_archived_in_batches(session_factory, fake_clock,
+                                                             fake_sequence_generator, fake_notifier):
+    removed_code = add_calendar_to_retain(session_factory, fake_clock, fake_sequence_generator, fake_notifier)
+    batches = []
+    retention = SQLRetention(session_factory, RetentionMode.ARCHIVE, timedelta(days=1), batch_size=1)
+    report = retention.run(datetime(2022, 1, 10), batches.append)
+
+    assert (report.events, report.declarations) == (2, 3) and len(batches) == 2
+    with session_factory() as session:
+        archived_codes = set(session.scalars(select(event_archive_table.c.code)))
+        archived_handles = set(session.scalars(select(declaration_archive_table.c.user_handle)))
+    assert str(removed_code) in archived_codes and archived_handles == {'testuser', 'Bob#002'}
+    with SQLCalendarUnitOfWork(session_factory) as unit_of_work:
+        assert len(unit_of_work.calendars.get_incoming_events('test_guild', 'test_channel')) == 1
+    assert retention.run(datetime(2022, 1, 10)).rows == 0
+
+
+def test_events_are_deleted_without_archiving_in_delete_mode(session_factory, fake_clock,
+                                                             fake_sequence_generator, fake_notifier):
+    add_calendar_to_retain(session_factory, fake_clock, fake_sequence_generator, fake_notifier)
+    report = SQLRetention(session_factory, RetentionMode.DELETE, timedelta(days=1)).run(datetime(2022, 1, 2))
+
+    assert (report.events, report.declarations) == (1, 2)
+    with session_factory() as session:
+        assert session.scalars(select(event_archive_table.c.id)).all() == []
+
+
+def test_events_are_added_with_reserved_numbers_in_async_unit_of_work(async_session_factory, fake_clock):
+    fake_clock.set_time(datetime(2022, 1, 1, 12))
+    unit_of_work = AsyncSQLCalendarUnitOfWork(async_session_factory)
+
+    async def import_events():
+        async with unit_of_work:
+            calendar = Calendar('test_guild', 'test_channel')
+            event_drafts = [Calendar.prepare_event(parsing_result, 'testuser', fake_clock) for parsing_result in [
+                EventParsingResult('Wydarzenie', datetime(2022, 1, 2, 10)),
+                EventParsingResult('Wydarzenie', datetime(2022, 1, 3, 10))
+            ]]
+            await unit_of_work.event_sequence_generator.reserve(len(event_drafts))
+            event_codes = calendar.add_events(event_drafts, unit_of_work.event_sequence_generator)
+            unit_of_work.calendars.add_calendar(calendar)
+            await unit_of_work.commit()
+        async with unit_of_work:
+            events = await unit_of_work.calendars.get_incoming_events('test_guild', 'test_channel')
+        return event_codes, events
+
+    event_codes, events = asyncio.run(import_events())
+    assert event_codes == ['wyd-1', 'wyd-2'] and {str(event.code) for event in events} == set(event_codes)
+
+
+
+def test_outbox_messages_are_claimed_and_marked_on_async_engine(session_factory, async_session_factory, fake_clock,
+                                                                fake_sequence_generator):
+    fake_clock.set_time(datetime(2022, 1, 1, 12))
+    test_guild, test_channel = 'test_guild', 'test_channel'
+    with SQLCalendarUnitOfWork(session_factory) as unit_of_work:
+        calendar = Calendar(test_guild, test_channel)
+        calendar.add_event('Wydarzenie jutro o 12', 'testuser', fake_clock, fake_sequence_generator,
+                           unit_of_work.outbox(test_guild, test_channel))
+        unit_of_work.calendars.add_calendar(calendar)
+        unit_of_work.commit()
+    outbox = AsyncSQLOutbox(async_session_factory)
+
+    async def dispatch():
+        first_claim = await outbox.claim(10, timedelta(minutes=1), max_attempts=3)
+        await outbox.mark_failed(first_claim[0].id, 'ConnectionError: Discord is down', timedelta(0))
+        second_claim = await outbox.claim(10, timedelta(minutes=1), max_attempts=3)
+        await outbox.mark_delivered([message.id for message in second_claim])
+        return first_claim, second_claim, await outbox.claim(10, timedelta(minutes=1), max_attempts=3)
+
+    first_claim, second_claim, last_claim = asyncio.run(dispatch())
+    assert [message.kind for message in first_claim] == [NotificationKind.EVENT_CREATED]
+    assert [message.attempts for message in second_claim] == [2] and last_claim == []
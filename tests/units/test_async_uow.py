@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from eventbot.domain import Calendar, CalendarModifiedConcurrently
+from eventbot.infrastructure.memory import AsyncInMemoryCalendarUnitOfWork, InMemoryCalendarStore
+from eventbot.infrastructure.persistence import AsyncSQLCalendarUnitOfWork
+from eventbot.infrastructure.persistence.tables import outbox_table
+
+
+async def add_calendar_with_event(unit_of_work, fake_clock, fake_sequence_generator) -> str:
+    async with unit_of_work:
+        calendar = Calendar('test_guild', 'test_channel')
+        event_code = calendar.add_event('Wydarzenie jutro o 10', 'Alice#003', fake_clock, fake_sequence_generator,
+                                        unit_of_work.outbox('test_guild', 'test_channel'))
+        unit_of_work.calendars.add_calendar(calendar)
+        await unit_of_work.commit()
+    return event_code
+
+
+def test_calendar_is_loaded_with_events_and_declarations(sqlite_async_session_factory, fake_clock,
+                                                         fake_sequence_generator):
+    fake_clock.set_time(datetime(2022, 1, 1, 12))
+    unit_of_work = AsyncSQLCalendarUnitOfWork(sqlite_async_session_factory)
+
+    async def declare_and_reload():
+        event_code = await add_calendar_with_event(unit_of_work, fake_clock, fake_sequence_generator)
+        async with unit_of_work:
+            calendar = await unit_of_work.calendars.get_calendar_by_guild_and_channel('test_guild', 'test_channel')
+            calendar.declare_yes_to_event('Bob#002', event_code)
+            unit_of_work.calendars.add_calendar(calendar)
+            await unit_of_work.commit()
+        async with unit_of_work:
+            calendar = await unit_of_work.calendars.get_calendar_by_guild_and_channel('test_guild', 'test_channel')
+            declarations = set(calendar._events[event_code]._declarations)
+            version = calendar._version
+            schedule = await unit_of_work.calendars.get_notification_schedule()
+        async with sqlite_async_session_factory() as session:
+            outbox_keys = (await session.scalars(select(outbox_table.c.idempotency_key))).all()
+        return declarations, version, schedule, outbox_keys
+
+    declarations, version, schedule, outbox_keys = asyncio.run(declare_and_reload())
+    assert declarations == {'Alice#003', 'Bob#002'} and version == 2
+    assert [item.due_at for item in schedule] == [datetime(2022, 1, 2, 10)] and len(outbox_keys) == 1
+
+
+def test_concurrent_tasks_get_units_of_work_of_their_own(sqlite_async_session_factory, fake_clock,
+                                                         fake_sequence_generator):
+    fake_clock.set_time(datetime(2022, 1, 1, 12))
+    unit_of_work = AsyncSQLCalendarUnitOfWork(sqlite_async_session_factory)
+
+    async def declare(event_code: str, user_handle: str, loaded: asyncio.Barrier) -> None:
+        async with unit_of_work:
+            calendar = await unit_of_work.calendars.get_calendar_by_guild_and_channel('test_guild', 'test_channel')
+            await loaded.wait()
+            calendar.declare_yes_to_event(user_handle, event_code)
+            unit_of_work.calendars.add_calendar(calendar)
+            await unit_of_work.commit()
+
+    async def declare_concurrently():
+        event_code = await add_calendar_with_event(unit_of_work, fake_clock, fake_sequence_generator)
+        loaded = asyncio.Barrier(2)
+        return await asyncio.gather(declare(event_code, 'Bob#002', loaded), declare(event_code, 'John#004', loaded),
+                                    return_exceptions=True)
+
+    results = asyncio.run(declare_concurrently())
+    assert sorted(type(result).__name__ for result in results) == ['CalendarModifiedConcurrently', 'NoneType']
+
+
+def test_in_memory_unit_of_work_discards_rolled_back_changes(fake_clock, fake_sequence_generator):
+    fake_clock.set_time(datetime(2022, 1, 1, 12))
+    unit_of_work = AsyncInMemoryCalendarUnitOfWork(InMemoryCalendarStore())
+
+    async def delete_and_roll_back():
+        event_code = await add_calendar_with_event(unit_of_work, fake_clock, fake_sequence_generator)
+        async with unit_of_work:
+            calendar = await unit_of_work.calendars.get_calendar_by_guild_and_channel('test_guild', 'test_channel')
+            calendar.delete_event('Alice#003', event_code)
+            await unit_of_work.rollback()
+        async with unit_of_work:
+            return await unit_of_work.calendars.get_incoming_events('test_guild', 'test_channel')
+
+    assert len(asyncio.run(delete_and_roll_back())) == 1
+    with pytest.raises(Exception):
+        unit_of_work.calendars
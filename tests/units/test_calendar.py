@@ -2,9 +2,14 @@ from datetime import datetime, timedelta
 
 import pytest
 
+from eventbot.domain.enums import Decision
 from eventbot.domain import (
+    Calendar,
+    EventDeclaration,
+    EventParsingResult,
     UserNotPermittedToDeleteEvent,
     EventInThePast,
+    ParsingError,
     UserNotPermittedToSetReminderForEvent,
     EventNotFound,
     ReminderInThePast
@@ -78,6 +83,18 @@ def test_user_can_set_reminder_for_own_event_after_creation(fake_clock, calendar
     assert set(fake_notifier.notified_handles) == {'John#004', 'Jane#005'}
 
 
+def test_users_are_notified_in_order_of_declaring(fake_clock, calendar, fake_notifier, fake_sequence_generator):
+    fake_clock.set_time(datetime(2023, 6, 6, 12))
+    event_code = calendar.add_event('Test event 7.6.2023 o 12', 'Alice#003',
+                                    fake_clock, fake_sequence_generator, fake_notifier)
+    for user_handle in ['John#004', 'Bob#002', 'Jane#005', 'Admin#001']:
+        calendar.declare_yes_to_event(user_handle, event_code)
+    calendar.declare_no_to_event('Bob#002', event_code)
+    fake_clock.set_time(datetime(2023, 6, 7, 12))
+    calendar.send_pending_notifications(fake_clock, fake_notifier)
+    assert fake_notifier.notified_handles == ['Alice#003', 'John#004', 'Jane#005', 'Admin#001']
+
+
 def test_user_can_re_set_reminder_time(fake_clock, calendar, fake_notifier, fake_sequence_generator):
     fake_clock.set_time(datetime(2023, 6, 6, 12, 34, 52))
     event_code = calendar.add_event('Test event 7.6.2023 o 12, przypomnienie 2 godziny wcześniej', 'Alice#003',
@@ -150,3 +167,89 @@ def test_the_owner_is_notified_at_event_creation(fake_clock, fake_notifier, cale
                        fake_sequence_generator, fake_notifier)
     notified_handles = fake_notifier.notified_handles
     assert notified_handles == ['Alice#003', ]
+
+
+def test_event_draft_is_validated_before_calendar_is_touched(fake_clock):
+    fake_clock.set_time(datetime(2023, 4, 4, 14, 15))
+    with pytest.raises(EventInThePast):
+        Calendar.prepare_event(EventParsingResult('Test event', datetime(2023, 4, 3, 12)), 'Admin#001', fake_clock)
+    with pytest.raises(ReminderInThePast):
+        Calendar.prepare_event(EventParsingResult('Test event', datetime(2023, 4, 4, 15), timedelta(hours=1)),
+                               'Admin#001', fake_clock)
+
+
+def test_prepared_event_draft_is_added_to_calendar(fake_clock, fake_notifier, calendar, fake_sequence_generator):
+    fake_clock.set_time(datetime(2023, 4, 4, 14, 15))
+    event_draft = Calendar.prepare_event(EventParsingResult('Test event', datetime(2023, 4, 5, 12), timedelta(hours=1)),
+                                         'Alice#003', fake_clock)
+    event_code = calendar.add_event_draft(event_draft, fake_sequence_generator, fake_notifier)
+    calendar.declare_yes_to_event('Bob#002', event_code)
+    fake_clock.set_time(datetime(2023, 4, 5, 11, 1))
+    calendar.send_pending_notifications(fake_clock, fake_notifier)
+    assert event_code == 'tes-1' and set(fake_notifier.notified_handles) == {'Alice#003', 'Bob#002'}
+
+
+def test_events_are_imported_in_batch_with_errors_kept_per_line(fake_clock, calendar, fake_sequence_generator):
+    fake_clock.set_time(datetime(2023, 4, 4, 14, 15))
+    event_parsing_results = [
+        EventParsingResult('Liga', datetime(2023, 4, 5, 20)),
+        ParsingError('Nic tu nie ma'),
+        EventParsingResult('Test event', datetime(2023, 4, 3, 12)),
+        EventParsingResult('Turniej', datetime(2023, 4, 6, 18), timedelta(hours=1)),
+    ]
+    event_drafts = Calendar.prepare_events(event_parsing_results, 'Alice#003', fake_clock)
+    results = calendar.add_events(event_drafts, fake_sequence_generator)
+    assert results[0] == 'lig-1' and results[3] == 'tur-2'
+    assert isinstance(results[1], ParsingError) and isinstance(results[2], EventInThePast)
+
+
+def test_import_in_which_every_line_failed_does_not_change_calendar(fake_clock, calendar, fake_sequence_generator):
+    fake_clock.set_time(datetime(2023, 4, 4, 14, 15))
+    event_parsing_results = [ParsingError('Nic tu nie ma'), EventParsingResult('Test event', datetime(2023, 4, 3, 12))]
+    event_drafts = Calendar.prepare_events(event_parsing_results, 'Alice#003', fake_clock)
+    results = calendar.add_events(event_drafts, fake_sequence_generator)
+    assert all(isinstance(result, Exception) for result in results) and calendar._version == 0
+
+
+def test_changed_declarations_are_counted_once(fake_clock, fake_notifier, calendar, fake_sequence_generator):
+    fake_clock.set_time(datetime(2023, 4, 4, 14, 15))
+    event_code = calendar.add_event('Test event 5.04.2023 o 12', 'Alice#003', fake_clock,
+                                    fake_sequence_generator, fake_notifier)
+    calendar.declare_yes_to_event('Bob#002', event_code)
+    calendar.declare_no_to_event('Bob#002', event_code)
+    calendar.declare_maybe_to_event('John#004', event_code)
+    calendar.declare_maybe_to_event('John#004', event_code)
+    event = calendar._events[event_code]
+    assert [event.count_declarations(decision) for decision in Decision] == [1, 1, 1]
+    fake_clock.set_time(datetime(2023, 4, 5, 12))
+    calendar.send_pending_notifications(fake_clock, fake_notifier)
+    assert set(fake_notifier.notified_handles) == {'Alice#003', 'John#004'}
+
+
+def test_calendar_exposes_next_due_instant_and_is_not_changed_by_idle_sweep(fake_clock, fake_notifier, calendar,
+                                                                            fake_sequence_generator):
+    fake_clock.set_time(datetime(2023, 4, 4, 14, 15))
+    calendar.add_event('Test event 6.04.2023 o 12', 'Alice#003', fake_clock, fake_sequence_generator, fake_notifier)
+    event_code = calendar.add_event('Test event 5.04.2023 o 18', 'Alice#003', fake_clock,
+                                    fake_sequence_generator, fake_notifier)
+    calendar.set_reminder_for_event('Alice#003', event_code, timedelta(hours=1))
+    assert calendar.next_due_at == datetime(2023, 4, 5, 17)
+    version = calendar._version
+    calendar.send_pending_notifications(fake_clock, fake_notifier)
+    assert calendar._version == version
+    calendar.delete_event('Alice#003', event_code)
+    assert calendar.next_due_at == datetime(2023, 4, 6, 12)
+
+
+def test_batched_declarations_are_applied_in_order(fake_clock, fake_notifier, calendar, fake_sequence_generator):
+    fake_clock.set_time(datetime(2023, 4, 4, 14, 15))
+    event_code = calendar.add_event('Test event 5.04.2023 o 12', 'Alice#003', fake_clock,
+                                    fake_sequence_generator, fake_notifier)
+    version = calendar._version
+    errors = calendar.apply_declarations([
+        EventDeclaration('Bob#002', event_code, Decision.YES),
+        EventDeclaration('John#004', 'xyz-9', Decision.YES),
+        EventDeclaration('Bob#002', event_code, Decision.NO),
+    ])
+    assert errors[0] is None and isinstance(errors[1], EventNotFound) and errors[2] is None
+    assert calendar._events[event_code].count_declarations(Decision.NO) == 1 and calendar._version == version + 1
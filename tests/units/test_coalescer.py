@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from eventbot.domain import EventDeclaration, EventNotFound
+from eventbot.domain.enums import Decision
+from eventbot.infrastructure.discord.coalescer import DeclarationCoalescer
+from eventbot.infrastructure.retry import ConflictRetry
+
+
+def test_declarations_for_same_calendar_are_applied_in_one_batch():
+    coalescer = DeclarationCoalescer(None, ConflictRetry(), window=0.01)
+    batches = []
+
+    def apply(key, declarations):
+        batches.append((key, declarations))
+        return [EventNotFound(declaration.event_code) if declaration.event_code == 'xyz-9' else None
+                for declaration in declarations]
+
+    coalescer._apply = apply
+
+    async def click_all():
+        return await asyncio.gather(
+            coalescer.declare('guild', 'channel', EventDeclaration('Bob#002', 'tes-1', Decision.YES)),
+            coalescer.declare('guild', 'channel', EventDeclaration('John#004', 'xyz-9', Decision.NO)),
+            coalescer.declare('guild', 'other', EventDeclaration('Bob#002', 'tes-2', Decision.MAYBE)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(click_all())
+    assert results[0] is None and isinstance(results[1], EventNotFound) and results[2] is None
+    assert [len(declarations) for _, declarations in batches] == [2, 1] and coalescer.stats() == (2, 3)
+
+
+def test_failed_batch_fails_every_declaration_in_it():
+    coalescer = DeclarationCoalescer(None, ConflictRetry(), window=0.01)
+
+    def apply(key, declarations):
+        raise ConnectionError('Database is down')
+
+    coalescer._apply = apply
+
+    async def click():
+        await coalescer.declare('guild', 'channel', EventDeclaration('Bob#002', 'tes-1', Decision.YES))
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(click())
+
+
+def test_cancelled_declaration_does_not_keep_others_in_batch_waiting():
+    coalescer = DeclarationCoalescer(None, ConflictRetry(), window=0.01)
+    batches = []
+
+    def apply(key, declarations):
+        batches.append(declarations)
+        return [None] * len(declarations)
+
+    coalescer._apply = apply
+
+    async def click_and_cancel():
+        cancelled = asyncio.create_task(
+            coalescer.declare('guild', 'channel', EventDeclaration('Bob#002', 'tes-1', Decision.YES))
+        )
+        kept = asyncio.create_task(
+            coalescer.declare('guild', 'channel', EventDeclaration('John#004', 'tes-1', Decision.NO))
+        )
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await asyncio.wait_for(kept, 1)
+
+    assert asyncio.run(click_and_cancel()) is None
+    assert [len(declarations) for declarations in batches] == [2] and coalescer.stats() == (1, 2)
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from eventbot.domain import Calendar, CalendarModifiedConcurrently
+from eventbot.domain.enums import NotificationKind
+from eventbot.infrastructure.memory import InMemoryCalendarStore, InMemoryCalendarUnitOfWork, InMemoryOutbox
+
+
+def add_calendar_with_event(store, fake_clock, fake_sequence_generator, fake_notifier):
+    calendar = Calendar('test_guild', 'test_channel')
+    with InMemoryCalendarUnitOfWork(store) as unit_of_work:
+        event_code = calendar.add_event('Test event, 12 grudnia 2023 o 22', 'Alice#003',
+                                        fake_clock, fake_sequence_generator, fake_notifier)
+        unit_of_work.calendars.add_calendar(calendar)
+        unit_of_work.commit()
+    return event_code
+
+
+def test_committed_calendar_is_a_copy_of_the_one_in_unit_of_work(fake_clock, fake_sequence_generator, fake_notifier):
+    store = InMemoryCalendarStore()
+    event_code = add_calendar_with_event(store, fake_clock, fake_sequence_generator, fake_notifier)
+    with InMemoryCalendarUnitOfWork(store) as unit_of_work:
+        calendar = unit_of_work.calendars.get_calendar_by_guild_and_channel('test_guild', 'test_channel')
+        calendar.declare_yes_to_event('Bob#002', event_code)
+        unit_of_work.commit()
+        calendar.declare_no_to_event('John#004', event_code)
+    with InMemoryCalendarUnitOfWork(store) as unit_of_work:
+        calendar = unit_of_work.calendars.get_calendar_by_guild_and_channel('test_guild', 'test_channel')
+        assert set(calendar._events[event_code]._declarations) == {'Alice#003', 'Bob#002'}
+        assert unit_of_work.calendars.does_calendar_exist('test_guild', 'other_channel') is False
+        with pytest.raises(KeyError):
+            unit_of_work.calendars.get_calendar_by_guild_and_channel('test_guild', 'other_channel')
+
+
+def test_rolled_back_changes_are_discarded(fake_clock, fake_sequence_generator, fake_notifier):
+    store = InMemoryCalendarStore()
+    event_code = add_calendar_with_event(store, fake_clock, fake_sequence_generator, fake_notifier)
+    with InMemoryCalendarUnitOfWork(store) as unit_of_work:
+        calendar = unit_of_work.calendars.get_calendar_by_guild_and_channel('test_guild', 'test_channel')
+        calendar.delete_event('Alice#003', event_code)
+        unit_of_work.outbox('test_guild', 'test_channel').notify_event_start('Test event', event_code, [])
+        unit_of_work.rollback()
+    with InMemoryCalendarUnitOfWork(store) as unit_of_work:
+        assert [str(event.code) for event in unit_of_work.calendars.get_incoming_events('test_guild', 'test_channel')] \
+               == [event_code]
+    assert InMemoryOutbox(store).claim(10, timedelta(minutes=1), 5) == []
+
+
+def test_calendar_changed_concurrently_is_not_committed(fake_clock, fake_sequence_generator, fake_notifier):
+    store = InMemoryCalendarStore()
+    event_code = add_calendar_with_event(store, fake_clock, fake_sequence_generator, fake_notifier)
+    with InMemoryCalendarUnitOfWork(store) as first, InMemoryCalendarUnitOfWork(store) as second:
+        first.calendars.get_calendar_by_guild_and_channel('test_guild', 'test_channel')\
+            .declare_yes_to_event('Bob#002', event_code)
+        second.calendars.get_calendar_by_guild_and_channel('test_guild', 'test_channel')\
+            .declare_no_to_event('John#004', event_code)
+        first.commit()
+        with pytest.raises(CalendarModifiedConcurrently):
+            second.commit()
+    with InMemoryCalendarUnitOfWork(store) as unit_of_work:
+        calendar = unit_of_work.calendars.get_calendar_by_guild_and_channel('test_guild', 'test_channel')
+        assert set(calendar._events[event_code]._declarations) == {'Alice#003', 'Bob#002'}
+
+
+def test_snapshot_restores_calendars_sequence_and_outbox(tmp_path, fake_clock, fake_notifier):
+    snapshot_path = str(tmp_path / 'calendars.pickle')
+    store = InMemoryCalendarStore(snapshot_path)
+    calendar = Calendar('test_guild', 'test_channel')
+    with InMemoryCalendarUnitOfWork(store) as unit_of_work:
+        event_code = calendar.add_event('Test event, 12 grudnia 2023 o 22', 'Alice#003', fake_clock,
+                                        unit_of_work.event_sequence_generator,
+                                        unit_of_work.outbox('test_guild', 'test_channel'))
+        unit_of_work.calendars.add_calendar(calendar)
+        unit_of_work.commit()
+
+    restored = InMemoryCalendarStore(snapshot_path)
+    with InMemoryCalendarUnitOfWork(restored) as unit_of_work:
+        assert unit_of_work.calendars.get_notification_schedule()[0].due_at == datetime(2023, 12, 12, 22)
+        assert unit_of_work.event_sequence_generator.take(2) == [2, 3]
+    messages = InMemoryOutbox(restored).claim(10, timedelta(minutes=1), 5)
+    assert [(message.kind, message.payload['event_code']) for message in messages] \
+           == [(NotificationKind.EVENT_CREATED, event_code)]
@@ -0,0 +1,27 @@
+import asyncio
+from datetime import timedelta
+
+from eventbot.domain.enums import NotificationKind
+from eventbot.infrastructure.outbox import OutboxDispatcher
+from eventbot.infrastructure.persistence.outbox import OutboxMessage
+
+from tests.fakes import FakeOutbox
+
+
+def create_message(message_id: int) -> OutboxMessage:
+    return OutboxMessage(message_id, f'EVENT_START:tes-{message_id}', NotificationKind.EVENT_START,
+                         'test_guild', 'test_channel', {'event_code': f'tes-{message_id}'}, 0)
+
+
+def test_failed_messages_are_retried_with_backoff_until_the_last_attempt():
+    outbox = FakeOutbox([create_message(1), create_message(2)])
+
+    async def deliver(message: OutboxMessage) -> None:
+        if message.id == 2:
+            raise ConnectionError('Discord is down')
+
+    dispatcher = OutboxDispatcher(outbox, deliver, max_attempts=3, retry_delay=timedelta(seconds=5))
+    claimed = [asyncio.run(dispatcher.drain()) for _ in range(4)]
+    assert claimed == [2, 1, 1, 0] and outbox.delivered_ids == [1]
+    assert outbox.retry_delays[2] == [timedelta(seconds=5), timedelta(seconds=10), timedelta(seconds=20)]
+    assert dispatcher.stats() == (1, 2, 1, 0)
@@ -1,149 +1,426 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-
-
-from eventbot.domain.services.parser.polish import PolishParser
-from tests.fakes import FakeClock
+from itertools import accumulate
+from threading import Event
+
+import pytest
+
+from eventbot.domain import CalendarLanguage, EventParsingResult, ParsingError, ParsingTimeout, get_parser
+from eventbot.domain.services.parser.cache import ParseCache, CachingParser
+from eventbot.domain.services.parser.instrumentation import SlowPromptSampler
+from eventbot.domain.services.parser.registry import ParserRegistry
+from eventbot.domain.services.parser.snapshot import load_snapshot
+from eventbot.domain.services.parser.matcher import PatternMatcher
+from eventbot.domain.services.parser.polish import (
+    PolishParser,
+    Tag,
+    AMBIGUOUS_DATE_PATTERNS,
+    AMBIGUOUS_TIME_PATTERNS,
+    REMINDER_PATTERNS,
+    UNEQUIVOCAL_DATE_PATTERNS,
+    UNEQUIVOCAL_TIME_PATTERNS,
+    remove_trailing_separator,
+)
+from eventbot.infrastructure.parsing import PooledParser, create_pooled_parser
+from benchmarks.corpus import build_corpus
 
 
 def test_event_name_is_parsed_correctly():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Konferencja głosowa o zgłoszeniach na Google Meet, jutro o ósmej trzydzieści pięć po południu')
+    parser = PolishParser()
+    result = parser('Konferencja głosowa o zgłoszeniach na Google Meet, jutro o ósmej trzydzieści pięć po południu',
+                    now=datetime(2023, 8, 10))
     assert result.name == 'Konferencja głosowa o zgłoszeniach na Google Meet'
 
 
 def test_pattern_next_day_with_pm():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Konferencja głosowa na Google Meet. Jutro o ósmej trzydzieści pięć po południu')
+    parser = PolishParser()
+    result = parser('Konferencja głosowa na Google Meet. Jutro o ósmej trzydzieści pięć po południu',
+                    now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 11, 20, 35)
 
 
 def test_pattern_next_day_with_24_clock_format():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Granie w Dotę jutro o 21:37')
+    parser = PolishParser()
+    result = parser('Granie w Dotę jutro o 21:37', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 11, 21, 37)
 
 
 def test_pattern_next_week_with_single_numeral_as_hour():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Spotkanie na głosowym za tydzień o 20')
+    parser = PolishParser()
+    result = parser('Spotkanie na głosowym za tydzień o 20', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 17, 20)
 
 
 def test_pattern_next_two_days_with_morning():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Telefon pojutrze o 8 rano')
+    parser = PolishParser()
+    result = parser('Telefon pojutrze o 8 rano', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 12, 8)
 
 
 def test_pattern_hour_expressed_as_two_natural_words():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Ważne wydarzenie, jutro o dwudziestej pierwszej')
+    parser = PolishParser()
+    result = parser('Ważne wydarzenie, jutro o dwudziestej pierwszej', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 11, 21)
 
 
 def test_pattern_hour_and_minutes_expressed_as_two_natural_words():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Ważne wydarzenie, jutro o dwudziestej jeden')
+    parser = PolishParser()
+    result = parser('Ważne wydarzenie, jutro o dwudziestej jeden', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 11, 20, 1)
 
 
 def test_pattern_month_name_full_date():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Spotkanie biznesowe 19 września 2023 o 14')
+    parser = PolishParser()
+    result = parser('Spotkanie biznesowe 19 września 2023 o 14', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 9, 19, 14)
 
 
 def test_pattern_explicit_date_dotted_format():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Kurs angielskiego 20.08.2023, 10.30')
+    parser = PolishParser()
+    result = parser('Kurs angielskiego 20.08.2023, 10.30', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 20, 10, 30)
 
 
 def test_pattern_explicit_date_slash_format():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Kurs angielskiego 20/8/2023 10:30')
+    parser = PolishParser()
+    result = parser('Kurs angielskiego 20/8/2023 10:30', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 20, 10, 30)
 
 
 def test_pattern_month_as_word():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Kurs angielskiego 20 sierpnia 10:30')
+    parser = PolishParser()
+    result = parser('Kurs angielskiego 20 sierpnia 10:30', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 20, 10, 30)
 
 
 def test_pattern_weekday_name():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Impreza w sobotę o dwudziestej pierwszej')
+    parser = PolishParser()
+    result = parser('Impreza w sobotę o dwudziestej pierwszej', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 12, 21)
 
 
 def test_pattern_next_weekday():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Impreza w następną sobotę o 21')
+    parser = PolishParser()
+    result = parser('Impreza w następną sobotę o 21', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 19, 21)
 
 
 def test_pattern_weekday_next_week():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Impreza w sobotę za tydzień o 21')
+    parser = PolishParser()
+    result = parser('Impreza w sobotę za tydzień o 21', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 19, 21)
 
 
 def test_pattern_weekday_next_week_reversed():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Impreza za tydzień w sobotę o 21:00')
+    parser = PolishParser()
+    result = parser('Impreza za tydzień w sobotę o 21:00', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 19, 21)
 
 
 def test_pattern_weekday_in_count_weeks():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Impreza w sobotę za 2 tygodnie o 21:00')
+    parser = PolishParser()
+    result = parser('Impreza w sobotę za 2 tygodnie o 21:00', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 26, 21)
 
 
 def test_pattern_weekday_in_count_weeks_reverse():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Impreza o 21:00 za dwa tygodnie w sobotę')
+    parser = PolishParser()
+    result = parser('Impreza o 21:00 za dwa tygodnie w sobotę', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 8, 26, 21)
 
 
 def test_as_many_digits_as_possible():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Start nocnej zmiany, 31.12.2023 23:45')
+    parser = PolishParser()
+    result = parser('Start nocnej zmiany, 31.12.2023 23:45', now=datetime(2023, 8, 10))
     assert result.time == datetime(2023, 12, 31, 23, 45)
 
 
 def test_parsing_reminder_count_units():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Wydarzenie za pojutrze o 15, z przypomnieniem 10 minut przed')
+    parser = PolishParser()
+    result = parser('Wydarzenie za pojutrze o 15, z przypomnieniem 10 minut przed', now=datetime(2023, 8, 10))
     assert result.reminder_delta == timedelta(minutes=10) and result.time == datetime(2023, 8, 12, 15)
 
 
 def test_parsing_reminder_single_unit():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10)))
-    result = parser('Wydarzenie jutro o drugiej po południu. Przypomnij mi godzinę wcześniej')
+    parser = PolishParser()
+    result = parser('Wydarzenie jutro o drugiej po południu. Przypomnij mi godzinę wcześniej',
+                    now=datetime(2023, 8, 10))
     assert result.reminder_delta == timedelta(hours=1) and result.time == datetime(2023, 8, 11, 14)
 
 
 def test_parsing_pattern_today():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 20, 16)))
-    result = parser('Konferencja dziś o 20')
+    parser = PolishParser()
+    result = parser('Konferencja dziś o 20', now=datetime(2023, 8, 20, 16))
     assert result.time == datetime(2023, 8, 20, 20)
 
 
 def test_parsing_pattern_today_different():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 20, 16)))
-    result = parser('Konferencja dzisiaj o 20')
+    parser = PolishParser()
+    result = parser('Konferencja dzisiaj o 20', now=datetime(2023, 8, 20, 16))
     assert result.time == datetime(2023, 8, 20, 20)
 
 
 def test_parsing_pattern_today_implicit():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 10, 16)))
-    result = parser('Spotkanie o 20')
+    parser = PolishParser()
+    result = parser('Spotkanie o 20', now=datetime(2023, 8, 10, 16))
     assert result.time == datetime(2023, 8, 10, 20)
 
 
 def test_parsing_pattern_next_weekday_same_weekday():
-    parser = PolishParser(FakeClock(datetime(2023, 8, 19, 19)))
-    result = parser('Gierki w następną sobotę o 21')
+    parser = PolishParser()
+    result = parser('Gierki w następną sobotę o 21', now=datetime(2023, 8, 19, 19))
     assert result.time == datetime(2023, 8, 26, 21)
+
+
+def test_normalization_applies_vocabularies_in_single_pass():
+    normalized = PolishParser._normalize('Dodaj spotkanie w sobotę, przypomnij dwa dni wcześniej')
+    assert normalized == 'spotkanie at saturday remind 2 days before'
+
+
+def test_normalization_rewrites_relative_time_words():
+    normalized = PolishParser._normalize('Pojutrze o ósmej rano')
+    assert normalized == 'day after next day at osmej am'
+
+
+def test_numeric_token_tags_are_taken_from_lookup_table():
+    token = PolishParser._make_token('12')
+    assert token.tags == Tag.SCALAR | Tag.SCALAR_DAY | Tag.SCALAR_MONTH | Tag.SCALAR_HOUR | Tag.SCALAR_MINUTE
+
+
+def test_ordinal_token_is_converted_to_number_with_tags():
+    token = PolishParser._make_token('dwudziestej')
+    assert token.word == '20' and token.tags == Tag.ORDINAL | Tag.ORDINAL_FEM | Tag.ORDINAL_HOUR
+
+
+def test_pattern_matcher_prefers_pattern_order_over_position():
+    matcher = PatternMatcher({
+        'hour-minute': (Tag.SCALAR_HOUR, Tag.SCALAR_MINUTE),
+        'separator-hour': (Tag.SEPARATOR, Tag.SCALAR_HOUR),
+    })
+    tags = [Tag.SEPARATOR, Tag.SCALAR_HOUR, Tag.SCALAR_HOUR | Tag.SCALAR_MINUTE]
+    assert matcher.match(tags) == ('hour-minute', 1, 3)
+
+
+def test_token_cache_counts_vocabulary_hits_and_misses():
+    hits, misses, _ = PolishParser.token_cache_info()
+    PolishParser._tokenize(PolishParser.NORMALIZER.words('spotkanie o 20 pm'))
+    info = PolishParser.token_cache_info()
+    assert info.hits - hits == 3 and info.misses - misses == 1
+
+
+def test_parse_cache_reuses_result_for_same_prompt_on_same_day():
+    parser = CachingParser(PolishParser(), ParseCache())
+    parser('Impreza w sobotę o 21', now=datetime(2023, 8, 10, 9))
+    result = parser('Impreza w sobotę o 21', now=datetime(2023, 8, 10, 21))
+    assert result.time == datetime(2023, 8, 12, 21) and parser.cache.info().hits == 1
+
+
+def test_parse_cache_resolves_relative_dates_again_on_next_day():
+    parser = CachingParser(PolishParser(), ParseCache())
+    parser('Impreza w sobotę o 21', now=datetime(2023, 8, 11, 9))
+    result = parser('Impreza w sobotę o 21', now=datetime(2023, 8, 12, 9))
+    assert result.time == datetime(2023, 8, 19, 21) and parser.cache.info().hits == 0
+
+
+def test_disabled_parse_cache_stores_nothing():
+    cache = ParseCache(maxsize=0)
+    CachingParser(PolishParser(), cache)('Granie w Dotę jutro o 21:37', now=datetime(2023, 8, 10))
+    assert cache.info().size == 0
+
+
+def test_event_name_is_sliced_up_to_its_last_word():
+    parser = PolishParser()
+    result = parser('Granie w Dotę!!! jutro o 21:37', now=datetime(2023, 8, 10))
+    assert result.name == 'Granie w Dotę!!'
+
+
+def test_event_name_keeps_its_brackets_and_loses_one_trailing_separator():
+    parser = PolishParser()
+    assert parser('Urodziny Ani. (ważne). jutro o 20', now=datetime(2023, 8, 10)).name == 'Urodziny Ani. (ważne)'
+    assert parser('(Liga) jutro o 20', now=datetime(2023, 8, 10)).name == '(Liga)'
+    assert parser('Mecz) jutro o 20', now=datetime(2023, 8, 10)).name == 'Mecz'
+
+
+def test_punctuation_standing_apart_from_event_name_is_left_out():
+    parser = PolishParser()
+    assert parser('SESJA RPG ... dziś o ósmej rano', now=datetime(2023, 8, 10)).name == 'SESJA RPG'
+    assert parser('DODAJ PRÓBĘ ZESPOŁU, ,, za dwa tygodnie w niedzielę o 20',
+                  now=datetime(2023, 8, 10)).name == 'DODAJ PRÓBĘ ZESPOŁU'
+    assert parser(', Spotkanie jutro o 20', now=datetime(2023, 8, 10)).name == 'Spotkanie'
+
+
+# Name extraction as it was before the spans of words were recorded: the shortest prefix of the prompt
+# normalized into the first untagged token
+def seek_name_by_prefix_chains(reduced_tokens, text):
+    for token in [token for token in reduced_tokens if not token.tags]:
+        for chain in accumulate(text.split(' '), func=lambda x, y: ' '.join((x, y))):
+            if token.word == PolishParser._normalize(chain).strip():
+                return remove_trailing_separator(chain)
+    raise ParsingError(text)
+
+
+def test_event_names_are_sliced_as_by_prefix_chains_on_corpus():
+    parser = PolishParser()
+    for prompt in build_corpus(size=2000):
+        reduced_tokens = PolishParser._reduce(PolishParser._tokenize(PolishParser.NORMALIZER.words(prompt.text)))
+        assert parser._seek_name(reduced_tokens, prompt.text) == \
+            seek_name_by_prefix_chains(reduced_tokens, prompt.text), prompt.text
+
+
+
+def test_parser_instance_is_shared_per_language():
+    parser = get_parser(CalendarLanguage.PL)
+    first = parser('Granie w Dotę jutro o 21:37', now=datetime(2023, 8, 10))
+    second = get_parser(CalendarLanguage.PL)('Granie w Dotę jutro o 21:37', now=datetime(2023, 8, 11))
+    assert parser is get_parser(CalendarLanguage.PL) and first.time == datetime(2023, 8, 11, 21, 37) \
+        and second.time == datetime(2023, 8, 12, 21, 37)
+
+
+def test_corpus_covers_every_pattern():
+    patterns = {**AMBIGUOUS_DATE_PATTERNS, **AMBIGUOUS_TIME_PATTERNS, **REMINDER_PATTERNS,
+                **UNEQUIVOCAL_DATE_PATTERNS, **UNEQUIVOCAL_TIME_PATTERNS}
+    assert {prompt.pattern for prompt in build_corpus(size=len(patterns))} == set(patterns)
+
+
+def test_caching_parser_matches_polish_parser_on_corpus():
+    parser = PolishParser()
+    caching_parser = CachingParser(PolishParser(), ParseCache())
+    for prompt in build_corpus(size=500) * 2:
+        try:
+            expected = parser(prompt.text, prompt.now)
+        except Exception as e:
+            expected = type(e)
+        try:
+            actual = caching_parser(prompt.text, prompt.now)
+        except Exception as e:
+            actual = type(e)
+        assert actual == expected, prompt
+
+
+def test_instrumented_parser_reports_each_stage():
+    sampler = SlowPromptSampler(threshold=0)
+    parser = PolishParser()
+    parser.instrument(sampler)
+    parser('Granie w Dotę jutro o 21:37', now=datetime(2023, 8, 10))
+    assert [stage for stage, _ in sampler.samples()[0].stages] == [
+        'normalize', 'tokenize', 'reduce', 'seek_reminder_delta', 'seek_date_unequivocal', 'seek_time_unequivocal',
+        'seek_date_ambiguous', 'seek_name'
+    ]
+
+
+def test_slow_prompt_sampler_keeps_only_prompts_over_threshold():
+    sampler = SlowPromptSampler(threshold=60)
+    parser = PolishParser()
+    parser.instrument(sampler)
+    parser('Granie w Dotę jutro o 21:37', now=datetime(2023, 8, 10))
+    assert sampler.samples() == [] and sampler.stats()['normalize'].count == 1
+
+
+def test_registry_imports_parser_registered_by_path_on_first_use():
+    registry = ParserRegistry()
+    registry.register_path(CalendarLanguage.PL, 'eventbot.domain.services.parser.polish:PolishParser')
+    parser = registry.get(CalendarLanguage.PL)
+    result = parser('Granie w Dotę jutro o 21:37', now=datetime(2023, 8, 10))
+    assert registry.get(CalendarLanguage.PL) is parser and result.time == datetime(2023, 8, 11, 21, 37)
+
+
+def test_snapshot_is_rebuilt_only_when_sources_change(tmp_path):
+    source = tmp_path / 'vocabulary.py'
+    source.write_text('WORDS = 1')
+    builds = []
+
+    def build():
+        builds.append(len(builds))
+        return {'words': len(builds)}
+
+    first = load_snapshot('vocabulary', [str(source)], build)
+    second = load_snapshot('vocabulary', [str(source)], build)
+    source.write_text('WORDS = 2')
+    third = load_snapshot('vocabulary', [str(source)], build)
+    assert first == second == {'words': 1} and third == {'words': 2}
+
+
+def test_misspelled_vocabulary_words_are_recognized():
+    parser = PolishParser()
+    now = datetime(2023, 8, 10)
+    assert parser('Spotkanie w piontek o 20', now=now).time == datetime(2023, 8, 11, 20)
+    assert parser('Spotkanie 5 grudnai o 20', now=now).time == datetime(2023, 12, 5, 20)
+    assert parser('Granie jutor o 21', now=now).time == datetime(2023, 8, 11, 21)
+
+
+def test_misspelling_close_to_words_of_different_meaning_is_not_recognized():
+    assert PolishParser._normalize('Spotkanie za 2 godzinr', fuzzy=True) == 'spotkanie in 2 godzinr'
+
+
+def test_words_of_event_name_are_not_taken_for_misspellings():
+    parser = PolishParser()
+    now = datetime(2023, 8, 10)
+    assert parser('Spotkanie z Marią jutro o 20', now=now).name == 'Spotkanie z Marią'
+    assert parser('Obiad u mama jutro o 20', now=now).name == 'Obiad u mama'
+    assert parser('Spotkanie z Marią o 20', now=now).name == 'Spotkanie z Marią'
+
+
+def test_words_of_event_name_close_to_vocabulary_words_are_kept():
+    parser = PolishParser()
+    now = datetime(2023, 8, 10)
+    assert parser('Grill u Marka jutor o 18', now=now) == EventParsingResult('Grill u Marka', datetime(2023, 8, 11, 18))
+    assert parser('Obiad z Marią w piontek o 20', now=now) == \
+        EventParsingResult('Obiad z Marią', datetime(2023, 8, 11, 20))
+    assert parser('Obiad z Marią w środę o 20', now=now) == \
+        EventParsingResult('Obiad z Marią', datetime(2023, 8, 16, 20))
+    assert parser('Grill u Marka 5 grudnai o 18', now=now) == \
+        EventParsingResult('Grill u Marka', datetime(2023, 12, 5, 18))
+
+
+def test_prompt_with_misspelling_is_parsed_in_one_pass():
+    sampler = SlowPromptSampler(threshold=0)
+    parser = PolishParser()
+    parser.instrument(sampler)
+    parser('Spotkanie z Marią w piontek o 20', now=datetime(2023, 8, 10))
+    stages = [stage for stage, _ in sampler.samples()[0].stages]
+    assert len(stages) == len(set(stages))
+
+
+def test_first_word_of_prompt_is_not_taken_for_misspelling():
+    parser = PolishParser()
+    result = parser('Robota w sobotę o 8', now=datetime(2023, 8, 10))
+    assert result.name == 'Robota' and result.time == datetime(2023, 8, 12, 8)
+
+
+def test_pooled_parser_parses_off_the_event_loop():
+    parser = create_pooled_parser(CalendarLanguage.PL, 'thread', workers=2, timeout=5, parse_cache_size=0)
+    result = asyncio.run(parser.parse('Granie w Dotę jutro o 21:37', now=datetime(2023, 8, 10)))
+    parser.shutdown()
+    assert result.time == datetime(2023, 8, 11, 21, 37) and parser.stats().queue_depth == 0
+
+
+def test_pooled_parser_times_out_when_pool_is_saturated():
+    executor = ThreadPoolExecutor(max_workers=1)
+    gate = Event()
+    executor.submit(gate.wait)
+    parser = PooledParser(CalendarLanguage.PL, executor, workers=1, timeout=0.05)
+    with pytest.raises(ParsingTimeout):
+        asyncio.run(parser.parse('Granie w Dotę jutro o 21:37', now=datetime(2023, 8, 10)))
+    gate.set()
+    executor.shutdown()
+    assert parser.stats().timeouts == 1 and parser.stats().queue_depth == 0
+
+
+def test_batch_timeout_does_not_grow_with_number_of_lines():
+    executor = ThreadPoolExecutor(max_workers=1)
+    gate = Event()
+    executor.submit(gate.wait)
+    parser = PooledParser(CalendarLanguage.PL, executor, workers=1, timeout=1, batch_timeout=0.05)
+    with pytest.raises(ParsingTimeout) as error:
+        asyncio.run(parser.parse_batch_async(['Granie jutro o 21'] * 50, now=datetime(2023, 8, 10)))
+    gate.set()
+    executor.shutdown()
+    assert error.value.timeout == 0.05
+
+
+def test_batch_keeps_errors_of_failed_lines_in_place():
+    results = PolishParser().parse_batch(['Granie jutro o 21', 'Nic tu nie ma', 'Liga w piątek o 20'],
+                                         now=datetime(2023, 8, 10))
+    assert results[0].time == datetime(2023, 8, 11, 21) and isinstance(results[1], ParsingError)
+    assert results[2].time == datetime(2023, 8, 11, 20)
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from eventbot.domain import Calendar
+from eventbot.domain.enums import NotificationKind
+from eventbot.infrastructure.persistence import SQLCalendarUnitOfWork, SQLRetention, RetentionMode
+from eventbot.infrastructure.persistence.tables import event_table, declaration_table, event_archive_table,\
+    outbox_table
+
+
+def add_finished_events(session_factory, fake_clock, fake_sequence_generator, fake_notifier) -> None:
+    fake_clock.set_time(datetime(2022, 1, 1, 12))
+    with SQLCalendarUnitOfWork(session_factory) as unit_of_work:
+        calendar = Calendar('test_guild', 'test_channel')
+        for prompt in ['Wydarzenie 1 jutro o 10', 'Wydarzenie 2 jutro o 12', 'Wydarzenie 3 za tydzień o 12']:
+            calendar.add_event(prompt, 'testuser', fake_clock, fake_sequence_generator, fake_notifier)
+        unit_of_work.calendars.add_calendar(calendar)
+        unit_of_work.commit()
+
+
+def add_outbox_messages(session_factory, delivered_at_times) -> None:
+    with session_factory() as session:
+        for i, delivered_at in enumerate(delivered_at_times):
+            session.execute(insert(outbox_table).values(
+                idempotency_key=f'EVENT_START:tes-{i}', kind=NotificationKind.EVENT_START, guild_handle='test_guild',
+                channel_handle='test_channel', payload={}, delivered_at=delivered_at
+            ))
+        session.commit()
+
+
+def count_rows(session_factory, table) -> int:
+    with session_factory() as session:
+        return session.scalar(select(func.count()).select_from(table))
+
+
+def test_retention_runs_in_batches_until_one_is_empty(sqlite_session_factory, fake_clock,
+                                                      fake_sequence_generator, fake_notifier):
+    add_finished_events(sqlite_session_factory, fake_clock, fake_sequence_generator, fake_notifier)
+    add_outbox_messages(sqlite_session_factory, [datetime(2022, 1, 1), datetime(2022, 1, 2), datetime(2022, 1, 9),
+                                                 None])
+    batches = []
+    retention = SQLRetention(sqlite_session_factory, RetentionMode.ARCHIVE, timedelta(days=1), batch_size=1)
+    report = retention.run(datetime(2022, 1, 5), batches.append)
+    assert [(batch.events, batch.declarations, batch.outbox_messages) for batch in batches] == \
+        [(1, 1, 0), (1, 1, 0), (0, 0, 1), (0, 0, 1)]
+    assert (report.events, report.declarations, report.outbox_messages) == (2, 2, 2)
+    assert count_rows(sqlite_session_factory, event_table) == 1 \
+        and count_rows(sqlite_session_factory, declaration_table) == 1 \
+        and count_rows(sqlite_session_factory, event_archive_table) == 2 \
+        and count_rows(sqlite_session_factory, outbox_table) == 2
+
+
+def test_retention_run_after_finished_one_finds_nothing_to_retain(sqlite_session_factory, fake_clock,
+                                                                   fake_sequence_generator, fake_notifier):
+    add_finished_events(sqlite_session_factory, fake_clock, fake_sequence_generator, fake_notifier)
+    retention = SQLRetention(sqlite_session_factory, RetentionMode.DELETE, timedelta(days=1), batch_size=2)
+    retention.run(datetime(2022, 1, 5))
+    batches = []
+    report = retention.run(datetime(2022, 1, 5), batches.append)
+    assert batches == [] and report.rows == 0 and retention.retain_events(datetime(2022, 1, 5)).rows == 0
@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+
+from eventbot.domain import CalendarModifiedConcurrently
+from eventbot.infrastructure.retry import ConflictRetry
+
+
+def test_operation_is_retried_on_conflict_until_attempts_run_out():
+    retry = ConflictRetry(max_attempts=3, base_delay=0.001)
+    attempts = []
+
+    def conflicting_twice() -> str:
+        attempts.append(len(attempts))
+        if len(attempts) < 3:
+            raise CalendarModifiedConcurrently()
+        return 'tes-1'
+
+    def always_conflicting() -> None:
+        raise CalendarModifiedConcurrently()
+
+    assert asyncio.run(retry(conflicting_twice)) == 'tes-1' and len(attempts) == 3
+    with pytest.raises(CalendarModifiedConcurrently):
+        asyncio.run(retry(always_conflicting))
+    assert retry.stats() == (2, 5, 1)
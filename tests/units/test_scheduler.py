@@ -0,0 +1,27 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from eventbot.infrastructure.retry import ConflictRetry
+from eventbot.infrastructure.scheduler import NotificationScheduler
+
+from tests.fakes import FakeClock
+
+
+def test_scheduler_dispatches_only_due_calendars_at_their_latest_instant():
+    clock = FakeClock(datetime(2023, 8, 10, 12))
+    dispatched = []
+    scheduler = NotificationScheduler(None, clock, ConflictRetry())
+    scheduler._dispatch = lambda guild, channel: dispatched.append((guild, channel))
+    scheduler.schedule('guild', 'first', datetime(2023, 8, 10, 12, 30))
+    scheduler.schedule('guild', 'second', datetime(2023, 8, 10, 12, 10))
+    scheduler.schedule('guild', 'second', datetime(2023, 8, 10, 13))
+    scheduler.schedule('guild', 'third', datetime(2023, 8, 10, 12, 20))
+    scheduler.schedule('guild', 'third', None)
+
+    asyncio.run(scheduler.dispatch_due())
+    assert dispatched == [] and scheduler._time_to_next_due() == 30 * 60
+
+    clock.progress(timedelta(minutes=45))
+    asyncio.run(scheduler.dispatch_due())
+    assert dispatched == [('guild', 'first')] and scheduler.stats().last_lateness == timedelta(minutes=15)
+    assert scheduler.stats().scheduled_calendars == 1
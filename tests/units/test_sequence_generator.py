@@ -0,0 +1,33 @@
+import asyncio
+from itertools import count
+
+from eventbot.infrastructure.persistence.sequence_generator import SequenceBlockAllocator
+
+
+def test_processes_sharing_sequence_hand_out_unique_values():
+    sequence = count(1, 5)
+    draws = []
+
+    def draw_block_starts(blocks: int):
+        draws.append(blocks)
+        return [next(sequence) for _ in range(blocks)]
+
+    first_process, second_process = SequenceBlockAllocator(5), SequenceBlockAllocator(5)
+    values = first_process.take(3, draw_block_starts) + second_process.take(1, draw_block_starts)
+    values += first_process.take(13, draw_block_starts) + second_process.take(4, draw_block_starts)
+    assert sorted(values) == list(range(1, 22)) and draws == [1, 1, 3]
+
+
+def test_values_are_taken_after_blocks_are_drawn_asynchronously():
+    sequence = count(1, 5)
+
+    async def draw_block_starts(blocks: int):
+        await asyncio.sleep(0)
+        return [next(sequence) for _ in range(blocks)]
+
+    async def take_concurrently():
+        allocator = SequenceBlockAllocator(5)
+        return await asyncio.gather(*(allocator.take_async(3, draw_block_starts) for _ in range(4)))
+
+    values = [value for taken in asyncio.run(take_concurrently()) for value in taken]
+    assert len(set(values)) == 12 and all(len(taken) == 3 for taken in [values[i:i + 3] for i in range(0, 12, 3)])